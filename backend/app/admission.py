@@ -0,0 +1,273 @@
+"""
+Admission control for the LLM-backed endpoints. Each endpoint has a concurrency limit,
+a bounded wait queue and a deadline; all of them share one capacity, handed out by
+priority (interactive chat before dashboards). Students also have a token-bucket rate
+limit. A request that cannot be served within its deadline is shed instead: either it
+is refused when it arrives (queue full, or the expected wait is already past the
+deadline), or it is cut off when the deadline passes. Endpoints then serve their non-LLM
+fallback or a 503/429 with Retry-After, so p99 stays near the deadline when Gemini
+slows down rather than growing with the backlog.
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from .metrics import metrics
+
+BUSY_MESSAGE = "HackAssist is busy right now, please retry shortly."
+
+class Overloaded(Exception):
+    def __init__(self, endpoint: str, reason: str, retry_after: float):
+        super().__init__(f"{endpoint} overloaded: {reason}")
+        self.endpoint = endpoint
+        self.reason = reason  # queue_full, deadline, rate_limited
+        self.retry_after = retry_after
+
+class EndpointPolicy:
+    def __init__(self, limit: int, priority: int, max_queue: int, deadline: float):
+        self.limit = limit
+        self.priority = priority  # Lower is served first
+        self.max_queue = max_queue
+        self.deadline = deadline  # Seconds from arrival to response
+
+class RateLimiter:
+    """Token bucket per key: `rate` requests per second, bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: Dict[object, Tuple[float, float]] = {}  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key) -> float:
+        """0 if the request may go ahead, else seconds until it could."""
+        if self.rate <= 0 or key is None:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+            if tokens < 1.0:
+                self._buckets[key] = (tokens, now)
+                return (1.0 - tokens) / self.rate
+            self._buckets[key] = (tokens - 1.0, now)
+            if len(self._buckets) > self.max_keys:
+                # Buckets idle long enough to be full again carry no state
+                idle = self.burst / self.rate
+                for stale in [k for k, (_, t) in self._buckets.items() if now - t > idle]:
+                    del self._buckets[stale]
+            return 0.0
+
+class _Waiter:
+    __slots__ = ("endpoint", "priority", "seq", "future")
+
+    def __init__(self, endpoint: str, priority: int, seq: int, future: asyncio.Future):
+        self.endpoint = endpoint
+        self.priority = priority
+        self.seq = seq
+        self.future = future
+
+class AdmissionController:
+    def __init__(self, capacity: int, policies: Dict[str, EndpointPolicy], limiter: RateLimiter, enabled: bool = True):
+        self.capacity = capacity
+        self.policies = policies
+        self.limiter = limiter
+        self.enabled = enabled
+        self.in_flight: Dict[str, int] = {name: 0 for name in policies}
+        self.service_seconds: Dict[str, Optional[float]] = {name: None for name in policies}  # EWMA of admitted run time
+        self._waiters = []
+        self._seq = 0
+        self.counters: Dict[str, Dict[str, int]] = {
+            name: {"admitted": 0, "queued": 0, "queue_full": 0, "deadline": 0, "rate_limited": 0, "timeouts": 0, "degraded": 0}
+            for name in policies
+        }
+
+    # Slots
+    def _count(self, endpoint: str, outcome: str):
+        self.counters[endpoint][outcome] += 1
+        metrics.inc("admission_total", labels=(("endpoint", endpoint), ("outcome", outcome)))
+
+    def _has_room(self, endpoint: str) -> bool:
+        return sum(self.in_flight.values()) < self.capacity and self.in_flight[endpoint] < self.policies[endpoint].limit
+
+    def _expected_wait(self, endpoint: str, queued: int) -> Optional[float]:
+        """The endpoint's queue ahead of this request, times its service time per slot; None until measured."""
+        service = self.service_seconds[endpoint]
+        if service is None:
+            return None
+        return (queued + 1) * service / self.policies[endpoint].limit
+
+    def retry_after(self, endpoint: str) -> float:
+        return max(1.0, self.service_seconds[endpoint] or 1.0)
+
+    async def acquire(self, endpoint: str, student_id=None) -> float:
+        """Takes a slot for the endpoint; returns the request's deadline (monotonic) or raises Overloaded."""
+        policy = self.policies[endpoint]
+        deadline = time.monotonic() + policy.deadline
+        if not self.enabled:
+            self.in_flight[endpoint] += 1
+            return deadline
+        wait = self.limiter.take(student_id)
+        if wait:
+            self._count(endpoint, "rate_limited")
+            raise Overloaded(endpoint, "rate_limited", wait)
+
+        # 1. Free slot and no one queued for this endpoint: straight in. Waiters of other
+        # endpoints can't take the slot, or _dispatch would already have handed it over
+        if self._has_room(endpoint) and not any(w.endpoint == endpoint for w in self._waiters):
+            self.in_flight[endpoint] += 1
+            self._count(endpoint, "admitted")
+            return deadline
+
+        # 2. Shed at the door: full queue, or a wait that already overshoots the deadline
+        queued = sum(1 for w in self._waiters if w.endpoint == endpoint)
+        if queued >= policy.max_queue:
+            self._count(endpoint, "queue_full")
+            raise Overloaded(endpoint, "queue_full", self.retry_after(endpoint))
+        expected = self._expected_wait(endpoint, queued)
+        if expected is not None and expected > policy.deadline:
+            self._count(endpoint, "deadline")
+            raise Overloaded(endpoint, "deadline", self.retry_after(endpoint))
+
+        # 3. Queue until a slot is handed over or the deadline passes
+        self._seq += 1
+        waiter = _Waiter(endpoint, policy.priority, self._seq, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self._count(endpoint, "queued")
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter.future, deadline - start)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                # Handed a slot just as the wait gave up: pass it on
+                self._release_slot(endpoint)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._count(endpoint, "deadline")
+            raise Overloaded(endpoint, "deadline", self.retry_after(endpoint))
+        metrics.observe("admission_wait_seconds", time.monotonic() - start, (("endpoint", endpoint),))
+        self._count(endpoint, "admitted")
+        return deadline
+
+    def _release_slot(self, endpoint: str):
+        self.in_flight[endpoint] -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Hands free slots to waiters, highest priority (then oldest) first."""
+        for waiter in sorted(self._waiters, key=lambda w: (w.priority, w.seq)):
+            if sum(self.in_flight.values()) >= self.capacity:
+                break
+            if waiter.future.done():
+                self._waiters.remove(waiter)
+            elif self.in_flight[waiter.endpoint] < self.policies[waiter.endpoint].limit:
+                self._waiters.remove(waiter)
+                self.in_flight[waiter.endpoint] += 1
+                waiter.future.set_result(True)
+
+    def release(self, endpoint: str, started: Optional[float] = None):
+        if started is not None:
+            elapsed = time.monotonic() - started
+            previous = self.service_seconds[endpoint]
+            self.service_seconds[endpoint] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+        self._release_slot(endpoint)
+
+    # Running work
+    async def run(self, endpoint: str, work: Callable[[], Awaitable], fallback: Optional[Callable[[], Awaitable]] = None,
+                  student_id=None, inputs: Optional[dict] = None):
+        """
+        (result, degraded): work() within the endpoint's deadline, else fallback() (or None)
+        and the reason it was degraded: queue_full, deadline, rate_limited or timeout.
+        With `inputs`, identical concurrent requests are coalesced before admission: only the
+        flight's leader takes a slot, a queue place and a rate-limit token, and every
+        follower gets its (result, degraded).
+        """
+        if inputs is not None:
+            from .single_flight import single_flight
+            return await single_flight.do(f"admission:{endpoint}", inputs, lambda: self.run(endpoint, work, fallback, student_id))
+        if not self.enabled:
+            return await work(), None
+        try:
+            deadline = await self.acquire(endpoint, student_id)
+        except Overloaded as e:
+            reason = e.reason
+        else:
+            started = time.monotonic()
+            try:
+                return await asyncio.wait_for(work(), max(deadline - started, 0.001)), None
+            except asyncio.TimeoutError:
+                self._count(endpoint, "timeouts")
+                reason = "timeout"
+            finally:
+                self.release(endpoint, started)
+        self._count(endpoint, "degraded")
+        return (await fallback() if fallback else None), reason
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "capacity": self.capacity,
+            "in_flight": sum(self.in_flight.values()),
+            "queued": len(self._waiters),
+            "endpoints": {
+                name: {
+                    **self.counters[name],
+                    "in_flight": self.in_flight[name],
+                    "waiting": sum(1 for w in self._waiters if w.endpoint == name),
+                    "limit": p.limit, "priority": p.priority, "max_queue": p.max_queue, "deadline_seconds": p.deadline,
+                    "service_seconds": round(self.service_seconds[name], 3) if self.service_seconds[name] is not None else None,
+                }
+                for name, p in self.policies.items()
+            },
+        }
+
+def overloaded_response(endpoint: str, reason: str, retry_after: Optional[float] = None):
+    """429 for a student over their rate, 503 otherwise; both with Retry-After."""
+    from fastapi.responses import JSONResponse
+    retry_after = retry_after or admission.retry_after(endpoint)
+    message = "Too many requests, slow down." if reason == "rate_limited" else BUSY_MESSAGE
+    return JSONResponse(
+        status_code=429 if reason == "rate_limited" else 503,
+        content={"status": "error", "message": message, "reason": reason},
+        headers={"Retry-After": str(math.ceil(retry_after))},
+    )
+
+def controller_from_env() -> AdmissionController:
+    """ADMISSION_<ENDPOINT>_LIMIT / _QUEUE / _DEADLINE override the per-endpoint defaults."""
+    defaults = {
+        # name: (limit, priority, max_queue, deadline seconds)
+        "chat": (12, 0, 32, 15.0),
+        "roadmap": (6, 1, 16, 8.0),
+        "recommendations": (6, 1, 16, 5.0),
+        "analytics": (4, 2, 16, 10.0),
+    }
+    policies = {}
+    for name, (limit, priority, max_queue, deadline) in defaults.items():
+        prefix = f"ADMISSION_{name.upper()}"
+        policies[name] = EndpointPolicy(
+            limit=int(os.getenv(f"{prefix}_LIMIT", limit)),
+            priority=priority,
+            max_queue=int(os.getenv(f"{prefix}_QUEUE", max_queue)),
+            deadline=float(os.getenv(f"{prefix}_DEADLINE", deadline)),
+        )
+    return AdmissionController(
+        # Twice the LLM registry's concurrency: a slot also covers the request's DB and retrieval
+        # work, yet the backlog still waits here, by priority, rather than in the registry's FIFO
+        capacity=int(os.getenv("ADMISSION_CAPACITY", 2 * int(os.getenv("LLM_MAX_CONCURRENCY", "8")))),
+        policies=policies,
+        limiter=RateLimiter(
+            rate=float(os.getenv("ADMISSION_RATE_PER_MINUTE", "30")) / 60.0,
+            burst=int(os.getenv("ADMISSION_RATE_BURST", "10")),
+        ),
+        enabled=os.getenv("ADMISSION", "on") != "off",
+    )
+
+# Global controller; ADMISSION=off admits everything with no deadline, as before
+admission = controller_from_env()
+metrics.describe("admission_total", "counter", "Admission decisions by endpoint: admitted, queued, queue_full, deadline, rate_limited, timeouts, degraded.")
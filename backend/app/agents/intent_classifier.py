@@ -0,0 +1,194 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+INTENTS = ["RECOMMENDATION", "TEAM_MATCHING", "IDEA_GEN", "ANALYTICS"]
+
+# Labelled queries used to train the local model (one JSON object per line)
+TRAINING_PATH = os.path.join(os.path.dirname(__file__), "intent_queries.jsonl")
+
+# Below this confidence the router falls back to the LLM
+DEFAULT_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.6"))
+
+TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased unigrams plus adjacent bigrams."""
+    words = TOKEN_RE.findall(text.lower())
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+# 1. Keyword / regex rules
+KEYWORD_RULES = {
+    "TEAM_MATCHING": [
+        r"\bteam ?mates?\b", r"\bteams?\b", r"\bsquad\b", r"\bpartners?\b", r"\bcollaborat",
+        r"\bco-?founders?\b", r"\bgroup (up|with)\b", r"\bwho (should|can) i (work|team|pair)",
+    ],
+    "ANALYTICS": [
+        r"\banalytics?\b", r"\bstatistics?\b", r"\bstats\b", r"\bparticipation (rate|numbers|data)",
+        r"\bdepartment(al)? (report|summary|performance|overview)", r"\binnovation score\b",
+        r"\btrending skills\b", r"\bhow many (students|participations|teams)",
+    ],
+    "IDEA_GEN": [
+        r"\bideas?\b", r"\bbrainstorm", r"\bwhat (should|can|could) (i|we) build\b",
+        r"\bproject (concepts?|suggestions?)\b", r"\bsomething to build\b",
+    ],
+    "RECOMMENDATION": [
+        r"\brecommend", r"\bwhich hackathons?\b", r"\bhackathons? (for|near|matching|that)\b",
+        r"\bupcoming (hackathons?|events?)\b", r"\bdeadlines?\b", r"\bshould i (join|apply|participate)",
+        r"\bevents? (for|matching)\b",
+    ],
+}
+
+class KeywordStage:
+    """Resolves a query when the regex rules point at exactly one intent."""
+    name = "rules"
+
+    def __init__(self, rules: Dict[str, List[str]] = KEYWORD_RULES, confidence: float = 0.95):
+        self.rules = {intent: [re.compile(p) for p in patterns] for intent, patterns in rules.items()}
+        self.confidence = confidence
+
+    def predict(self, query: str) -> Tuple[Optional[str], float]:
+        text = query.lower()
+        hits = {intent: sum(1 for p in patterns if p.search(text)) for intent, patterns in self.rules.items()}
+        hits = {intent: n for intent, n in hits.items() if n}
+        if len(hits) == 1:
+            return next(iter(hits)), self.confidence
+        return None, 0.0
+
+# 2. TF-IDF nearest-centroid model
+class TfidfStage:
+    """Cosine similarity against per-intent TF-IDF centroids, softmaxed into a confidence."""
+    name = "tfidf"
+
+    def __init__(self, examples: List[Tuple[str, str]], temperature: float = 12.0):
+        self.temperature = temperature
+        docs = [(Counter(tokenize(text)), label) for text, label in examples]
+        df = Counter(term for tf, _ in docs for term in tf)
+        n_docs = len(docs)
+        self.idf = {term: math.log((1 + n_docs) / (1 + n)) + 1.0 for term, n in df.items()}
+
+        sums: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        for tf, label in docs:
+            for term, weight in self._vectorize(tf).items():
+                sums[label][term] += weight
+        self.centroids = {label: self._normalize(vec) for label, vec in sums.items()}
+
+    @classmethod
+    def from_file(cls, path: str = TRAINING_PATH, **kwargs):
+        examples = []
+        with open(path, "r") as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    examples.append((row["query"], row["intent"]))
+        return cls(examples, **kwargs)
+
+    @staticmethod
+    def _normalize(vec: Dict[str, float]) -> Dict[str, float]:
+        norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+        return {term: w / norm for term, w in vec.items()}
+
+    def _vectorize(self, tf: Counter) -> Dict[str, float]:
+        vec = {term: (1 + math.log(n)) * self.idf[term] for term, n in tf.items() if term in self.idf}
+        return self._normalize(vec)
+
+    def predict(self, query: str) -> Tuple[Optional[str], float]:
+        vec = self._vectorize(Counter(tokenize(query)))
+        if not vec:
+            return None, 0.0
+        sims = {
+            label: sum(w * centroid.get(term, 0.0) for term, w in vec.items())
+            for label, centroid in self.centroids.items()
+        }
+        peak = max(sims.values())
+        exps = {label: math.exp(self.temperature * (s - peak)) for label, s in sims.items()}
+        total = sum(exps.values())
+        label = max(exps, key=exps.get)
+        return label, exps[label] / total
+
+# 3. Pipeline with LLM fallback
+class IntentClassifier:
+    """Runs local stages in order and only calls the LLM below the confidence threshold."""
+
+    def __init__(self, stages: List, threshold: float = DEFAULT_THRESHOLD):
+        self.stages = stages
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.counters = Counter()
+
+    def classify_local(self, query: str) -> Tuple[Optional[str], float, str]:
+        """Best local guess as (intent, confidence, stage_name)."""
+        best = (None, 0.0, "none")
+        for stage in self.stages:
+            intent, confidence = stage.predict(query)
+            if intent and confidence > best[1]:
+                best = (intent, confidence, stage.name)
+            if best[1] >= self.threshold:
+                break
+        return best
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counters[key] += 1
+
+    def try_local(self, query: str) -> Optional[str]:
+        """Returns the intent if a local stage is confident enough, else None."""
+        intent, confidence, stage = self.classify_local(query)
+        self._count("total")
+        if intent and confidence >= self.threshold:
+            self._count(f"hit_{stage}")
+            return intent
+        return None
+
+    def record_fallback(self, raw_label: str) -> str:
+        """Counts an LLM fallback and normalizes its label."""
+        self._count("llm_fallback")
+        return normalize_label(raw_label)
+
+    def classify(self, query: str, llm_fallback: Optional[Callable[[str], str]] = None) -> str:
+        intent = self.try_local(query)
+        if intent:
+            return intent
+        if llm_fallback is None:
+            self._count("unresolved")
+            return self.classify_local(query)[0] or "IDEA_GEN"
+        return self.record_fallback(llm_fallback(query))
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        total = counters.get("total", 0)
+        local_hits = sum(n for key, n in counters.items() if key.startswith("hit_"))
+        return {
+            "threshold": self.threshold,
+            "total": total,
+            "local_hits": local_hits,
+            "llm_fallbacks": counters.get("llm_fallback", 0),
+            "hit_ratio": round(local_hits / total, 4) if total else 0.0,
+            **{key: n for key, n in counters.items() if key.startswith("hit_")},
+        }
+
+def normalize_label(raw: str) -> str:
+    """Maps free-form LLM output onto one of INTENTS."""
+    text = raw.strip().upper()
+    for intent in INTENTS:
+        if intent in text:
+            return intent
+    if "TEAM" in text:
+        return "TEAM_MATCHING"
+    if "IDEA" in text:
+        return "IDEA_GEN"
+    return text
+
+def build_default_classifier() -> IntentClassifier:
+    stages = [KeywordStage()]
+    if os.path.exists(TRAINING_PATH):
+        stages.append(TfidfStage.from_file(TRAINING_PATH))
+    return IntentClassifier(stages)
+
+# Global classifier instance
+intent_classifier = build_default_classifier()
@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import re
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+SKILL_DIM = 1024
+TEXT_DIM = 512
+TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+STOPWORDS = {"a", "an", "and", "the", "of", "for", "to", "in", "on", "with", "by", "at", "is", "are", "its", "this", "that"}
+
+def _bucket(token: str, dim: int) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little") % dim
+
+def _normalize_rows(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+def encode_skills(skill_lists: Iterable[Optional[List[str]]]) -> np.ndarray:
+    """Multi-hot hashed skill vectors, one L2-normalized row per entity."""
+    skill_lists = list(skill_lists)
+    m = np.zeros((len(skill_lists), SKILL_DIM), dtype=np.float32)
+    for row, skills in enumerate(skill_lists):
+        for skill in skills or []:
+            m[row, _bucket(skill.strip().lower(), SKILL_DIM)] = 1.0
+    return _normalize_rows(m)
+
+def encode_text(texts: Iterable[str]) -> np.ndarray:
+    """Hashed bag-of-words embedding; a local stand-in for a dense text embedding."""
+    texts = list(texts)
+    m = np.zeros((len(texts), TEXT_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in TOKEN_RE.findall((text or "").lower()):
+            if token not in STOPWORDS:
+                m[row, _bucket(token, TEXT_DIM)] += 1.0
+    np.log1p(m, out=m)
+    return _normalize_rows(m)
+
+def student_text(student) -> str:
+    return " ".join((student.interests or []) + (student.skills or []))
+
+def hackathon_text(hack) -> str:
+    return " ".join([hack.name or "", hack.description or ""] + (hack.skills_required or []))
+
+class RecommendationIndex:
+    """
+    Precomputed top-k hackathons per student.
+    Scores are skill overlap (cosine of hashed multi-hot vectors) blended with text similarity,
+    computed as one matrix product over [skill | text] feature blocks.
+    """
+
+    def __init__(self, k: int = 20, skill_weight: float = 0.6, text_weight: float = 0.4, block_size: int = 1024):
+        self.k = k
+        self.skill_weight = skill_weight
+        self.text_weight = text_weight
+        self.block_size = block_size
+        self._lock = threading.RLock()
+        self.built = False
+
+        self.hack_ids = np.zeros(0, dtype=np.int64)
+        self.hack_vecs = np.zeros((0, SKILL_DIM + TEXT_DIM), dtype=np.float32)
+        self.hack_deadlines: Dict[int, Optional[datetime]] = {}
+        self.student_vecs: Dict[int, np.ndarray] = {}
+        # student_id -> (hackathon_ids, scores), sorted by score descending
+        self.topk: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    # Feature construction
+    def _student_matrix(self, students) -> np.ndarray:
+        return np.hstack([
+            self.skill_weight * encode_skills(s.skills for s in students),
+            self.text_weight * encode_text(student_text(s) for s in students),
+        ])
+
+    @staticmethod
+    def _hackathon_matrix(hackathons) -> np.ndarray:
+        return np.hstack([
+            encode_skills(h.skills_required for h in hackathons),
+            encode_text(hackathon_text(h) for h in hackathons),
+        ])
+
+    def _select(self, ids: np.ndarray, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k of a 2D score block; ids is one row shared by all students or one row each."""
+        k = min(self.k, scores.shape[1])
+        if k == 0:
+            empty = np.zeros((scores.shape[0], 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        ids = np.broadcast_to(ids, scores.shape)
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        part_scores = np.take_along_axis(scores, part, axis=1)
+        order = np.argsort(-part_scores, axis=1)
+        part = np.take_along_axis(part, order, axis=1)
+        return np.take_along_axis(ids, part, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+    # Full build
+    def build(self, students, hackathons):
+        students = [s for s in students if s.skills or s.interests]
+        with self._lock:
+            self.hack_ids = np.array([h.hackathon_id for h in hackathons], dtype=np.int64)
+            self.hack_vecs = self._hackathon_matrix(hackathons)
+            self.hack_deadlines = {h.hackathon_id: h.deadline for h in hackathons}
+            self.student_vecs, self.topk = {}, {}
+            for start in range(0, len(students), self.block_size):
+                block = students[start:start + self.block_size]
+                vecs = self._student_matrix(block)
+                ids, scores = self._select(self.hack_ids, vecs @ self.hack_vecs.T)
+                for i, s in enumerate(block):
+                    self.student_vecs[s.student_id] = vecs[i]
+                    self.topk[s.student_id] = (ids[i], scores[i])
+            self.built = True
+
+    def build_from_db(self, db):
+        from ..database import Student, Hackathon
+        self.build(db.query(Student).all(), db.query(Hackathon).all())
+
+    async def abuild_from_db(self, db):
+        """Same as build_from_db for an AsyncSession; the matrix work runs off the event loop."""
+        from sqlalchemy import select
+        from ..database import Student, Hackathon
+        students = (await db.scalars(select(Student))).all()
+        hackathons = (await db.scalars(select(Hackathon))).all()
+        await asyncio.to_thread(self.build, students, hackathons)
+
+    # Incremental maintenance
+    def upsert_student(self, student):
+        """Re-scores one student (onboard / profile edit): a single matrix-vector product."""
+        with self._lock:
+            if not self.built:
+                return
+            if not (student.skills or student.interests):
+                # Empty profile, as in build(): callers fall back to the active list
+                self.student_vecs.pop(student.student_id, None)
+                self.topk.pop(student.student_id, None)
+                return
+            vec = self._student_matrix([student])
+            ids, scores = self._select(self.hack_ids, vec @ self.hack_vecs.T)
+            self.student_vecs[student.student_id] = vec[0]
+            self.topk[student.student_id] = (ids[0], scores[0])
+
+    def add_hackathons(self, hackathons):
+        """Scores only the new columns and merges them into every student's existing top-k."""
+        with self._lock:
+            if not self.built or not hackathons:
+                return
+            new_ids = np.array([h.hackathon_id for h in hackathons], dtype=np.int64)
+            new_vecs = self._hackathon_matrix(hackathons)
+            self.hack_ids = np.concatenate([self.hack_ids, new_ids])
+            self.hack_vecs = np.vstack([self.hack_vecs, new_vecs])
+            self.hack_deadlines.update({h.hackathon_id: h.deadline for h in hackathons})
+
+            student_ids = list(self.student_vecs)
+            for start in range(0, len(student_ids), self.block_size):
+                block_ids = student_ids[start:start + self.block_size]
+                vecs = np.vstack([self.student_vecs[sid] for sid in block_ids])
+                new_scores = vecs @ new_vecs.T
+                old_ids = np.vstack([self.topk[sid][0] for sid in block_ids])
+                old_scores = np.vstack([self.topk[sid][1] for sid in block_ids])
+                top_ids, top_scores = self._select(
+                    np.hstack([old_ids, np.broadcast_to(new_ids, new_scores.shape)]),
+                    np.hstack([old_scores, new_scores]),
+                )
+                for i, sid in enumerate(block_ids):
+                    self.topk[sid] = (top_ids[i], top_scores[i])
+
+    def invalidate(self):
+        """Drops the precomputed scores (hackathons changed in place); rebuilt on next use."""
+        with self._lock:
+            self.built = False
+
+    # Reads
+    def recommend(self, student_id: int, n: int = 3, now: Optional[datetime] = None) -> List[Tuple[int, float]]:
+        """Best n still-active hackathons for a student as (hackathon_id, score) pairs."""
+        now = now or datetime.now()
+        with self._lock:
+            if student_id not in self.topk:
+                return []
+            ids, scores = self.topk[student_id]
+            active = [
+                (int(hid), float(score)) for hid, score in zip(ids, scores)
+                if self.hack_deadlines.get(int(hid)) is None or self.hack_deadlines[int(hid)] >= now
+            ]
+            if len(active) >= n or len(ids) >= len(self.hack_ids):
+                return active[:n]
+            # Too many precomputed picks expired: rescore this student against everything
+            vec = self.student_vecs[student_id]
+            all_scores = self.hack_vecs @ vec
+            order = np.argsort(-all_scores)
+            active = [
+                (int(self.hack_ids[i]), float(all_scores[i])) for i in order
+                if self.hack_deadlines.get(int(self.hack_ids[i])) is None
+                or self.hack_deadlines[int(self.hack_ids[i])] >= now
+            ]
+            return active[:n]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"built": self.built, "students": len(self.topk), "hackathons": int(len(self.hack_ids)), "k": self.k}
+
+# Global index instance, built from the DB on first use
+recommendation_index = RecommendationIndex()
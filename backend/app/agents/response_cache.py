@@ -0,0 +1,237 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+def normalize_inputs(value):
+    """Case/whitespace-insensitive form of prompt inputs so trivial variations share a key."""
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value.strip().lower())
+    if isinstance(value, dict):
+        return {k: normalize_inputs(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [normalize_inputs(v) for v in value]
+    return value
+
+def hash_inputs(namespace: str, inputs: dict) -> str:
+    payload = json.dumps(normalize_inputs(inputs), sort_keys=True, default=str)
+    return hashlib.sha256(f"{namespace}:{payload}".encode()).hexdigest()
+
+def unit_vector(vector: List[float]) -> Optional[np.ndarray]:
+    v = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm else None
+
+class _VectorGroup:
+    """One (namespace, scope)'s cached query vectors as unit rows of one matrix, grown by doubling."""
+
+    def __init__(self, dim: int):
+        self.keys: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.matrix = np.zeros((8, dim), dtype=np.float32)
+
+    def add(self, key: str, unit: np.ndarray):
+        row = self.rows.get(key)
+        if row is None:
+            if len(self.keys) == len(self.matrix):
+                self.matrix = np.vstack([self.matrix, np.zeros_like(self.matrix)])
+            row = self.rows[key] = len(self.keys)
+            self.keys.append(key)
+        self.matrix[row] = unit
+
+    def remove(self, key: str):
+        # Last row moves into the gap, so live rows stay contiguous
+        row = self.rows.pop(key)
+        last = len(self.keys) - 1
+        if row != last:
+            moved = self.keys[last]
+            self.keys[row], self.rows[moved] = moved, row
+            self.matrix[row] = self.matrix[last]
+        self.keys.pop()
+
+    def similarity(self, key: str, unit: np.ndarray) -> float:
+        row = self.rows.get(key)
+        return float(self.matrix[row] @ unit) if row is not None else -1.0
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "tags", "cost")
+
+    def __init__(self, value, expires_at: float, tags: frozenset, cost: float):
+        self.value = value
+        self.expires_at = expires_at
+        self.tags = tags
+        self.cost = cost
+
+class ResponseCache:
+    """
+    In-process TTL + LRU cache for agent LLM responses.
+    Exact hits are keyed on a normalized hash of the prompt inputs; near-duplicate
+    free-text queries can additionally hit through embedding similarity.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600, similarity_threshold: float = 0.92):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn: Optional[Callable[[str], List[float]]] = None
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # (namespace, scope) -> cached query vectors, and key -> its group, for the similarity lookup
+        self._groups: Dict[Tuple[str, str], _VectorGroup] = {}
+        self._vectors: Dict[str, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "saved_seconds": 0.0}
+
+    def enable_semantic(self, embed_fn: Callable[[str], List[float]]):
+        """Turns on near-duplicate lookup using the given embedding function."""
+        self.embed_fn = embed_fn
+
+    def _get(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _drop(self, key: str):
+        self._entries.pop(key, None)
+        self._drop_vector(key)
+
+    def _drop_vector(self, key: str):
+        group_key = self._vectors.pop(key, None)
+        if group_key is not None:
+            group = self._groups[group_key]
+            group.remove(key)
+            if not group.keys:
+                del self._groups[group_key]
+
+    def _put(self, key: str, entry: _Entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            oldest, _ = self._entries.popitem(last=False)
+            self._drop_vector(oldest)
+            self._stats["evictions"] += 1
+
+    def _put_vector(self, key: str, namespace: str, scope: str, unit: np.ndarray):
+        group = self._groups.get((namespace, scope))
+        if group is None or group.matrix.shape[1] != len(unit):
+            # New group, or the embedding model changed dimension: start the group over
+            if group is not None:
+                for stale in group.keys:
+                    self._vectors.pop(stale, None)
+            group = self._groups[(namespace, scope)] = _VectorGroup(len(unit))
+        group.add(key, unit)
+        self._vectors[key] = (namespace, scope)
+
+    def _nearest(self, namespace: str, scope: str, unit: np.ndarray) -> Optional[str]:
+        """
+        Most similar cached key above the threshold: one matmul and argmax, scored outside
+        the lock on a snapshot of the group. Rows can move while it runs, so the winner is
+        checked again under the lock before it is returned.
+        """
+        with self._lock:
+            group = self._groups.get((namespace, scope))
+            if group is None or group.matrix.shape[1] != len(unit):
+                return None
+            keys, matrix = list(group.keys), group.matrix
+        if not keys:
+            return None
+        sims = matrix[:len(keys)] @ unit
+        best = int(np.argmax(sims))
+        if sims[best] < self.similarity_threshold:
+            return None
+        with self._lock:
+            group = self._groups.get((namespace, scope))
+            if group is None or group.similarity(keys[best], unit) < self.similarity_threshold:
+                return None
+        return keys[best]
+
+    def _hit(self, entry: _Entry, semantic: bool = False):
+        self._stats["semantic_hits" if semantic else "hits"] += 1
+        self._stats["saved_seconds"] += entry.cost
+        return entry.value
+
+    async def get_or_compute(
+        self,
+        namespace: str,
+        inputs: dict,
+        compute: Callable[[], Awaitable],
+        tags: Iterable[str] = (),
+        semantic_text: Optional[str] = None,
+    ):
+        """Returns a cached response for these inputs or awaits compute() and stores it."""
+        key = hash_inputs(namespace, inputs)
+        with self._lock:
+            entry = self._get(key)
+            if entry is not None:
+                return self._hit(entry)
+
+        # Near-duplicate lookup: same namespace and same non-text inputs
+        unit = scope = None
+        if semantic_text and self.embed_fn:
+            scope = hash_inputs(namespace, {k: v for k, v in inputs.items() if v != semantic_text})
+            try:
+                unit = unit_vector(await asyncio.to_thread(self.embed_fn, normalize_inputs(semantic_text)))
+            except Exception as e:
+                print(f"Response cache embedding skipped: {e}")
+            if unit is not None:
+                # Scored on a worker thread: the event loop never waits on the scan
+                near = await asyncio.to_thread(self._nearest, namespace, scope, unit)
+                with self._lock:
+                    entry = self._get(near) if near else None
+                    if entry is not None:
+                        return self._hit(entry, semantic=True)
+
+        with self._lock:
+            self._stats["misses"] += 1
+        start = time.perf_counter()
+        value = await compute()
+        cost = time.perf_counter() - start
+
+        with self._lock:
+            self._put(key, _Entry(value, time.monotonic() + self.ttl_seconds, frozenset(tags), cost))
+            if unit is not None:
+                self._put_vector(key, namespace, scope, unit)
+        return value
+
+    def invalidate(self, *tags: str):
+        """Drops every entry carrying any of the given tags."""
+        wanted = set(tags)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry.tags & wanted]
+            for key in stale:
+                self._drop(key)
+            self._stats["invalidations"] += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+            self._vectors.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            size = len(self._entries)
+        lookups = stats["hits"] + stats["semantic_hits"] + stats["misses"]
+        stats["saved_seconds"] = round(stats["saved_seconds"], 3)
+        stats["hit_ratio"] = round((stats["hits"] + stats["semantic_hits"]) / lookups, 4) if lookups else 0.0
+        stats["size"] = size
+        stats["semantic_enabled"] = self.embed_fn is not None
+        return stats
+
+# Global cache instance
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512")),
+    ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600")),
+)
@@ -1,8 +1,14 @@
+import asyncio
+import contextvars
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import TypedDict, Annotated, List
 from langgraph.graph import StateGraph, END
-from ..rag.rag_engine import rag_engine
-from langchain_google_genai import ChatGoogleGenerativeAI
+from ..rag.rag_engine import get_rag_engine
+from .intent_classifier import intent_classifier
+from ..llm import DEFAULT_MODEL, llm_registry
+from ..metrics import span, traced
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import BaseMessage, HumanMessage
 
 # Define State
@@ -13,29 +19,67 @@ class AgentState(TypedDict):
     context: str
     output: str
 
+# Blocking vector-store calls run here so they never sit on the event loop
+retrieval_pool = ThreadPoolExecutor(max_workers=int(os.getenv("RAG_MAX_WORKERS", "32")), thread_name_prefix="rag")
+
+# Only the recommendation executor reads state["context"]
+def needs_context(intent: str) -> bool:
+    return "RECOMMENDATION" in intent
+
+classify_prompt = ChatPromptTemplate.from_template(
+    "Classify this hackathon query: RECOMMENDATION, TEAM_MATCHING, IDEA_GEN, ANALYTICS. Query: {query}"
+)
+
+def classify_with_llm(query: str) -> str:
+    """Slow path: asks the LLM for the intent label."""
+    chain = llm_registry.chain("intent", classify_prompt)
+    with span("llm", model=DEFAULT_MODEL, chain="intent"):
+        return chain.invoke({"query": query}, config=llm_registry.config()).strip().upper()
+
+async def aclassify_with_llm(query: str) -> str:
+    """Async variant of classify_with_llm; never blocks the event loop."""
+    chain = llm_registry.chain("intent", classify_prompt)
+    res = await llm_registry.ainvoke(chain, {"query": query})
+    return res.strip().upper()
+
 # Router logic
-def router_node(state: AgentState):
-    llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
+async def router_node(state: AgentState):
+    """Local classification only; an empty intent means the LLM has to decide."""
+    query = state["messages"][-1].content
+    intent = intent_classifier.try_local(query)
+    return {"intent": intent or "", "context": ""}
+
+async def llm_classify_node(state: AgentState):
     query = state["messages"][-1].content
-    
-    # Simple classification prompt
-    prompt = f"Classify this hackathon query: RECOMMENDATION, TEAM_MATCHING, IDEA_GEN, ANALYTICS. Query: {query}"
-    intent = llm.invoke(prompt).content.strip().upper()
-    
-    # RAG lookup for context
-    context = rag_engine.query(query)
-    context_text = "\n".join([doc.page_content for doc in context])
-    
-    return {"intent": intent, "context": context_text}
+    raw = await aclassify_with_llm(query)
+    return {"intent": intent_classifier.record_fallback(raw)}
+
+async def retrieve_node(state: AgentState):
+    # PGVector search is blocking, so it runs on the retrieval pool
+    query = state["messages"][-1].content
+    loop = asyncio.get_running_loop()
+    # Run in a copy of this context so the pool thread's spans reach the request trace
+    context = await loop.run_in_executor(retrieval_pool, contextvars.copy_context().run, rag_query, query)
+    return {"context": "\n".join([doc.page_content for doc in context])}
+
+def rag_query(query: str):
+    return get_rag_engine().query(query)
+
+def route_after_router(state: AgentState):
+    intent = state.get("intent")
+    if not intent:
+        # Unknown intent: classify with the LLM and retrieve speculatively in parallel
+        return ["llm_classify", "retrieve"]
+    return ["retrieve"] if needs_context(intent) else ["executor"]
 
 # Node for Specialists
 async def execute_task(state: AgentState):
     from .specialist_agents import get_recommendations_text, get_team_suggestions, get_hackathon_ideas, get_department_analytics
-    
+
     query = state["messages"][-1].content
     intent = state["intent"]
     student_id = state.get("student_id", 1) # Default to 1 for demo
-    
+
     if "RECOMMENDATION" in intent:
         res = await get_recommendations_text(student_id, state["context"])
     elif "TEAM" in intent:
@@ -45,16 +89,22 @@ async def execute_task(state: AgentState):
     else:
         # Default to idea generation
         res = await get_hackathon_ideas(theme=query, tech_stack="React, Python, AI")
-    
+
     return {"output": res}
 
 # Build Graph
-workflow = StateGraph(AgentState)
-workflow.add_node("router", router_node)
-workflow.add_node("executor", execute_task)
+def build_graph(executor=execute_task):
+    workflow = StateGraph(AgentState)
+    # Every node is timed as span "graph.<name>"
+    for name, node in [("router", router_node), ("llm_classify", llm_classify_node), ("retrieve", retrieve_node), ("executor", executor)]:
+        workflow.add_node(name, traced(f"graph.{name}")(node))
 
-workflow.set_entry_point("router")
-workflow.add_edge("router", "executor")
-workflow.add_edge("executor", END)
+    workflow.set_entry_point("router")
+    workflow.add_conditional_edges("router", route_after_router, ["llm_classify", "retrieve", "executor"])
+    # Parallel branches share a superstep, so the executor runs once after both finish
+    workflow.add_edge("llm_classify", "executor")
+    workflow.add_edge("retrieve", "executor")
+    workflow.add_edge("executor", END)
+    return workflow.compile()
 
-app_graph = workflow.compile()
+app_graph = build_graph()
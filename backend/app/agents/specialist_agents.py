@@ -1,112 +1,160 @@
+import asyncio
+import json
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
+from datetime import datetime
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from dotenv import load_dotenv
-from ..database import SessionLocal, Student, Hackathon, Participation
+from ..llm import llm_registry
+from sqlalchemy import select, func
+from ..database import AsyncSessionLocal, Student, Hackathon, Participation
+from .response_cache import response_cache
+from .recommender import recommendation_index
+from .team_matcher import team_matcher
+from ..prompt_compiler import clip, hackathon_summary, prompt_compiler, student_summary
+from ..single_flight import single_flight
 
 # Load .env from project root relative to this file
 env_path = os.path.join(os.path.dirname(__file__), "..", "..", ".env")
 load_dotenv(env_path)
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    google_api_key=os.getenv("GEMINI_API_KEY")
-)
+# Near-duplicate chat queries can reuse cached answers via query embeddings
+if os.getenv("RESPONSE_CACHE_SEMANTIC") == "1":
+    def _embed_query(text: str):
+        from ..rag.rag_engine import get_rag_engine
+        return get_rag_engine().embeddings.embed_query(text)
+    response_cache.enable_semantic(_embed_query)
 
 # 1. Hackathon Recommendation Agent
+# Ranking comes from the precomputed index; the LLM only explains the final picks
 recommendation_prompt = ChatPromptTemplate.from_template("""
 You are a Hackathon Recommendation Agent.
-Recommend the top 3 hackathons based on student skills, interests, and experience level.
+These hackathons were selected for the student below. Write one brief reason per hackathon explaining the match.
 
 Student Profile: {profile}
-Active Hackathons from DB: {hackathons}
+Selected Hackathons: {hackathons}
 
-Output MUST be a valid JSON array of objects with these keys: 
-"hackathon_id", "name", "description", "match_score" (0-100), "reason" (brief explanation).
-Example: [{{"hackathon_id": 1, "name": "AI Hack", "description": "...", "match_score": 95, "reason": "Matches your Python skills"}}]
+Output MUST be a valid JSON object mapping each hackathon_id to its reason.
+Example: {{"1": "Matches your Python skills"}}
 ONLY return the JSON.
 """)
 
+def summary_of(hack) -> str:
+    """Stored prompt summary; rows synced before the column existed get theirs at the next init_db."""
+    return hack.summary or hackathon_summary(hack.name, hack.description, hack.skills_required)
+
+def overlap_reason(student, hack) -> str:
+    """Deterministic reason used when the LLM is unavailable."""
+    shared = sorted({s.lower() for s in student.skills or []} & {s.lower() for s in hack.skills_required or []})
+    if shared:
+        return f"Matches your skills: {', '.join(shared)}"
+    return "Aligned with your interests and profile"
+
+async def ranked_recommendations(db, student_id: int):
+    """(student, picked hackathons by id, recs) from the precomputed index, with overlap reasons; no LLM."""
+    student = await db.scalar(select(Student).filter(Student.student_id == student_id))
+    if not student:
+        return None, {}, []
+
+    if not recommendation_index.built:
+        await recommendation_index.abuild_from_db(db)
+    if student_id not in recommendation_index.topk:
+        recommendation_index.upsert_student(student)
+    picks = recommendation_index.recommend(student_id, n=3)
+
+    hacks = {h.hackathon_id: h for h in await db.scalars(select(Hackathon).filter(Hackathon.hackathon_id.in_([hid for hid, _ in picks])))}
+    recs = [
+        {"hackathon_id": hid, "name": hacks[hid].name, "description": hacks[hid].description,
+         "match_score": round(score * 100), "reason": overlap_reason(student, hacks[hid])}
+        for hid, score in picks if hid in hacks
+    ]
+    if not recs:
+        # Empty profile or empty index: plain active list
+        fallback = (await db.scalars(select(Hackathon).filter(Hackathon.deadline >= datetime.now()).limit(3))).all()
+        return student, {}, [{"hackathon_id": h.hackathon_id, "name": h.name, "description": h.description, "match_score": 0, "reason": "Complete your profile for personalized matches"} for h in fallback]
+    return student, hacks, recs
+
+async def get_ranked_recommendations(student_id: int):
+    """Index-ranked picks without LLM reasons; what /api/recommendations serves under overload."""
+    async with AsyncSessionLocal() as db:
+        _, _, recs = await ranked_recommendations(db, student_id)
+    return recs
+
+@single_flight.coalesce("agent:recommendations", timeout=40)
 async def get_personalized_recommendations(student_id: int):
+    async with AsyncSessionLocal() as db:
+        student, hacks, recs = await ranked_recommendations(db, student_id)
+        if not hacks:
+            return recs
+
+        profile_str = student.summary or student_summary(student)
+        candidates = [f"- ID: {rec['hackathon_id']}, {summary_of(hacks[rec['hackathon_id']])}" for rec in recs]
+
     try:
-        db = SessionLocal()
-        student = db.query(Student).filter(Student.student_id == student_id).first()
-        if not student:
-            return []
-            
-        hackathons = db.query(Hackathon).all()
-        
-        profile_str = f"Skills: {student.skills}, Interests: {student.interests}, Experience: {student.experience_level}"
-        hacks_str = "\n".join([f"- ID: {h.hackathon_id}, Name: {h.name}: {h.description} (Skills Required: {h.skills_required})" for h in hackathons])
-        
-        chain = recommendation_prompt | llm | StrOutputParser()
-        res = await chain.ainvoke({"profile": profile_str, "hackathons": hacks_str})
-        
-        import json
+        inputs, _ = prompt_compiler.compile("recommendation_reasons", recommendation_prompt, {"profile": profile_str}, "hackathons", candidates)
+        chain = llm_registry.chain("recommendation_reasons", recommendation_prompt)
+        res = await llm_registry.ainvoke(chain, inputs)
         clean_res = res.strip(" `").replace("json\n", "")
-        recs = json.loads(clean_res)
-        
-        # Post-process to ensure valid hackathon_id (AI sometimes uses names)
-        final_recs = []
+        reasons = json.loads(clean_res)
         for rec in recs:
-            # If ID is missing or not numeric, try to find it by name
-            valid_id = None
-            try:
-                valid_id = int(rec.get("hackathon_id"))
-            except (ValueError, TypeError):
-                # Look up by name if ID is invalid
-                h_name = rec.get("name")
-                h_obj = next((h for h in hackathons if h.name.lower() == h_name.lower()), None)
-                if h_obj:
-                    valid_id = h_obj.hackathon_id
-            
-            if valid_id:
-                rec["hackathon_id"] = valid_id
-                final_recs.append(rec)
-        
-        db.close()
-        return final_recs
+            rec["reason"] = reasons.get(str(rec["hackathon_id"]), rec["reason"])
     except Exception as e:
-        print(f"AI Recommendation Failed: {str(e)}")
-        # Fallback to simple hackathon list if AI fail (quota etc)
-        db = SessionLocal()
-        hacks = db.query(Hackathon).limit(3).all()
-        db.close()
-        return [{"hackathon_id": h.hackathon_id, "name": h.name, "description": h.description, "match_score": 0, "reason": "AI Recommendation temporarily unavailable (Quota Reach)"} for h in hacks]
+        # Scores are already computed, so only the narrative degrades
+        print(f"AI Recommendation Reasons Failed: {str(e)}")
+    return recs
+
+recommendations_text_prompt = ChatPromptTemplate.from_template("""
+You are a Hackathon Recommendation Agent.
+Recommend hackathons based on student profile.
+
+Student Profile: {profile}
+Active Hackathons: {hackathons}
+Context: {context}
+
+Provide helpful text-based recommendations.
+""")
+
+HACKATHON_PROMPT_COLUMNS = (Hackathon.hackathon_id, Hackathon.name, Hackathon.description, Hackathon.skills_required, Hackathon.deadline, Hackathon.summary)
 
 async def get_recommendations_text(student_id: int, context: str):
-    # Existing text-based version for chat
-    db = SessionLocal()
-    student = db.query(Student).filter(Student.student_id == student_id).first()
-    hackathons = db.query(Hackathon).all()
-    
-    profile_str = f"Name: {student.name}, Skills: {student.skills}, Department: {student.department}, Interests: {student.interests}, Experience Level: {student.experience_level}"
-    hacks_str = "\n".join([f"- {h.name}: {h.description} (Skills: {h.skills_required}, Deadline: {h.deadline})" for h in hackathons])
-    
-    prompt = ChatPromptTemplate.from_template("""
-    You are a Hackathon Recommendation Agent.
-    Recommend hackathons based on student profile.
-    
-    Student Profile: {profile}
-    Active Hackathons: {hackathons}
-    Context: {context}
-    
-    Provide helpful text-based recommendations.
-    """)
-    
-    chain = prompt | llm | StrOutputParser()
-    res = await chain.ainvoke({"profile": profile_str, "hackathons": hacks_str, "context": context})
-    db.close()
+    # Text-based version for chat: the index pre-ranks, the budget decides how many fit
+    async with AsyncSessionLocal() as db:
+        student = await db.scalar(select(Student).filter(Student.student_id == student_id))
+        if not student:
+            return "Student profile not found."
+        if not recommendation_index.built:
+            await recommendation_index.abuild_from_db(db)
+        if student_id not in recommendation_index.topk:
+            recommendation_index.upsert_student(student)
+        ranked = [hid for hid, _ in recommendation_index.recommend(student_id, n=recommendation_index.k)]
+        if ranked:
+            rows = {h.hackathon_id: h for h in await db.execute(select(*HACKATHON_PROMPT_COLUMNS).filter(Hackathon.hackathon_id.in_(ranked)))}
+            hackathons = [rows[hid] for hid in ranked if hid in rows]
+        else:
+            # Empty profile: soonest deadlines first
+            hackathons = (await db.execute(
+                select(*HACKATHON_PROMPT_COLUMNS).filter(Hackathon.deadline >= datetime.now()).order_by(Hackathon.deadline).limit(recommendation_index.k)
+            )).all()
+
+    candidates = [f"- {summary_of(h)} Deadline: {h.deadline:%Y-%m-%d}" if h.deadline else f"- {summary_of(h)}" for h in hackathons]
+    inputs, _ = prompt_compiler.compile(
+        "recommendations_text", recommendations_text_prompt,
+        {"profile": student.summary or student_summary(student), "context": context}, "hackathons", candidates,
+    )
+    chain = llm_registry.chain("recommendations_text", recommendations_text_prompt)
+    res = await response_cache.get_or_compute(
+        "recommendations_text", inputs, lambda: llm_registry.ainvoke(chain, inputs),
+        tags=[f"student:{student_id}", "hackathons"],
+    )
     return res
 
 # 2. Team Formation Agent
 team_formation_prompt = ChatPromptTemplate.from_template("""
 You are a Team Formation Agent. Suggest teams based on complementary skills.
-Match the user with collaborators who fill their skill gaps.
+The candidate teams below are already ranked by how well they fill the user's skill gaps.
+Pick the strongest one.
 
 User: {user}
-Potential Collaborators: {pool}
+Candidate Teams: {pool}
 
 Output format:
 Team Suggestion:
@@ -117,17 +165,43 @@ Team Suggestion:
 Explain the logic of this team composition.
 """)
 
-async def get_team_suggestions(student_id: int):
-    db = SessionLocal()
-    user = db.query(Student).filter(Student.student_id == student_id).first()
-    others = db.query(Student).filter(Student.student_id != student_id).all()
-    
-    user_str = f"{user.name} (Skills: {user.skills}, Experience: {user.experience_level})"
-    pool_str = "\n".join([f"- {s.name} (Skills: {s.skills}, Experience: {s.experience_level})" for s in others])
-    
-    chain = team_formation_prompt | llm | StrOutputParser()
-    res = await chain.ainvoke({"user": user_str, "pool": pool_str})
-    db.close()
+async def get_team_candidates(student_id: int, hackathon_id: int = None, top_n: int = 3):
+    """Scored candidate teams from the vectorized matcher; no LLM involved."""
+    async with AsyncSessionLocal() as db:
+        if not team_matcher.built:
+            await team_matcher.abuild_from_db(db)
+        target_skills = None
+        if hackathon_id:
+            hack = await db.scalar(select(Hackathon).filter(Hackathon.hackathon_id == hackathon_id))
+            target_skills = hack.skills_required if hack else None
+    return team_matcher.suggest(student_id, top_n=top_n, target_skills=target_skills)
+
+async def get_team_suggestions(student_id: int, hackathon_id: int = None, teams: list = None):
+    if teams is None:
+        teams = await get_team_candidates(student_id, hackathon_id)
+    if not teams:
+        return "Not enough onboarded students to suggest a team yet."
+
+    # Onboarded students carry a stored summary; the matcher's own fields cover the rest
+    member_ids = {m["student_id"] for t in teams for m in t["members"]}
+    async with AsyncSessionLocal() as db:
+        summaries = dict((await db.execute(select(Student.student_id, Student.summary).filter(Student.student_id.in_(member_ids)))).all())
+
+    def describe(member):
+        return summaries.get(member["student_id"]) or clip(f"{member['name']} ({member['experience_level']}) Skills: {', '.join(member['skills'])}", 60)
+
+    candidates = [
+        f"- Team {i + 1} (coverage {t['coverage']:.0%}): " + "; ".join(
+            f"{describe(m)}; Fills: {', '.join(m['fills_gaps']) or 'none'}" for m in t["members"][1:]
+        )
+        for i, t in enumerate(teams)
+    ]
+    inputs, _ = prompt_compiler.compile("team_suggestions", team_formation_prompt, {"user": describe(teams[0]["members"][0])}, "pool", candidates)
+    chain = llm_registry.chain("team_suggestions", team_formation_prompt)
+    res = await response_cache.get_or_compute(
+        "team_suggestions", inputs, lambda: llm_registry.ainvoke(chain, inputs),
+        tags=[f"student:{student_id}", "students"],
+    )
     return res
 
 # 3. Hackathon Idea Generation Agent
@@ -146,16 +220,21 @@ Output format:
 """)
 
 async def get_hackathon_ideas(theme: str, tech_stack: str):
-    chain = idea_gen_prompt | llm | StrOutputParser()
-    res = await chain.ainvoke({"theme": theme, "tech_stack": tech_stack})
+    chain = llm_registry.chain("ideas", idea_gen_prompt)
+    inputs = {"theme": theme, "tech_stack": tech_stack}
+    res = await response_cache.get_or_compute(
+        "ideas", inputs, lambda: llm_registry.ainvoke(chain, inputs), semantic_text=theme,
+    )
     return res
 
 # 4. Analytics Agent (New)
+# Numbers come from the SQL rollups; the LLM only narrates them, once per rollup version
 analytics_prompt = ChatPromptTemplate.from_template("""
 You are a Departmental Innovation Analyst. 
 Analyze the current participation data and provide a concise innovation summary.
 
-Data: {data}
+Data (per department: students, participation rate, status funnel, top skills; then monthly participations):
+{data}
 
 Provide:
 1. Participation Rate
@@ -163,18 +242,46 @@ Provide:
 3. Innovation Score (0-100) based on project complexity.
 """)
 
+_narrative_lock = asyncio.Lock()
+
+@single_flight.coalesce("agent:department_analytics", timeout=60)
 async def get_department_analytics():
-    db = SessionLocal()
-    # Simplified aggregate for demo
-    total_students = db.query(Student).count()
-    total_participations = db.query(Participation).count()
-    
-    data_summary = f"Total Students: {total_students}, Total Participations: {total_participations}"
-    
-    chain = analytics_prompt | llm | StrOutputParser()
-    res = await chain.ainvoke({"data": data_summary})
-    db.close()
-    return res
+    from ..analytics import STATE_ID, department_rollups, report_text
+    from ..database import AnalyticsState
+    async with AsyncSessionLocal() as db:
+        report = await department_rollups.get(db)
+        state = await db.get(AnalyticsState, STATE_ID)
+        if state and state.narrative and state.narrative_version == report["version"]:
+            return state.narrative
+
+        # One LLM call per version, however many dashboards open at once
+        async with _narrative_lock:
+            await db.refresh(state)
+            if state.narrative and state.narrative_version == report["version"]:
+                return state.narrative
+            data_summary = report_text(report)
+            try:
+                chain = llm_registry.chain("analytics", analytics_prompt)
+                narrative = await llm_registry.ainvoke(chain, {"data": data_summary})
+            except Exception as e:
+                # Not stored, so the next request retries the narrative
+                print(f"AI Analytics Narrative Failed: {str(e)}")
+                return data_summary
+            state.narrative, state.narrative_version = narrative, report["version"]
+            await db.commit()
+    return narrative
+
+async def get_cached_department_analytics():
+    """Last stored narrative, even if the rollups moved on since, else the plain rollup text; no LLM."""
+    from ..analytics import STATE_ID, department_rollups, report_text
+    from ..database import AnalyticsState
+    async with AsyncSessionLocal() as db:
+        report = await department_rollups.get(db)
+        state = await db.get(AnalyticsState, STATE_ID)
+    if state and state.narrative:
+        return state.narrative
+    return report_text(report)
+
 # 5. Strategic Roadmap Agent
 roadmap_agent_prompt = ChatPromptTemplate.from_template("""
 You are a Strategic Hackathon Roadmap Designer for HackAssist.
@@ -193,20 +300,20 @@ Example: [{{"id": 1, "title": "Initialization", "description": "Set up the repo
 ONLY return the JSON.
 """)
 
+@single_flight.coalesce("agent:roadmap", timeout=40)
 async def get_hackathon_roadmap_agent(student_id: int, hackathon_id: int):
-    db = SessionLocal()
-    student = db.query(Student).filter(Student.student_id == student_id).first()
-    hack = db.query(Hackathon).filter(Hackathon.hackathon_id == hackathon_id).first()
+    async with AsyncSessionLocal() as db:
+        student = await db.scalar(select(Student).filter(Student.student_id == student_id))
+        hack = await db.scalar(select(Hackathon).filter(Hackathon.hackathon_id == hackathon_id))
     
     if not student or not hack:
-        db.close()
         return []
 
     skills_str = ", ".join(student.skills) if student.skills else "Not specified"
     req_skills_str = ", ".join(hack.skills_required) if hack.skills_required else "General"
     
-    chain = roadmap_agent_prompt | llm | StrOutputParser()
-    res = await chain.ainvoke({
+    chain = llm_registry.chain("roadmap", roadmap_agent_prompt)
+    res = await llm_registry.ainvoke(chain, {
         "skills": skills_str,
         "hack_name": hack.name,
         "hack_description": hack.description,
@@ -227,5 +334,4 @@ async def get_hackathon_roadmap_agent(student_id: int, hackathon_id: int):
             {"id": 5, "title": "Deploy", "description": "Submit to judges", "x": 700, "y": 150}
         ]
     
-    db.close()
     return steps
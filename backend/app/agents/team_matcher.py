@@ -0,0 +1,167 @@
+import asyncio
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+EXPERIENCE_LEVELS = {"beginner": 0.0, "intermediate": 1.0, "expert": 2.0}
+
+def _norm_skill(skill: str) -> str:
+    return skill.strip().lower()
+
+class TeamMatcher:
+    """
+    Scores candidate teams (the user plus two collaborators) by how much of the user's
+    skill gap they cover and how balanced the team's experience is, using batched array ops.
+    """
+
+    def __init__(self, shortlist_size: int = 60, coverage_weight: float = 0.8, balance_weight: float = 0.2):
+        self.shortlist_size = shortlist_size
+        self.coverage_weight = coverage_weight
+        self.balance_weight = balance_weight
+        self._lock = threading.Lock()
+        self._pool = None
+
+    # Pool encoding
+    def build(self, students):
+        """Encodes the student pool as a binary skill matrix (one row per student)."""
+        vocab: Dict[str, int] = {}
+        labels: List[str] = []
+        for s in students:
+            for skill in s.skills or []:
+                if _norm_skill(skill) not in vocab:
+                    vocab[_norm_skill(skill)] = len(labels)
+                    labels.append(skill.strip())
+        bits = np.zeros((len(students), max(len(vocab), 1)), dtype=np.float32)
+        for row, s in enumerate(students):
+            for skill in s.skills or []:
+                bits[row, vocab[_norm_skill(skill)]] = 1.0
+        pool = {
+            "ids": np.array([s.student_id for s in students], dtype=np.int64),
+            "names": [s.name for s in students],
+            "levels": np.array([EXPERIENCE_LEVELS.get((s.experience_level or "").lower(), 1.0) for s in students], dtype=np.float32),
+            "experience": [s.experience_level for s in students],
+            "bits": bits,
+            # No skills, nothing to complement: never suggested as teammates, but still served as requesters
+            "candidates": bits.any(axis=1),
+            "vocab": vocab,
+            "skills": labels,
+        }
+        with self._lock:
+            self._pool = pool
+        return pool
+
+    def build_from_db(self, db):
+        from ..database import Student
+        rows = db.query(Student.student_id, Student.name, Student.skills, Student.experience_level).all()
+        return self.build(rows)
+
+    async def abuild_from_db(self, db):
+        from sqlalchemy import select
+        from ..database import Student
+        rows = (await db.execute(select(Student.student_id, Student.name, Student.skills, Student.experience_level))).all()
+        return await asyncio.to_thread(self.build, rows)
+
+    def invalidate(self):
+        with self._lock:
+            self._pool = None
+
+    @property
+    def built(self) -> bool:
+        return self._pool is not None
+
+    def _gap_weights(self, pool, user_row: int, target_skills: Optional[List[str]]) -> np.ndarray:
+        """Weight per skill the user lacks: the hackathon's requirements if given, else rarity in the pool."""
+        vocab, bits = pool["vocab"], pool["bits"]
+        if target_skills:
+            weights = np.zeros(bits.shape[1], dtype=np.float32)
+            for skill in target_skills:
+                col = vocab.get(_norm_skill(skill))
+                if col is not None:
+                    weights[col] = 1.0
+        else:
+            freq = bits.sum(axis=0)
+            weights = np.log1p(len(bits) / np.maximum(freq, 1.0)).astype(np.float32)
+        if user_row >= 0:
+            weights[bits[user_row] > 0] = 0.0
+        return weights
+
+    # Scoring
+    def suggest(self, student_id: int, top_n: int = 3, target_skills: Optional[List[str]] = None) -> List[dict]:
+        """Top-N teams for a student, best first."""
+        pool = self._pool
+        if pool is None:
+            return []
+        ids, bits, levels = pool["ids"], pool["bits"], pool["levels"]
+        matches = np.flatnonzero(ids == student_id)
+        if not len(matches):
+            return []
+        user_row = int(matches[0])
+        candidates = pool["candidates"].copy()
+        candidates[user_row] = False
+        n_candidates = int(candidates.sum())
+        if n_candidates < 2:
+            return []
+
+        gap = self._gap_weights(pool, user_row, target_skills)
+        total_gap = float(gap.sum()) or 1.0
+
+        # 1. Individual coverage, then shortlist the best candidates
+        # A user without skills has an all-gap profile: every skill counts as missing
+        individual = bits @ gap
+        individual[~candidates] = -1.0
+        m = min(self.shortlist_size, n_candidates)
+        shortlist = np.argpartition(-individual, m - 1)[:m]
+
+        # 2. Pair coverage over the shortlist: |A∪B| = |A| + |B| - |A∩B| (gap-weighted)
+        weighted = bits[shortlist] * gap
+        overlap = weighted @ bits[shortlist].T
+        cov = individual[shortlist]
+        pair_cov = (cov[:, None] + cov[None, :] - overlap) / total_gap
+
+        # 3. Experience balance: team mean closest to Intermediate scores highest
+        team_mean = (levels[user_row] + levels[shortlist][:, None] + levels[shortlist][None, :]) / 3.0
+        balance = 1.0 - np.abs(team_mean - 1.0)
+
+        score = self.coverage_weight * pair_cov + self.balance_weight * balance
+        score[np.tril_indices(m)] = -np.inf  # each unordered pair once, no self-pairs
+
+        n = min(top_n, m * (m - 1) // 2)
+        if n <= 0:
+            return []
+        flat = np.argpartition(-score.ravel(), n - 1)[:n]
+        flat = flat[np.argsort(-score.ravel()[flat])]
+
+        teams = []
+        user_skills = bits[user_row] > 0
+        for a, b in zip(*np.unravel_index(flat, score.shape)):
+            rows = [shortlist[a], shortlist[b]]
+            members = [self._member(pool, user_row, None)]
+            members += [self._member(pool, r, (bits[r] > 0) & ~user_skills & (gap > 0)) for r in rows]
+            teams.append({
+                "members": members,
+                "coverage": round(float(pair_cov[a, b]), 4),
+                "balance": round(float(balance[a, b]), 4),
+                "score": round(float(score[a, b]), 4),
+            })
+        return teams
+
+    @staticmethod
+    def _member(pool, row: int, adds: Optional[np.ndarray]) -> dict:
+        skills = pool["skills"]
+        member = {
+            "student_id": int(pool["ids"][row]),
+            "name": pool["names"][row],
+            "experience_level": pool["experience"][row],
+            "skills": [skills[c] for c in np.flatnonzero(pool["bits"][row])],
+        }
+        if adds is not None:
+            member["fills_gaps"] = [skills[c] for c in np.flatnonzero(adds)]
+        return member
+
+    def stats(self) -> dict:
+        pool = self._pool
+        return {"built": pool is not None, "students": 0 if pool is None else int(len(pool["ids"]))}
+
+# Global matcher instance, built from the DB on first use
+team_matcher = TeamMatcher()
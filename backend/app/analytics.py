@@ -0,0 +1,289 @@
+"""
+Department analytics computed in SQL. GROUP BY queries over students, participations,
+teams and hackathons are materialized into the *_rollups tables on a timer; handlers and
+the analytics agent read the rollups (or this worker's in-memory copy), never the raw rows.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from typing import Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import JSON, case, cast, delete, distinct, extract, func, insert, literal_column, select, true
+from sqlalchemy.exc import IntegrityError
+
+UNASSIGNED = "Unassigned"
+STATE_ID = 1
+TOP_SKILLS = 10
+# Rollup column -> Participation.status
+STATUSES = {"registered": "Registered", "in_progress": "In Progress", "submitted": "Submitted", "won": "Won", "lost": "Lost"}
+
+def _department(column):
+    # Inlined constants: Postgres only matches the GROUP BY expression if it is textually the same
+    return func.coalesce(func.nullif(func.trim(column), literal_column("''")), literal_column(f"'{UNASSIGNED}'"))
+
+def _skill_elements(dialect: str, column):
+    """Table-valued function expanding a JSON list column into one row per element."""
+    # Anything but a list counts as no skills (json_array_elements_text would error on it)
+    if dialect == "postgresql":
+        column = case((func.json_typeof(column) == "array", column), else_=cast("[]", JSON))
+        return func.json_array_elements_text(column).table_valued("value")
+    column = case((func.json_type(column) == "array", column), else_="[]")
+    return func.json_each(column).table_valued("value")
+
+async def compute_rollups(db) -> dict:
+    """The rollup rows, straight from GROUP BY queries: {"departments": [...], "skills": [...], "trends": [...]}."""
+    from .database import Hackathon, Participation, Student
+    dept = _department(Student.department).label("department")
+
+    # 1. Students per department
+    students = dict((await db.execute(select(dept, func.count()).group_by(dept))).all())
+
+    # 2. Participation, distinct participants/teams and the status counts in one pass
+    status_columns = [func.sum(case((Participation.status == status, 1), else_=0)) for status in STATUSES.values()]
+    activity = {
+        row[0]: row[1:]
+        for row in (await db.execute(
+            select(dept, func.count(distinct(Participation.student_id)), func.count(), func.count(distinct(Participation.team_id)), *status_columns)
+            .select_from(Participation).join(Student, Student.student_id == Participation.student_id)
+            .group_by(dept)
+        )).all()
+    }
+    departments = []
+    for name in sorted(set(students) | set(activity)):
+        participants, participations, teams, *statuses = activity.get(name, (0, 0, 0) + (0,) * len(STATUSES))
+        departments.append({
+            "department": name, "students": students.get(name, 0), "participants": participants,
+            "participations": participations, "teams": teams,
+            **{column: int(count or 0) for column, count in zip(STATUSES, statuses)},
+        })
+
+    # 3. Skill frequency: students per (department, skill)
+    elements = _skill_elements(db.bind.dialect.name, Student.skills)
+    skill = func.lower(func.trim(elements.c.value)).label("skill")
+    skills = [
+        {"department": name, "skill": value, "students": count}
+        for name, value, count in (await db.execute(
+            select(dept, skill, func.count(distinct(Student.student_id)))
+            .select_from(Student).join(elements, true())
+            .group_by(dept, skill)
+        )).all()
+        if value
+    ]
+
+    # 4. Trends: participations per department and month of the hackathon's deadline.
+    # Counted per hackathon first, so the date functions run once per hackathon, not per row
+    per_hackathon = (
+        select(dept, Participation.hackathon_id, func.count().label("participations"))
+        .select_from(Participation).join(Student, Student.student_id == Participation.student_id)
+        .group_by(dept, Participation.hackathon_id)
+    ).subquery()
+    year, month = extract("year", Hackathon.deadline), extract("month", Hackathon.deadline)
+    trends = [
+        {"department": name, "month": f"{int(y):04d}-{int(m):02d}", "participations": int(count)}
+        for name, y, m, count in (await db.execute(
+            select(per_hackathon.c.department, year, month, func.sum(per_hackathon.c.participations))
+            .join(Hackathon, Hackathon.hackathon_id == per_hackathon.c.hackathon_id)
+            .where(Hackathon.deadline.isnot(None))
+            .group_by(per_hackathon.c.department, year, month)
+        )).all()
+    ]
+    skills.sort(key=lambda r: (r["department"], r["skill"]))
+    trends.sort(key=lambda r: (r["department"], r["month"]))
+    return {"departments": departments, "skills": skills, "trends": trends}
+
+def rollup_hash(rollups: dict) -> str:
+    return hashlib.sha256(json.dumps(rollups, sort_keys=True).encode("utf-8")).hexdigest()
+
+def funnel(row: dict) -> dict:
+    """Participations that reached each stage of Registered -> In Progress -> Submitted -> Won."""
+    finished = row["won"] + row["lost"]
+    submitted = row["submitted"] + finished
+    in_progress = row["in_progress"] + submitted
+    return {"registered": row["registered"] + in_progress, "in_progress": in_progress, "submitted": submitted, "won": row["won"]}
+
+def _rate(part: int, whole: int) -> float:
+    return round(part / whole, 4) if whole else 0.0
+
+def build_report(rollups: dict, version: int, refreshed_at: Optional[datetime]) -> dict:
+    """JSON served by /api/analytics/department/stats: per-department numbers plus campus totals."""
+    skills, trends = {}, {}
+    for row in rollups["skills"]:
+        skills.setdefault(row["department"], []).append({"skill": row["skill"], "students": row["students"]})
+    for row in rollups["trends"]:
+        trends.setdefault(row["department"], []).append({"month": row["month"], "participations": row["participations"]})
+
+    def summarize(name, row, top_skills, trend):
+        stages = funnel(row)
+        return {
+            "department": name,
+            "students": row["students"],
+            "participants": row["participants"],
+            "participation_rate": _rate(row["participants"], row["students"]),
+            "participations": row["participations"],
+            "teams": row["teams"],
+            "status": {column: row[column] for column in STATUSES},
+            "funnel": stages,
+            "win_rate": _rate(stages["won"], stages["registered"]),
+            "top_skills": sorted(top_skills, key=lambda s: (-s["students"], s["skill"]))[:TOP_SKILLS],
+            "trend": trend,
+        }
+
+    departments = [
+        summarize(row["department"], row, skills.get(row["department"], []), trends.get(row["department"], []))
+        for row in rollups["departments"]
+    ]
+    # Campus totals; a team spanning departments is counted once per department
+    totals_row = {key: sum(row[key] for row in rollups["departments"]) for key in ("students", "participants", "participations", "teams", *STATUSES)}
+    campus_skills, campus_trend = {}, {}
+    for row in rollups["skills"]:
+        campus_skills[row["skill"]] = campus_skills.get(row["skill"], 0) + row["students"]
+    for row in rollups["trends"]:
+        campus_trend[row["month"]] = campus_trend.get(row["month"], 0) + row["participations"]
+    totals = summarize(
+        "All",
+        totals_row,
+        [{"skill": s, "students": n} for s, n in campus_skills.items()],
+        [{"month": m, "participations": n} for m, n in sorted(campus_trend.items())],
+    )
+    return {"version": version, "refreshed_at": refreshed_at, "totals": totals, "departments": departments}
+
+def report_text(report: dict) -> str:
+    """Compact plain-text form of the report, the LLM's input and the narrative fallback."""
+    def line(d):
+        skills = ", ".join(f"{s['skill']} ({s['students']})" for s in d["top_skills"][:5]) or "none"
+        f = d["funnel"]
+        return (f"{d['department']}: {d['students']} students, {d['participation_rate']:.0%} participating, "
+                f"{d['participations']} participations in {d['teams']} teams; funnel registered {f['registered']} -> "
+                f"in progress {f['in_progress']} -> submitted {f['submitted']} -> won {f['won']}; top skills: {skills}")
+    lines = [line(report["totals"])] + [line(d) for d in report["departments"]]
+    trend = report["totals"]["trend"][-6:]
+    if trend:
+        lines.append("Participations by month: " + ", ".join(f"{t['month']}: {t['participations']}" for t in trend))
+    return "\n".join(lines)
+
+class DepartmentRollups:
+    """
+    Rollup tables plus this worker's in-memory copy of the report built from them.
+    refresh() recomputes the rollups when this worker saw a student/participation write
+    (invalidate()) or they are older than max_age, and otherwise only loads a newer
+    version written by another worker. The version moves only when the numbers change,
+    so anything derived from it (the LLM narrative) is regenerated only then.
+    Reads refresh inline only if the background loop hasn't run for check_interval seconds.
+    """
+
+    def __init__(self, max_age: float = 600.0, check_interval: float = 30.0):
+        self.max_age = max_age
+        self.check_interval = check_interval
+        self.version = 0
+        self.report: Optional[dict] = None
+        self.body = b""
+        self.checked_at = 0.0
+        # A fresh worker loads what another one built, if it's recent enough
+        self._dirty = False
+        self._lock = asyncio.Lock()
+        self.counters = {"rebuilds": 0, "unchanged": 0, "loads": 0, "hits": 0, "rebuild_seconds": None}
+
+    def invalidate(self):
+        self._dirty = True
+
+    def _due(self) -> bool:
+        return self.report is None or time.monotonic() - self.checked_at > self.check_interval
+
+    async def _state(self, db):
+        from .database import AnalyticsState
+        return await db.get(AnalyticsState, STATE_ID, populate_existing=True)
+
+    async def _rebuild(self, db, state):
+        from .database import AnalyticsState, DepartmentRollup, SkillRollup, TrendRollup
+        self._dirty = False
+        start = time.perf_counter()
+        rollups = await compute_rollups(db)
+        content_hash = rollup_hash(rollups)
+        now = datetime.utcnow()
+        if state is None:
+            state = AnalyticsState(id=STATE_ID, version=0)
+            db.add(state)
+        if state.content_hash == content_hash:
+            self.counters["unchanged"] += 1
+        else:
+            for model, key in ((DepartmentRollup, "departments"), (SkillRollup, "skills"), (TrendRollup, "trends")):
+                await db.execute(delete(model))
+                if rollups[key]:
+                    await db.execute(insert(model), rollups[key])
+            state.version = (state.version or 0) + 1
+            state.content_hash = content_hash
+        state.refreshed_at = now
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Another worker created the state row first; use its rollups
+            await db.rollback()
+            await self._load(db, await self._state(db))
+            return
+        self.counters["rebuilds"] += 1
+        self.counters["rebuild_seconds"] = round(time.perf_counter() - start, 4)
+        self._set(build_report(rollups, state.version, now))
+
+    async def _load(self, db, state):
+        from .database import DepartmentRollup, SkillRollup, TrendRollup
+        rollups = {}
+        for model, key in ((DepartmentRollup, "departments"), (SkillRollup, "skills"), (TrendRollup, "trends")):
+            table = model.__table__
+            rows = (await db.execute(select(table).order_by(*table.primary_key.columns))).mappings().all()
+            rollups[key] = [dict(row) for row in rows]
+        self.counters["loads"] += 1
+        self._set(build_report(rollups, state.version, state.refreshed_at))
+
+    def _set(self, report: dict):
+        self.report = report
+        self.version = report["version"]
+        self.body = json.dumps(jsonable_encoder(report), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    async def refresh(self, db, force: bool = False):
+        async with self._lock:
+            state = await self._state(db)
+            expired = state is None or state.refreshed_at is None or (datetime.utcnow() - state.refreshed_at).total_seconds() > self.max_age
+            if force or self._dirty or expired:
+                await self._rebuild(db, state)
+            elif state.version != self.version or self.report is None:
+                await self._load(db, state)
+            self.checked_at = time.monotonic()
+
+    async def get(self, db) -> dict:
+        if self._due():
+            await self.refresh(db)
+        else:
+            self.counters["hits"] += 1
+        return self.report
+
+    def department(self, name: str) -> Optional[dict]:
+        return next((d for d in self.report["departments"] if d["department"].lower() == name.lower()), None)
+
+    async def run(self, session_factory):
+        """Background loop: refresh every check_interval seconds until cancelled."""
+        while True:
+            try:
+                async with session_factory() as db:
+                    await self.refresh(db)
+            except Exception as e:
+                print(f"⚠️ Analytics rollup refresh failed: {e}")
+            await asyncio.sleep(self.check_interval)
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "version": self.version,
+            "departments": len(self.report["departments"]) if self.report else 0,
+            "dirty": self._dirty,
+            "age_seconds": round(time.monotonic() - self.checked_at, 1) if self.checked_at else None,
+        }
+
+# Global rollups
+department_rollups = DepartmentRollups(
+    max_age=float(os.getenv("ANALYTICS_ROLLUP_MAX_AGE", "600")),
+    check_interval=float(os.getenv("ANALYTICS_REFRESH_SECONDS", "30")),
+)
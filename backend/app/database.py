@@ -1,5 +1,7 @@
 import os
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -14,13 +16,58 @@ if not DATABASE_URL:
     # Fallback only for extreme disaster recovery
     DATABASE_URL = "sqlite:///./hackassist.db"
 
-engine = create_engine(DATABASE_URL)
+def pool_settings(url: str) -> dict:
+    """Connection-pool options from env; SQLite keeps SQLAlchemy's defaults."""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        # Neon closes idle connections; recycle and pre-ping avoid handing out dead ones
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1",
+    }
+
+def async_database_url(url: str):
+    """
+    Maps the sync URL onto its asyncio driver: asyncpg for Postgres, aiosqlite for SQLite.
+    asyncpg doesn't understand libpq's sslmode/channel_binding, so those become connect_args.
+    Returns (url, connect_args).
+    """
+    scheme, rest = url.split("://", 1)
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{rest}", {}
+    if scheme in ("postgres", "postgresql") or scheme.startswith("postgresql+"):
+        parts = urlsplit(f"postgresql+asyncpg://{rest}")
+        query = dict(parse_qsl(parts.query))
+        sslmode = query.pop("sslmode", None)
+        query.pop("channel_binding", None)
+        connect_args = {"ssl": "require"} if sslmode in ("require", "verify-ca", "verify-full") else {}
+        return urlunsplit(parts._replace(query=urlencode(query))), connect_args
+    return url, {}
+
+engine = create_engine(DATABASE_URL, **pool_settings(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async path for request handlers and agents, so queries never block the event loop
+ASYNC_DATABASE_URL, _async_connect_args = async_database_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, connect_args=_async_connect_args, **pool_settings(DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Every statement on either engine is timed as span "db"
+from .metrics import instrument_engine
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index, bindparam, inspect, select, text, update
 from sqlalchemy.orm import relationship
 
+def normalize_name(name: str) -> str:
+    """Natural-key form of a hackathon name: case and whitespace insensitive."""
+    return " ".join(name.lower().split())
+
 Base = declarative_base()
 
 class Student(Base):
@@ -33,6 +80,7 @@ class Student(Base):
     experience_level = Column(String)  # Beginner, Intermediate, Expert
     skills = Column(JSON)  # List of strings
     interests = Column(JSON)  # List of strings
+    summary = Column(Text)  # Compact profile line for prompts, written at onboard
     
     participations = relationship("Participation", back_populates="student")
     ideas = relationship("Idea", back_populates="student")
@@ -43,10 +91,16 @@ class Hackathon(Base):
     name = Column(String, index=True)
     description = Column(Text)
     skills_required = Column(JSON)  # List of strings
-    deadline = Column(DateTime)
+    deadline = Column(DateTime, index=True)  # Active-list filter
+    source = Column(String, default="")  # Scraper feed, "" for rows added by hand
+    name_key = Column(String, default=lambda ctx: normalize_name(ctx.get_current_parameters()["name"] or ""))
+    summary = Column(Text)  # Compact name/description/skills line for prompts, written at sync
     
     participations = relationship("Participation", back_populates="hackathon")
 
+    # Natural key for the sync upsert
+    __table_args__ = (Index("uq_hackathons_source_name_key", "source", "name_key", unique=True),)
+
 class Team(Base):
     __tablename__ = "teams"
     team_id = Column(Integer, primary_key=True, index=True)
@@ -80,6 +134,51 @@ class Idea(Base):
     
     student = relationship("Student", back_populates="ideas")
 
+class RagDocument(Base):
+    """Manifest of what is in the vector store: one row per source document."""
+    __tablename__ = "rag_documents"
+    doc_id = Column(String, primary_key=True)  # Stable id, e.g. "unstop:crackncode"
+    content_hash = Column(String)
+    chunk_ids = Column(JSON)  # Ids of the chunks stored in the vector collection
+    sync_run = Column(String)  # Last index run that saw the document; older ones get pruned
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Analytics rollups: GROUP BY results over students/participations, rebuilt by app/analytics.py
+class DepartmentRollup(Base):
+    __tablename__ = "department_rollups"
+    department = Column(String, primary_key=True)
+    students = Column(Integer, default=0)
+    participants = Column(Integer, default=0)  # Students with at least one participation
+    participations = Column(Integer, default=0)
+    teams = Column(Integer, default=0)
+    registered = Column(Integer, default=0)  # Participations per status
+    in_progress = Column(Integer, default=0)
+    submitted = Column(Integer, default=0)
+    won = Column(Integer, default=0)
+    lost = Column(Integer, default=0)
+
+class SkillRollup(Base):
+    __tablename__ = "skill_rollups"
+    department = Column(String, primary_key=True)
+    skill = Column(String, primary_key=True)  # Lowercased
+    students = Column(Integer, default=0)
+
+class TrendRollup(Base):
+    __tablename__ = "trend_rollups"
+    department = Column(String, primary_key=True)
+    month = Column(String, primary_key=True)  # "YYYY-MM" of the hackathon deadline
+    participations = Column(Integer, default=0)
+
+class AnalyticsState(Base):
+    """Single row: rollup version (bumped only when the numbers change) and the narrative written for it."""
+    __tablename__ = "analytics_state"
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, default=0)
+    content_hash = Column(String)
+    refreshed_at = Column(DateTime)
+    narrative = Column(Text)
+    narrative_version = Column(Integer)
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -88,6 +187,66 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def add_missing_columns():
+    """Additive migration: ALTER TABLE ... ADD COLUMN for model columns an existing table lacks."""
+    existing = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not existing.has_table(table.name):
+                continue
+            present = {c["name"] for c in existing.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in present:
+                    print(f"🛠️ Adding column {table.name}.{column.name}")
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}"))
+
+def backfill_hackathon_keys():
+    """Fills source/name_key on rows from before the natural key, so the unique index can be built."""
+    hacks = Hackathon.__table__
+    with engine.begin() as conn:
+        conn.execute(update(hacks).where(hacks.c.source.is_(None)).values(source=""))
+        rows = conn.execute(select(hacks.c.hackathon_id, hacks.c.name).where(hacks.c.name_key.is_(None))).all()
+        if rows:
+            conn.execute(
+                update(hacks).where(hacks.c.hackathon_id == bindparam("b_id")).values(name_key=bindparam("b_key")),
+                [{"b_id": hid, "b_key": normalize_name(name or "")} for hid, name in rows],
+            )
+            # The old name check let duplicates in; keep the oldest row on the key, suffix the rest
+            conn.execute(text(
+                "UPDATE hackathons SET name_key = name_key || '#' || CAST(hackathon_id AS VARCHAR) "
+                "WHERE hackathon_id NOT IN (SELECT MIN(hackathon_id) FROM hackathons GROUP BY source, name_key)"
+            ))
+
+def backfill_summaries():
+    """Writes the prompt summaries of rows stored before the summary columns (or seeded without them)."""
+    from .prompt_compiler import hackathon_summary, student_summary
+    hacks, students = Hackathon.__table__, Student.__table__
+    with engine.begin() as conn:
+        rows = conn.execute(select(hacks.c.hackathon_id, hacks.c.name, hacks.c.description, hacks.c.skills_required).where(hacks.c.summary.is_(None))).all()
+        if rows:
+            conn.execute(
+                update(hacks).where(hacks.c.hackathon_id == bindparam("b_id")).values(summary=bindparam("b_summary")),
+                [{"b_id": r.hackathon_id, "b_summary": hackathon_summary(r.name, r.description, r.skills_required)} for r in rows],
+            )
+        # Registered but not onboarded students get theirs at onboard
+        rows = conn.execute(select(students).where(students.c.summary.is_(None), students.c.skills.is_not(None))).all()
+        if rows:
+            conn.execute(
+                update(students).where(students.c.student_id == bindparam("b_id")).values(summary=bindparam("b_summary")),
+                [{"b_id": r.student_id, "b_summary": student_summary(r)} for r in rows],
+            )
+
 # Create tables
 def init_db():
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+    backfill_hackathon_keys()
+    backfill_summaries()
+    # create_all skips existing tables, so indexes added later are created here
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
@@ -0,0 +1,188 @@
+"""
+Deadline normalization for scraped feeds. Unstop and Devfolio emit relative strings
+("3 days left", "Closes in 5 hours"), day-first dates ("Starts 04/03/26"), month names
+("28 Feb 26, 11:59 PM IST", "Mar 4 - 6, 2026") and ISO timestamps. Relative ones are
+anchored to the feed's scrape time, so a resync of the same feed gives the same datetimes.
+Results are naive local datetimes, like every other DateTime column in the database.
+"""
+import re
+from datetime import datetime, time as dtime, timedelta, timezone
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+class DeadlineParseError(ValueError):
+    pass
+
+MONTHS = {}
+for number, names in enumerate([
+    ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"), ("may",), ("jun", "june"),
+    ("jul", "july"), ("aug", "august"), ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december"),
+], 1):
+    MONTHS.update({name: number for name in names})
+
+TIMEZONES = {"ist": timezone(timedelta(hours=5, minutes=30)), "utc": timezone.utc, "gmt": timezone.utc}
+
+CLOSED = {"closed", "registration closed", "registrations closed", "applications closed", "ended", "expired", "over"}
+TODAY = {"today", "ends today", "closes today", "last day", "last day today", "less than a day left"}
+TOMORROW = {"tomorrow", "ends tomorrow", "closes tomorrow"}
+
+_PREFIX = re.compile(
+    r"^(?:(?:registrations?|applications?|submissions?)\s+)?"
+    r"(?:starts?|starting|ends?|ending|closes?|closing|deadline|due|last date|till|until|by)"
+    r"(?:\s+(?:on|at|in|from))?\s*:?\s*"
+)
+_RELATIVE = re.compile(r"^(?:in\s+)?(\d+)\s*(mins?|minutes?|hrs?|hours?|days?|weeks?|months?)(?:\s+(?:left|remaining|to go))?$")
+_TIME = re.compile(r",?\s*(?:at\s+)?(\d{1,2})(?::(\d{2}))?\s*(am|pm)\s*(ist|utc|gmt)?$|,?\s*(?:at\s+)?(\d{1,2}):(\d{2})\s*(ist|utc|gmt)?$")
+_NUMERIC = re.compile(r"^(\d{1,2})[/.-](\d{1,2})[/.-](\d{4}|\d{2})$")
+_DAY_MONTH = re.compile(r"^(\d{1,2})(?:st|nd|rd|th)?\s+([a-z]+)\.?,?(?:\s+'?(\d{4}|\d{2}))?$")
+_MONTH_DAY = re.compile(r"^([a-z]+)\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?(?:\s+'?(\d{4}|\d{2}))?$")
+_ISO = re.compile(r"^\d{4}-\d{2}-\d{2}")
+_RANGE = re.compile(r"\s*(?:-|–|—|\bto\b)\s*")
+_YEAR = re.compile(r"(?:,\s*|\s+)'?(\d{4}|\d{2})$")
+
+def _end_of_day(d) -> datetime:
+    return datetime.combine(d, dtime(23, 59, 59))
+
+def _local(dt: datetime) -> datetime:
+    """Aware datetimes are converted to naive local time; naive ones are taken as local already."""
+    return dt.astimezone().replace(tzinfo=None) if dt.tzinfo else dt
+
+def _year(text: Optional[str], month: int, day: int, anchor: datetime) -> int:
+    if text:
+        return int(text) + (2000 if len(text) == 2 else 0)
+    # No year: the next such date, allowing for events that closed shortly before the scrape
+    year = anchor.year
+    if datetime(year, month, day) < anchor - timedelta(days=60):
+        year += 1
+    return year
+
+def _relative(count: int, unit: str, anchor: datetime) -> datetime:
+    if unit.startswith("min"):
+        return anchor + timedelta(minutes=count)
+    if unit.startswith(("hr", "hour")):
+        return anchor + timedelta(hours=count)
+    days = count * {"d": 1, "w": 7, "m": 30}[unit[0]]
+    # "N days left" has day resolution: open until the end of that day
+    return _end_of_day((anchor + timedelta(days=days)).date())
+
+def _date(text: str, anchor: datetime) -> Optional[datetime]:
+    """A single calendar date with an optional time of day, or None if text is not one."""
+    clock = None
+    m = _TIME.search(text)
+    if m and m.start() > 0:
+        if m.group(3):
+            hour, minute, ampm, zone = int(m.group(1)), int(m.group(2) or 0), m.group(3), m.group(4)
+            hour = hour % 12 + (12 if ampm == "pm" else 0)
+        else:
+            hour, minute, zone = int(m.group(5)), int(m.group(6)), m.group(7)
+        clock = (hour, minute, TIMEZONES.get(zone))
+        text = text[:m.start()].strip()
+
+    m = _NUMERIC.match(text)
+    if m:
+        # Indian listings are day first
+        day, month, year = int(m.group(1)), int(m.group(2)), _year(m.group(3), int(m.group(2)), int(m.group(1)), anchor)
+    else:
+        m = _DAY_MONTH.match(text)
+        if m and m.group(2) in MONTHS:
+            day, month = int(m.group(1)), MONTHS[m.group(2)]
+        else:
+            m = _MONTH_DAY.match(text)
+            if not (m and m.group(1) in MONTHS):
+                return None
+            month, day = MONTHS[m.group(1)], int(m.group(2))
+        year = _year(m.group(3), month, day, anchor)
+
+    try:
+        if clock is None:
+            return _end_of_day(datetime(year, month, day).date())
+        hour, minute, zone = clock
+        return _local(datetime(year, month, day, hour, minute, tzinfo=zone))
+    except ValueError:
+        return None
+
+def _range_start(text: str) -> Optional[str]:
+    """First date of "4 - 6 Mar 2026" / "Mar 4 - 6, 2026" / "4 Mar to 6 Mar", completed from the second."""
+    parts = _RANGE.split(text, maxsplit=1)
+    if len(parts) != 2:
+        return None
+    first, second = parts
+    if first.isdigit():
+        # "4 - 6 mar 2026": the month (and year) come after the second day
+        words = second.split(maxsplit=1)
+        return f"{first} {words[1]}" if len(words) == 2 else None
+    year = _YEAR.search(second)
+    if year and not _YEAR.search(first) and not _NUMERIC.match(first):
+        first = f"{first} {year.group(1)}"
+    return first
+
+@lru_cache(maxsize=65536)
+def _parse(text: str, anchor: datetime) -> Optional[datetime]:
+    s = " ".join(text.lower().split())
+    if not s:
+        return None
+    if s in CLOSED:
+        return anchor
+    s = _PREFIX.sub("", s).strip(" .")
+    if s in TODAY:
+        return _end_of_day(anchor.date())
+    if s in TOMORROW:
+        return _end_of_day(anchor.date() + timedelta(days=1))
+
+    m = _RELATIVE.match(s)
+    if m:
+        return _relative(int(m.group(1)), m.group(2), anchor)
+    if _ISO.match(s):
+        try:
+            parsed = datetime.fromisoformat(s.upper())
+            return _end_of_day(parsed.date()) if len(s) == 10 else _local(parsed)
+        except ValueError:
+            pass
+    parsed = _date(s, anchor)
+    if parsed is None and (start := _range_start(s)):
+        parsed = _date(start, anchor)
+    return parsed
+
+def parse_deadline(text: str, anchor: datetime) -> datetime:
+    """One deadline string as a naive local datetime; relative forms count from anchor."""
+    parsed = _parse(text or "", anchor)
+    if parsed is None:
+        raise DeadlineParseError(f"Unrecognized deadline: {text!r}")
+    return parsed
+
+def feed_anchor(value, default: datetime) -> datetime:
+    """Scrape time of an item ("scraped_at": ISO string or epoch seconds) as naive local time."""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value)
+    if isinstance(value, str):
+        try:
+            return _local(datetime.fromisoformat(value))
+        except ValueError:
+            pass
+    return default
+
+def normalize_deadlines(items: Iterable[dict], default_anchor: datetime) -> Tuple[List[Optional[datetime]], List[dict]]:
+    """
+    Deadlines for a batch of items, each distinct (text, scrape time) parsed once.
+    Returns (deadlines, failures): unparseable ones are None and listed in failures.
+    """
+    items = list(items)
+    anchors = {}
+    keys = []
+    for item in items:
+        scraped_at = item.get("scraped_at")
+        if scraped_at not in anchors:
+            anchors[scraped_at] = feed_anchor(scraped_at, default_anchor)
+        keys.append((str(item.get("deadline") or ""), anchors[scraped_at]))
+
+    parsed = {key: _parse(*key) for key in set(keys)}
+    deadlines = [parsed[key] for key in keys]
+    failures = [
+        {"source": item.get("source"), "name": item.get("name"), "deadline": item.get("deadline")}
+        for item, deadline in zip(items, deadlines) if deadline is None
+    ]
+    return deadlines, failures
+
+def cache_stats() -> dict:
+    info = _parse.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize}
@@ -0,0 +1,157 @@
+"""
+Deterministic stand-ins for the Gemini chat and embedding models, selected with
+LLM_PROVIDER=fake, so load tests and benchmarks run offline and without quota.
+
+Chat answers are shaped for HackAssist's prompts (intent labels, the JSON the
+recommendation and roadmap agents parse, free text otherwise). A call takes
+FAKE_LLM_LATENCY seconds to the first token, then streams FAKE_LLM_OUTPUT_TOKENS
+words at FAKE_LLM_TOKENS_PER_SEC, and reports token usage like the real model.
+Embeddings are hashed bag-of-words vectors, so texts sharing words still rank close.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from .prompt_compiler import count_tokens
+from .rag.bm25 import tokenize
+
+WORDS = (
+    "build ship prototype team judges demo api dataset model latency users impact scale cloud "
+    "react python pipeline dashboard mentor pitch track sponsor open source security health climate "
+    "fintech edtech agent vector search realtime mobile hardware sensor blockchain design"
+).split()
+
+INTENT_KEYWORDS = [
+    ("TEAM_MATCHING", ("team", "teammate", "partner", "member")),
+    ("ANALYTICS", ("analytic", "statistic", "stats", "department", "participation")),
+    ("RECOMMENDATION", ("recommend", "suggest", "which hackathon", "find hackathon", "upcoming")),
+]
+
+def _digest(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+def fake_answer(prompt: str, output_tokens: int) -> str:
+    """The same answer for the same prompt, in the format the calling agent expects."""
+    if "Classify this hackathon query" in prompt:
+        query = prompt.rsplit("Query:", 1)[-1].lower()
+        for label, keywords in INTENT_KEYWORDS:
+            if any(k in query for k in keywords):
+                return label
+        return "IDEA_GEN"
+    if "mapping each hackathon_id" in prompt:
+        ids = re.findall(r"ID: (\d+)", prompt)
+        return json.dumps({hid: f"Fits your skills and interests ({WORDS[_digest(hid) % len(WORDS)]})" for hid in ids})
+    if "JSON array of 5 objects" in prompt:
+        return json.dumps([
+            {"id": i, "title": f"Step {i}", "description": f"{WORDS[(_digest(prompt) + i) % len(WORDS)]} milestone", "x": 100 + 150 * (i - 1), "y": 150}
+            for i in range(1, 6)
+        ])
+    rng = random.Random(_digest(prompt))
+    return " ".join(rng.choice(WORDS) for _ in range(output_tokens))
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(m.content if isinstance(m.content, str) else json.dumps(m.content) for m in messages)
+
+class FakeChatModel(BaseChatModel):
+    latency: float = 0.2  # Seconds to the first token
+    tokens_per_second: float = 200.0
+    output_tokens: int = 120
+    model: str = "fake-chat"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _answer(self, messages):
+        prompt = _prompt_text(messages)
+        answer = fake_answer(prompt, self.output_tokens)
+        # JSON and labels go out whole; text is streamed word by word
+        pieces = [answer] if answer[:1] in "[{" or " " not in answer else [w + " " for w in answer.split(" ")]
+        pieces[-1] = pieces[-1].rstrip(" ")
+        usage = {"input_tokens": count_tokens(prompt), "output_tokens": count_tokens(answer)}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return answer, pieces, usage
+
+    @property
+    def _token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        answer, pieces, usage = self._answer(messages)
+        time.sleep(self.latency + self._token_delay * len(pieces))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=answer, usage_metadata=usage))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        answer, pieces, usage = self._answer(messages)
+        await asyncio.sleep(self.latency + self._token_delay * len(pieces))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=answer, usage_metadata=usage))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        _, pieces, usage = self._answer(messages)
+        time.sleep(self.latency)
+        for i, piece in enumerate(pieces):
+            time.sleep(self._token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece, usage_metadata=usage if i == len(pieces) - 1 else None))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        _, pieces, usage = self._answer(messages)
+        await asyncio.sleep(self.latency)
+        for i, piece in enumerate(pieces):
+            await asyncio.sleep(self._token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece, usage_metadata=usage if i == len(pieces) - 1 else None))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+class FakeEmbeddings(Embeddings):
+    """Hashed bag-of-words: each token adds +-1 to one dimension, then the vector is normalized."""
+
+    def __init__(self, dim: int = 3072, latency: float = 0.05, per_text_latency: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+        self.per_text_latency = per_text_latency
+
+    def _vector(self, text: str) -> List[float]:
+        v = np.zeros(self.dim, dtype=np.float32)
+        for token in tokenize(text) or [text]:
+            h = _digest(token)
+            v[h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = np.linalg.norm(v)
+        return (v / norm if norm else v).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency + self.per_text_latency * len(texts))
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return self._vector(text)
+
+def fake_chat_model(model: str = "fake-chat") -> FakeChatModel:
+    return FakeChatModel(
+        model=model,
+        latency=float(os.getenv("FAKE_LLM_LATENCY", "0.2")),
+        tokens_per_second=float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", "200")),
+        output_tokens=int(os.getenv("FAKE_LLM_OUTPUT_TOKENS", "120")),
+    )
+
+def fake_embeddings() -> FakeEmbeddings:
+    return FakeEmbeddings(
+        dim=int(os.getenv("FAKE_EMBED_DIM", "3072")),
+        latency=float(os.getenv("FAKE_EMBED_LATENCY", "0.05")),
+        per_text_latency=float(os.getenv("FAKE_EMBED_PER_TEXT_LATENCY", "0")),
+    )
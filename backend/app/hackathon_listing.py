@@ -0,0 +1,95 @@
+import asyncio
+import bisect
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+
+FIELDS = ("hackathon_id", "name", "description", "skills_required", "deadline")
+
+class ActiveHackathonSnapshot:
+    """
+    In-memory copy of the active (deadline >= now) hackathon list for /api/hackathons.
+    Rebuilt from the DB only after invalidate() (sync or a write) or max_age seconds, the
+    latter so other workers pick up a sync. Rows are kept sorted by deadline, so events
+    that close are dropped from the front without a query. Response bodies are
+    pre-serialized JSON bytes, cached per (offset, limit, fields) variant, each with an ETag.
+    """
+
+    def __init__(self, max_age: float = 60.0, max_variants: int = 64):
+        self.max_age = max_age
+        self.max_variants = max_variants
+        self.version = 0
+        self.rows: List[dict] = []
+        self.deadlines: List[datetime] = []
+        self.built_at = 0.0
+        self._dirty = True
+        self._lock = asyncio.Lock()
+        self._variants: "OrderedDict[tuple, Tuple[bytes, str, int]]" = OrderedDict()
+        self.counters = {"rebuilds": 0, "hits": 0, "renders": 0, "not_modified": 0}
+
+    def invalidate(self):
+        self._dirty = True
+
+    def _stale(self) -> bool:
+        return self._dirty or time.monotonic() - self.built_at > self.max_age
+
+    async def _rebuild(self, db):
+        from .database import Hackathon
+        self._dirty = False
+        hacks = (await db.scalars(
+            select(Hackathon).filter(Hackathon.deadline >= datetime.now()).order_by(Hackathon.deadline)
+        )).all()
+        self.rows = [{field: getattr(h, field) for field in FIELDS} for h in hacks]
+        self.deadlines = [h.deadline for h in hacks]
+        self.version += 1
+        self.built_at = time.monotonic()
+        self._variants.clear()
+        self.counters["rebuilds"] += 1
+
+    async def refresh(self, db):
+        if self._stale():
+            async with self._lock:
+                if self._stale():
+                    await self._rebuild(db)
+
+    def render(self, offset: int = 0, limit: Optional[int] = None, fields: Optional[Sequence[str]] = None) -> Tuple[bytes, str, int]:
+        """(body, etag, total) for one page of the list; cached until the snapshot or the active window changes."""
+        # Rows are sorted by deadline, so everything before `start` has closed since the rebuild
+        start = bisect.bisect_left(self.deadlines, datetime.now())
+        fields = tuple(f for f in FIELDS if f in fields) if fields else FIELDS
+        key = (self.version, start, offset, limit, fields)
+        cached = self._variants.get(key)
+        if cached:
+            self._variants.move_to_end(key)
+            self.counters["hits"] += 1
+            return cached
+
+        active = self.rows[start:]
+        page = active[offset:offset + limit if limit is not None else None]
+        body = json.dumps(jsonable_encoder([{f: row[f] for f in fields} for row in page]), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        # Content hash, so every worker hands out the same tag for the same bytes
+        etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+        cached = self._variants[key] = (body, etag, len(active))
+        if len(self._variants) > self.max_variants:
+            self._variants.popitem(last=False)
+        self.counters["renders"] += 1
+        return cached
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "version": self.version,
+            "rows": len(self.rows),
+            "variants": len(self._variants),
+            "age_seconds": round(time.monotonic() - self.built_at, 1) if self.built_at else None,
+        }
+
+# Global snapshot
+active_hackathons = ActiveHackathonSnapshot(max_age=float(os.getenv("HACKATHON_SNAPSHOT_MAX_AGE", "60")))
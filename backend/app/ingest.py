@@ -0,0 +1,153 @@
+"""
+Streaming readers for scraped feeds. Items are decoded one at a time, so memory
+stays flat whatever the feed size.
+
+A feed is any zero-argument callable returning an iterator of item dicts tagged with
+"source" and, for relative deadlines, "scraped_at". Scrapers plug in with
+register_feed(); sync_data reads every registered feed.
+"""
+import json
+import os
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_FEED_PATH = os.path.join(os.path.dirname(__file__), "..", "scraped_data.json")
+READ_SIZE = 1 << 16
+
+class FeedFormatError(ValueError):
+    pass
+
+def batched(iterable: Iterable, size: int) -> Iterator[List]:
+    """Fixed-size lists from an iterable; the last one may be shorter."""
+    it = iter(iterable)
+    while batch := list(islice(it, size)):
+        yield batch
+
+class _Scanner:
+    """Just enough of a JSON tokenizer to walk the top level of a feed file chunk by chunk."""
+
+    def __init__(self, f, read_size: int):
+        self.f = f
+        self.read_size = read_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        data = self.f.read(self.read_size)
+        if not data:
+            self.eof = True
+            return False
+        # Drop what has been consumed so the buffer holds at most ~one item plus one read
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        c = self.peek()
+        if not c or c not in chars:
+            raise FeedFormatError(f"Expected one of {chars!r} in feed, got {c or 'end of file'!r}")
+        self.pos += 1
+        return c
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number cut at the buffer edge still decodes: only trust values that end before it
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise FeedFormatError(f"Malformed feed: {e}") from e
+            self._fill()
+
+def file_scraped_at(path: str) -> str:
+    """Fallback scrape time for feeds that do not record one: the file's modification time."""
+    return datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec="seconds")
+
+def iter_json_feed(path: str, meta: Optional[dict] = None, read_size: int = READ_SIZE) -> Iterator[dict]:
+    """
+    Items from a {"<source>": [item, ...], ...} file, each tagged with its source and scrape time.
+    Top-level values that are not lists (e.g. "scraped_at") are stored in meta.
+    """
+    meta = meta if meta is not None else {}
+    fallback_scraped_at = file_scraped_at(path)
+    with open(path, "r", encoding="utf-8") as f:
+        scan = _Scanner(f, read_size)
+        scan.expect("{")
+        if scan.peek() == "}":
+            return
+        while True:
+            key = scan.value()
+            scan.expect(":")
+            if scan.peek() == "[":
+                scan.expect("[")
+                if scan.peek() == "]":
+                    scan.expect("]")
+                else:
+                    while True:
+                        item = scan.value()
+                        if isinstance(item, dict):
+                            # A top-level "scraped_at" counts only if it comes before the lists
+                            yield {"scraped_at": meta.get("scraped_at", fallback_scraped_at), **item, "source": key}
+                        if scan.expect(",]") == "]":
+                            break
+            else:
+                meta[key] = scan.value()
+            if scan.expect(",}") == "}":
+                return
+
+def iter_jsonl_feed(path: str, source: Optional[str] = None) -> Iterator[dict]:
+    """Items from a JSON-Lines file: one object per line, source and scrape time from the line or the file."""
+    source = source or os.path.splitext(os.path.basename(path))[0]
+    scraped_at = file_scraped_at(path)
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise FeedFormatError(f"{path}:{line_no}: {e}") from e
+            if isinstance(item, dict):
+                yield {"source": source, "scraped_at": scraped_at, **item}
+
+def open_feed(path: str) -> Iterator[dict]:
+    if path.endswith((".jsonl", ".ndjson")):
+        return iter_jsonl_feed(path)
+    return iter_json_feed(path)
+
+# Registered feeds: name -> callable returning an iterator of tagged items
+FEEDS: Dict[str, Callable[[], Iterator[dict]]] = {}
+
+def register_feed(name: str, reader: Callable[[], Iterator[dict]]):
+    FEEDS[name] = reader
+    return reader
+
+def register_feed_files(paths: Iterable[str]):
+    for path in paths:
+        register_feed(os.path.basename(path), lambda path=path: open_feed(path))
+
+def iter_feeds(feeds: Optional[Iterable[Callable[[], Iterator[dict]]]] = None) -> Iterator[dict]:
+    """Items of every given (default: registered) feed, one feed after another."""
+    for reader in (feeds if feeds is not None else list(FEEDS.values())):
+        yield from reader()
+
+# SCRAPED_FEEDS: os.pathsep-separated .json / .jsonl files, defaults to backend/scraped_data.json
+register_feed_files(p for p in os.getenv("SCRAPED_FEEDS", DEFAULT_FEED_PATH).split(os.pathsep) if p)
@@ -0,0 +1,56 @@
+import threading
+import time
+from typing import Callable, Dict, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+class Lazy(Generic[T]):
+    """
+    Thread-safe on-first-use singleton. Network clients are built by get(), not at import,
+    so workers start without a database or API key; construction time is recorded.
+    """
+
+    registry: Dict[str, "Lazy"] = {}
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self.factory = factory
+        self._value: Optional[T] = None
+        self._lock = threading.Lock()
+        self.init_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        Lazy.registry[name] = self
+
+    @property
+    def initialized(self) -> bool:
+        return self._value is not None
+
+    def get(self) -> T:
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    start = time.perf_counter()
+                    try:
+                        self._value = self.factory()
+                        self.error = None
+                    except Exception as e:
+                        self.error = str(e)
+                        raise
+                    finally:
+                        self.init_seconds = round(time.perf_counter() - start, 4)
+        return self._value
+
+    def peek(self) -> Optional[T]:
+        """The instance if already built; never triggers construction."""
+        return self._value
+
+    def reset(self):
+        with self._lock:
+            self._value = None
+            self.init_seconds = None
+
+    def stats(self) -> dict:
+        return {"initialized": self.initialized, "init_seconds": self.init_seconds, "error": self.error}
+
+def lazy_stats() -> dict:
+    return {name: lazy.stats() for name, lazy in Lazy.registry.items()}
@@ -0,0 +1,185 @@
+import asyncio
+import os
+import threading
+import weakref
+from typing import Callable, Dict, Optional
+from dotenv import load_dotenv
+from .lazy import Lazy
+from .metrics import record_tokens, span
+
+# Load .env from project root relative to this file
+env_path = os.path.join(os.path.dirname(__file__), "..", "..", ".env")
+load_dotenv(env_path)
+
+DEFAULT_MODEL = os.getenv("LLM_MODEL", "gemini-2.5-flash")
+
+def token_usage(response) -> tuple:
+    """(input, output) tokens reported on an LLMResult's chat generations."""
+    input_tokens = output_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            input_tokens += usage.get("input_tokens", 0)
+            output_tokens += usage.get("output_tokens", 0)
+    return input_tokens, output_tokens
+
+def token_counter(model: str):
+    """Callback handler feeding the model's token usage into the metrics."""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class TokenCounter(BaseCallbackHandler):
+        # Runs in the caller's context, so the tokens land on the request's trace
+        run_inline = True
+
+        def on_llm_end(self, response, **kwargs):
+            record_tokens(model, *token_usage(response))
+
+    return TokenCounter()
+
+def gemini_factory(model: str, timeout: float, max_retries: int):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model=model,
+        google_api_key=os.getenv("GEMINI_API_KEY"),
+        timeout=timeout,
+        max_retries=max_retries,
+    )
+
+def fake_factory(model: str, timeout: float, max_retries: int):
+    from .fake_models import fake_chat_model
+    return fake_chat_model(model)
+
+# LLM_PROVIDER picks the chat model factory (and, in the RAG engine, the embeddings)
+PROVIDERS = {"gemini": gemini_factory, "fake": fake_factory}
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+
+class LLMRegistry:
+    """
+    One long-lived chat client per model, so every request reuses the SDK's pooled
+    keep-alive connections instead of opening (and TLS-handshaking) its own.
+    Calls through ainvoke() share a per-model concurrency limit and a timeout,
+    and chains are compiled once per (name, model).
+    """
+
+    def __init__(self, factory: Callable = gemini_factory, max_concurrency: int = 8, timeout: float = 30.0, max_retries: int = 2):
+        self.factory = factory
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._clients: Dict[str, Lazy] = {}
+        self._chains: Dict[tuple, object] = {}
+        self._chain_names: Dict[int, str] = {}
+        self._token_counters: Dict[str, object] = {}
+        # Per event loop: an asyncio.Semaphore can't be shared across loops
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    def get(self, model: str = DEFAULT_MODEL):
+        with self._lock:
+            lazy = self._clients.get(model)
+            if lazy is None:
+                lazy = self._clients[model] = Lazy(
+                    f"llm:{model}", lambda: self.factory(model, timeout=self.timeout, max_retries=self.max_retries)
+                )
+                self.counters[model] = {"calls": 0, "in_flight": 0, "waiting": 0, "timeouts": 0, "errors": 0}
+        return lazy.get()
+
+    def chain(self, name: str, prompt, model: str = DEFAULT_MODEL):
+        """prompt | llm | StrOutputParser, built on first use and then reused."""
+        key = (name, model)
+        chain = self._chains.get(key)
+        if chain is None:
+            from langchain_core.output_parsers import StrOutputParser
+            chain = prompt | self.get(model) | StrOutputParser()
+            with self._lock:
+                chain = self._chains.setdefault(key, chain)
+                self._chain_names[id(chain)] = name
+        return chain
+
+    def config(self, model: str = DEFAULT_MODEL) -> dict:
+        """
+        Runnable config counting the call's tokens; pass it to chains invoked outside ainvoke().
+        The counter is merged into the callbacks inherited from the parent run: a bare
+        {"callbacks": [...]} would replace them, and astream_events would stop seeing the tokens.
+        """
+        from langchain_core.runnables.config import ensure_config, merge_configs
+        counter = self._token_counters.get(model)
+        if counter is None:
+            counter = self._token_counters.setdefault(model, token_counter(model))
+        return merge_configs(ensure_config(), {"callbacks": [counter]})
+
+    def _semaphore(self, model: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            per_loop = self._semaphores.setdefault(loop, {})
+            if model not in per_loop:
+                per_loop[model] = asyncio.Semaphore(self.max_concurrency)
+            return per_loop[model]
+
+    async def ainvoke(self, runnable, inputs, model: str = DEFAULT_MODEL, timeout: Optional[float] = None):
+        """
+        Runs a chain under the model's concurrency limit; time spent queued counts toward the timeout.
+        Identical concurrent calls (same chain, model and inputs) share one upstream request.
+        """
+        from .single_flight import single_flight
+        name = self._chain_names.get(id(runnable))
+        namespace = f"llm:{name or f'chain-{id(runnable)}'}:{model}"
+        # _ainvoke enforces the LLM timeout; the flight's own timeout is only a backstop
+        return await single_flight.do(namespace, inputs, lambda: self._ainvoke(runnable, inputs, model, timeout))
+
+    async def _ainvoke(self, runnable, inputs, model: str, timeout: Optional[float]):
+        self.get(model)
+        counters = self.counters[model]
+        counters["calls"] += 1
+        counters["waiting"] += 1
+
+        async def call():
+            acquired = False
+            try:
+                async with self._semaphore(model):
+                    acquired = True
+                    counters["waiting"] -= 1
+                    counters["in_flight"] += 1
+                    try:
+                        return await runnable.ainvoke(inputs, config=self.config(model))
+                    finally:
+                        counters["in_flight"] -= 1
+            finally:
+                if not acquired:
+                    counters["waiting"] -= 1
+
+        try:
+            # Queue wait included: it is part of what the caller waits for
+            with span("llm", model=model, chain=self._chain_names.get(id(runnable), "other")):
+                return await asyncio.wait_for(call(), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            counters["timeouts"] += 1
+            raise
+        except Exception:
+            counters["errors"] += 1
+            raise
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout,
+            "models": {model: dict(c) for model, c in self.counters.items()},
+            "chains": len(self._chains),
+        }
+
+def registry_from_env() -> LLMRegistry:
+    if LLM_PROVIDER not in PROVIDERS:
+        raise ValueError(f"Unknown LLM_PROVIDER {LLM_PROVIDER!r}; expected one of {sorted(PROVIDERS)}")
+    return LLMRegistry(
+        factory=PROVIDERS[LLM_PROVIDER],
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+        timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", "30")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
+    )
+
+# Global registry
+llm_registry = registry_from_env()
+
+def get_llm(model: str = DEFAULT_MODEL):
+    return llm_registry.get(model)
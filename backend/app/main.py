@@ -1,15 +1,85 @@
-from fastapi import FastAPI, Depends
+import time
+_import_started = time.perf_counter()
+
+from typing import Optional
+import asyncio
+import json
+import math
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from .schemas import (
     ChatRequest, ChatResponse, RoadmapRequest, RoadmapResponse, 
     DashboardStats, StudentAuth, StudentLogin, StudentOnboard,
     CreateTeamRequest, JoinTeamRequest
 )
-from .agents.router_agent import app_graph
-from .database import get_db, Student, Hackathon
-from langchain_core.messages import HumanMessage
+from sqlalchemy import select
+from .database import get_async_db, init_db, Student, Hackathon
+from .agents.response_cache import response_cache
+from .agents.recommender import recommendation_index
+from .agents.team_matcher import team_matcher
+from .hackathon_listing import active_hackathons
+from .analytics import department_rollups
+from .lazy import lazy_stats
+from .metrics import MetricsMiddleware, metrics
+from .prompt_compiler import prompt_compiler, student_summary
+from .single_flight import single_flight
+from .admission import BUSY_MESSAGE, Overloaded, admission, overloaded_response
+
+startup_stats = {"import_seconds": None, "warmup": {"mode": None, "status": "pending", "seconds": None, "errors": {}}}
 
-app = FastAPI(title="HackAssist API")
+def _load_graph():
+    from .agents.router_agent import app_graph
+    return app_graph
+
+def warm_up():
+    """Builds the agent graph, LLM client and RAG engine so the first chat doesn't pay for them."""
+    from .llm import get_llm
+    from .rag.rag_engine import get_rag_engine
+    warmup = startup_stats["warmup"]
+    warmup["status"] = "running"
+    start = time.perf_counter()
+    steps = [
+        ("app_graph", _load_graph),
+        ("llm", get_llm),
+        ("rag_engine", get_rag_engine),
+    ]
+    for name, step in steps:
+        try:
+            step()
+        except Exception as e:
+            # Missing DB/API key: keep serving, the singleton retries on first use
+            warmup["errors"][name] = str(e)
+            print(f"⚠️ Warm-up of {name} failed: {e}")
+    warmup["seconds"] = round(time.perf_counter() - start, 4)
+    warmup["status"] = "done"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # WARMUP=background (default) serves immediately, =blocking waits for clients, =off skips
+    mode = os.getenv("WARMUP", "background")
+    startup_stats["warmup"]["mode"] = mode
+    # Columns and tables added since the database was created, before anything queries them
+    try:
+        await asyncio.to_thread(init_db)
+    except Exception as e:
+        print(f"⚠️ Schema migration failed: {e}")
+    if mode == "blocking":
+        await asyncio.to_thread(warm_up)
+    elif mode != "off":
+        asyncio.get_running_loop().run_in_executor(None, warm_up)
+    # ANALYTICS_REFRESH_SECONDS=0 leaves rollup refreshes to the requests that read them
+    rollup_task = None
+    if department_rollups.check_interval > 0:
+        from .database import AsyncSessionLocal
+        rollup_task = asyncio.create_task(department_rollups.run(AsyncSessionLocal))
+    yield
+    if rollup_task:
+        rollup_task.cancel()
+
+app = FastAPI(title="HackAssist API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -18,7 +88,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Degraded", "Retry-After"],
 )
+# Latency per route for /metrics; X-Trace: 1 returns the request's spans in Server-Timing
+app.add_middleware(MetricsMiddleware, sample_rate=float(os.getenv("METRICS_TRACE_SAMPLE", "0")))
 
 # Simple mock hashing for demo (in production use passlib/bcrypt)
 def hash_password(password: str): return f"hashed_{password}"
@@ -29,9 +102,9 @@ async def root():
     return {"message": "HackAssist Neural Core Online"}
 
 @app.post("/api/auth/register")
-async def register(profile: StudentAuth, db = Depends(get_db)):
+async def register(profile: StudentAuth, db = Depends(get_async_db)):
     # Check if email exists
-    existing = db.query(Student).filter(Student.email == profile.email).first()
+    existing = await db.scalar(select(Student).filter(Student.email == profile.email))
     if existing:
         return {"status": "error", "message": "Email already registered in Neural Core."}
 
@@ -41,13 +114,16 @@ async def register(profile: StudentAuth, db = Depends(get_db)):
         password_hash=hash_password(profile.password)
     )
     db.add(db_student)
-    db.commit()
-    db.refresh(db_student)
+    await db.commit()
+    await db.refresh(db_student)
+    response_cache.invalidate("students")
+    team_matcher.invalidate()
+    department_rollups.invalidate()
     return {"status": "success", "student_id": db_student.student_id}
 
 @app.post("/api/auth/login")
-async def login(credentials: StudentLogin, db = Depends(get_db)):
-    student = db.query(Student).filter(Student.email == credentials.email).first()
+async def login(credentials: StudentLogin, db = Depends(get_async_db)):
+    student = await db.scalar(select(Student).filter(Student.email == credentials.email))
     if student and verify_password(student.password_hash, credentials.password):
         return {
             "status": "success", 
@@ -58,50 +134,131 @@ async def login(credentials: StudentLogin, db = Depends(get_db)):
     return {"status": "error", "message": "Invalid credentials"}
 
 @app.post("/api/student/onboard")
-async def onboard(data: StudentOnboard, db = Depends(get_db)):
-    student = db.query(Student).filter(Student.student_id == data.student_id).first()
+async def onboard(data: StudentOnboard, db = Depends(get_async_db)):
+    student = await db.scalar(select(Student).filter(Student.student_id == data.student_id))
     if not student: return {"status": "error", "message": "Student not found"}
     
     student.department = data.department
     student.experience_level = data.experience_level
     student.skills = data.skills
     student.interests = data.interests
-    db.commit()
+    student.summary = student_summary(student)
+    await db.commit()
+    response_cache.invalidate(f"student:{data.student_id}", "students")
+    recommendation_index.upsert_student(student)
+    team_matcher.invalidate()
+    department_rollups.invalidate()
     return {"status": "success"}
 
+def chat_rate_key(request: ChatRequest, http_request: Request):
+    """Rate-limit key: the student, or the client address for anonymous chats (which run as student 1)."""
+    if request.user_id and request.user_id.isdigit():
+        return int(request.user_id)
+    return ("client", http_request.client.host if http_request.client else None)
+
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
+    from langchain_core.messages import HumanMessage
+    from .agents.router_agent import app_graph
     # Run the LangGraph agent
     student_id = int(request.user_id) if request.user_id and request.user_id.isdigit() else 1
-    result = await app_graph.ainvoke({
+    result, degraded = await admission.run("chat", lambda: app_graph.ainvoke({
         "messages": [HumanMessage(content=request.message)],
         "student_id": student_id
-    })
+    }), student_id=chat_rate_key(request, http_request))
+    # No non-LLM answer for free-form chat: tell the client when to retry
+    if degraded:
+        return overloaded_response("chat", degraded)
     return ChatResponse(response=result["output"], intent=result["intent"])
 
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """Server-Sent Events: `intent` as soon as routing resolves, then `token` chunks, then `done`."""
+    from langchain_core.messages import HumanMessage
+    from .agents.router_agent import app_graph
+    student_id = int(request.user_id) if request.user_id and request.user_id.isdigit() else 1
+    rate_key = chat_rate_key(request, http_request)
+
+    async def events():
+        # Admitted inside the generator, so the slot is released however the stream ends
+        try:
+            await admission.acquire("chat", rate_key)
+        except Overloaded as e:
+            yield sse_event("error", {"message": BUSY_MESSAGE, "reason": e.reason, "retry_after": math.ceil(e.retry_after)})
+            return
+        started = time.monotonic()
+        intent, output = None, ""
+        try:
+            async for event in app_graph.astream_events({
+                "messages": [HumanMessage(content=request.message)],
+                "student_id": student_id
+            }, version="v2"):
+                kind, name = event["event"], event["name"]
+                node = event.get("metadata", {}).get("langgraph_node")
+                if kind == "on_chain_end" and name in ("router", "llm_classify") and not intent:
+                    intent = (event["data"].get("output") or {}).get("intent")
+                    if intent:
+                        yield sse_event("intent", {"intent": intent})
+                elif kind == "on_chat_model_stream" and node == "executor":
+                    text = event["data"]["chunk"].content
+                    if text:
+                        yield sse_event("token", {"text": text})
+                elif kind == "on_chain_end" and name == "executor":
+                    output = (event["data"].get("output") or {}).get("output", "")
+        except Exception as e:
+            yield sse_event("error", {"message": str(e)})
+            return
+        finally:
+            # Tokens keep flowing past the deadline once started; the slot is held until the end
+            admission.release("chat", started)
+        # Full text too, for cached answers that produced no tokens
+        yield sse_event("done", {"response": output, "intent": intent})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.get("/api/recommendations/{student_id}")
-async def get_personalized_recommendations_api(student_id: int):
-    from .agents.specialist_agents import get_personalized_recommendations
-    res = await get_personalized_recommendations(student_id)
+async def get_personalized_recommendations_api(student_id: int, response: Response):
+    from .agents.specialist_agents import get_personalized_recommendations, get_ranked_recommendations
+    # Under overload: the index ranking with skill-overlap reasons, no LLM
+    res, degraded = await admission.run(
+        "recommendations", lambda: get_personalized_recommendations(student_id),
+        fallback=lambda: get_ranked_recommendations(student_id), student_id=student_id, inputs={"student_id": student_id},
+    )
+    if degraded:
+        response.headers["X-Degraded"] = degraded
     return res
 
 @app.get("/api/hackathons")
-async def list_hackathons(db = Depends(get_db)):
-    from datetime import datetime
-    # Fetch all hackathons that are still active or upcoming
-    hacks = db.query(Hackathon).filter(Hackathon.deadline >= datetime.now()).all()
-    return hacks
+async def list_hackathons(
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    fields: Optional[str] = None,
+    db = Depends(get_async_db),
+):
+    """Active hackathons from the in-memory snapshot; supports If-None-Match, paging and ?fields=name,deadline."""
+    await active_hackathons.refresh(db)
+    body, etag, total = active_hackathons.render(offset, limit, fields.split(",") if fields else None)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Total-Count": str(total)}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+        active_hackathons.counters["not_modified"] += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @app.get("/api/hackathon/{hackathon_id}")
-async def get_hackathon_details(hackathon_id: str, db = Depends(get_db)):
+async def get_hackathon_details(hackathon_id: str, db = Depends(get_async_db)):
     from urllib.parse import unquote
     # Try ID lookup if numeric
     if hackathon_id.isdigit():
-        hack = db.query(Hackathon).filter(Hackathon.hackathon_id == int(hackathon_id)).first()
+        hack = await db.scalar(select(Hackathon).filter(Hackathon.hackathon_id == int(hackathon_id)))
     else:
         # Fallback to name lookup
         decoded_name = unquote(hackathon_id)
-        hack = db.query(Hackathon).filter(Hackathon.name == decoded_name).first()
+        hack = await db.scalar(select(Hackathon).filter(Hackathon.name == decoded_name).limit(1))
     return hack
 
 import random
@@ -111,12 +268,12 @@ def generate_team_code():
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
 
 @app.post("/api/team/create")
-async def create_team(req: CreateTeamRequest, db = Depends(get_db)):
+async def create_team(req: CreateTeamRequest, db = Depends(get_async_db)):
     from .database import Team, Participation
     
     # Generate unique code
     code = generate_team_code()
-    while db.query(Team).filter(Team.team_code == code).first():
+    while await db.scalar(select(Team).filter(Team.team_code == code)):
         code = generate_team_code()
         
     new_team = Team(
@@ -125,8 +282,8 @@ async def create_team(req: CreateTeamRequest, db = Depends(get_db)):
         team_code=code
     )
     db.add(new_team)
-    db.commit()
-    db.refresh(new_team)
+    await db.commit()
+    await db.refresh(new_team)
     
     # Create participation for the creator
     participation = Participation(
@@ -137,23 +294,24 @@ async def create_team(req: CreateTeamRequest, db = Depends(get_db)):
         status="Registered"
     )
     db.add(participation)
-    db.commit()
+    await db.commit()
+    department_rollups.invalidate()
     
     return {"status": "success", "team_code": code, "team_id": new_team.team_id}
 
 @app.post("/api/team/join")
-async def join_team(req: JoinTeamRequest, db = Depends(get_db)):
+async def join_team(req: JoinTeamRequest, db = Depends(get_async_db)):
     from .database import Team, Participation
     
-    team = db.query(Team).filter(Team.team_code == req.team_code).first()
+    team = await db.scalar(select(Team).filter(Team.team_code == req.team_code))
     if not team:
         return {"status": "error", "message": "Invalid team code."}
         
     # Check if already in this hackathon
-    existing = db.query(Participation).filter(
+    existing = await db.scalar(select(Participation).filter(
         Participation.student_id == req.student_id,
         Participation.hackathon_id == team.hackathon_id
-    ).first()
+    ).limit(1))
     
     if existing:
         return {"status": "error", "message": "You are already registered for this hackathon."}
@@ -166,45 +324,86 @@ async def join_team(req: JoinTeamRequest, db = Depends(get_db)):
         status="Registered"
     )
     db.add(participation)
-    db.commit()
+    await db.commit()
+    department_rollups.invalidate()
     
     return {"status": "success", "team_name": team.team_name, "hackathon_id": team.hackathon_id}
 
+@app.get("/api/team/suggestions/{student_id}")
+async def get_team_suggestions_api(student_id: int, hackathon_id: Optional[int] = None, top_n: int = 3, narrative: bool = True):
+    """Scored teammate suggestions; narrative=false skips the LLM and returns only the raw teams."""
+    from .agents.specialist_agents import get_team_candidates, get_team_suggestions
+    teams = await get_team_candidates(student_id, hackathon_id, top_n=top_n)
+    text = await get_team_suggestions(student_id, hackathon_id, teams=teams) if narrative and teams else None
+    return {"teams": teams, "narrative": text}
+
 @app.get("/api/team/members/{team_id}")
-async def get_team_members(team_id: int, db = Depends(get_db)):
+async def get_team_members(team_id: int, db = Depends(get_async_db)):
     from .database import Participation, Student
-    members = db.query(Student).join(Participation).filter(Participation.team_id == team_id).all()
+    members = (await db.scalars(select(Student).join(Participation).filter(Participation.team_id == team_id))).all()
     return members
 
 @app.get("/api/student_progress/{student_id}")
-async def get_student_progress(student_id: int, db = Depends(get_db)):
+async def get_student_progress(student_id: int, db = Depends(get_async_db)):
     from .database import Participation, Hackathon
-    results = db.query(Participation, Hackathon).join(Hackathon).filter(Participation.student_id == student_id).all()
+    results = (await db.execute(select(Participation, Hackathon).join(Hackathon).filter(Participation.student_id == student_id))).all()
     return [
         {"hackathon": h.name, "status": p.status, "deadline": h.deadline, "hackathon_id": h.hackathon_id}
         for p, h in results
     ]
 
 @app.get("/api/analytics/department")
-async def get_department_analytics_api():
-    from .agents.specialist_agents import get_department_analytics
-    report = await get_department_analytics()
+async def get_department_analytics_api(response: Response):
+    from .agents.specialist_agents import get_cached_department_analytics, get_department_analytics
+    # Under overload: the last stored narrative, or the rollup numbers as text
+    report, degraded = await admission.run("analytics", get_department_analytics, fallback=get_cached_department_analytics, inputs={})
+    if degraded:
+        response.headers["X-Degraded"] = degraded
     return {"report": report}
 
+@app.get("/api/analytics/department/stats")
+async def get_department_stats(department: Optional[str] = None, db = Depends(get_async_db)):
+    """Participation rate, status funnel, top skills and monthly trend per department, from the SQL rollups."""
+    await department_rollups.get(db)
+    if department is None:
+        return Response(content=department_rollups.body, media_type="application/json", headers={"X-Rollup-Version": str(department_rollups.version)})
+    stats = department_rollups.department(department)
+    if stats is None:
+        return {"status": "error", "message": f"No students in department {department}."}
+    return {"version": department_rollups.version, "refreshed_at": department_rollups.report["refreshed_at"], **stats}
+
 @app.post("/api/sync")
 async def trigger_sync():
-    """Triggers the live scraper and synchronization process."""
-    try:
-        from .sync_scraped_data import sync_data
-        # This will run the sync logic (Scraping + SQL + RAG)
-        # Note: In a production app, this should be a background task
-        sync_data()
-        return {"status": "success", "message": "Neural Core synchronized with live data peaks."}
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
+    """Queues the scraper sync on a worker thread; poll GET /api/sync/{job_id} for progress."""
+    from .sync_scraped_data import sync_data
+    from .sync_jobs import sync_jobs
+    job, created = sync_jobs.submit(sync_data)
+    return {
+        "status": "success",
+        "message": "Sync queued." if created else "Sync already in progress.",
+        "job_id": job.job_id,
+        "deduplicated": not created,
+        "job": job.to_dict(),
+    }
+
+@app.get("/api/sync/{job_id}")
+async def get_sync_status(job_id: str):
+    from .sync_jobs import sync_jobs
+    job = sync_jobs.get(job_id)
+    if not job:
+        return {"status": "error", "message": "Unknown sync job."}
+    return {"status": "success", "job": job.to_dict()}
+
+@app.delete("/api/sync/{job_id}")
+async def cancel_sync(job_id: str):
+    from .sync_jobs import sync_jobs
+    job = sync_jobs.cancel(job_id)
+    if not job:
+        return {"status": "error", "message": "Unknown sync job."}
+    return {"status": "success", "job": job.to_dict()}
 
 @app.get("/api/team/check/{student_id}/{hackathon_id}")
-async def check_team_membership(student_id: int, hackathon_id: str, db = Depends(get_db)):
+async def check_team_membership(student_id: int, hackathon_id: str, db = Depends(get_async_db)):
     from .database import Participation, Team
     from urllib.parse import unquote
     
@@ -214,19 +413,19 @@ async def check_team_membership(student_id: int, hackathon_id: str, db = Depends
         actual_hid = int(hackathon_id)
     else:
         h_name = unquote(hackathon_id)
-        hack = db.query(Hackathon).filter(Hackathon.name == h_name).first()
+        hack = await db.scalar(select(Hackathon).filter(Hackathon.name == h_name).limit(1))
         if hack: actual_hid = hack.hackathon_id
         
     if not actual_hid:
         return {"status": "none"}
         
-    participation = db.query(Participation).filter(
+    participation = await db.scalar(select(Participation).filter(
         Participation.student_id == student_id,
         Participation.hackathon_id == actual_hid
-    ).first()
+    ).limit(1))
     
     if participation and participation.team_id:
-        team = db.query(Team).filter(Team.team_id == participation.team_id).first()
+        team = await db.scalar(select(Team).filter(Team.team_id == participation.team_id))
         return {
             "status": "exists",
             "team_id": team.team_id,
@@ -236,12 +435,19 @@ async def check_team_membership(student_id: int, hackathon_id: str, db = Depends
     return {"status": "none"}
 
 @app.post("/api/roadmap", response_model=RoadmapResponse)
-async def generate_roadmap(request: RoadmapRequest):
+async def generate_roadmap(request: RoadmapRequest, response: Response):
     from .agents.specialist_agents import get_hackathon_roadmap_agent
     # Try to generate semantic steps if we have IDs
     if request.user_id and request.hackathon_id:
         try:
-            steps = await get_hackathon_roadmap_agent(int(request.user_id), int(request.hackathon_id))
+            user_id, hackathon_id = int(request.user_id), int(request.hackathon_id)
+            steps, degraded = await admission.run(
+                "roadmap", lambda: get_hackathon_roadmap_agent(user_id, hackathon_id), student_id=user_id,
+                inputs={"student_id": user_id, "hackathon_id": hackathon_id},
+            )
+            if degraded:
+                # Under overload: straight to the static roadmap below
+                response.headers["X-Degraded"] = degraded
             if steps:
                 # Generate a simple path string for the SVG
                 path = "M " + " L ".join([f"{s['x']} {s['y']}" for s in steps])
@@ -257,6 +463,38 @@ async def generate_roadmap(request: RoadmapRequest):
     ]
     return RoadmapResponse(steps=steps, svg_path="M 100 100 L 300 200 L 500 100")
 
+@app.get("/api/stats")
+async def get_runtime_stats():
+    """Counters for the local fast paths and caches in front of the LLM."""
+    from .agents.intent_classifier import intent_classifier
+    from .llm import llm_registry
+    from .rag.rag_engine import _rag_engine
+    # Never builds the engine just to report on it
+    rag_engine = _rag_engine.peek()
+    return {
+        "intent_classifier": intent_classifier.stats(),
+        "response_cache": response_cache.stats(),
+        "recommendation_index": recommendation_index.stats(),
+        "team_matcher": team_matcher.stats(),
+        "active_hackathons": active_hackathons.stats(),
+        "department_rollups": department_rollups.stats(),
+        "embedding_cache": rag_engine.embeddings.stats() if hasattr(rag_engine, "embeddings") and hasattr(rag_engine.embeddings, "stats") else None,
+        "vector_store": (rag_engine.vector_store.stats() if hasattr(rag_engine.vector_store, "stats") else {"backend": rag_engine.backend}) if rag_engine else None,
+        "llm": llm_registry.stats(),
+        "prompts": prompt_compiler.stats(),
+        "single_flight": single_flight.stats(),
+        "admission": admission.stats(),
+        "startup": {**startup_stats, "singletons": lazy_stats()},
+        "spans": metrics.summary(),
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """Span latency histograms and counters in the Prometheus text format."""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/api/dashboard", response_model=DashboardStats)
 async def get_dashboard():
     return DashboardStats(total_users=1240, active_hackathons=12, teams_formed=45)
+
+startup_stats["import_seconds"] = round(time.perf_counter() - _import_started, 4)
@@ -0,0 +1,306 @@
+"""
+In-process instrumentation: span() times a block into a latency histogram, counters count
+things (LLM tokens, errors), and render() writes both in the Prometheus text format for
+GET /metrics. A request sent with X-Trace: 1 (or sampled by METRICS_TRACE_SAMPLE) also gets
+its own spans back in a Server-Timing header. METRICS=off turns every span into a no-op.
+"""
+import bisect
+import contextvars
+import functools
+import inspect
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Seconds; LLM calls and sync stages need the long tail, DB queries the short end
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TRACE_HEADER = "x-trace"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, n_buckets: int):
+        self.counts = [0] * (n_buckets + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+class MetricsRegistry:
+    """Histograms and counters keyed by (name, labels); thread-safe, since sync runs on a worker thread."""
+
+    def __init__(self, enabled: bool = True, buckets: Tuple[float, ...] = BUCKETS, prefix: str = "hackassist_"):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.prefix = prefix
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, kind: str, help_text: str):
+        self._help[name] = (kind, help_text)
+
+    def observe(self, name: str, value: float, labels: Labels = ()):
+        key = (name, labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(len(self.buckets))
+            hist.counts[i] += 1
+            hist.sum += value
+            hist.count += 1
+
+    def inc(self, name: str, value: float = 1, labels: Labels = ()):
+        if not self.enabled:
+            return
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition format, version 0.0.4."""
+        with self._lock:
+            histograms = [(k, list(h.counts), h.sum, h.count) for k, h in self._histograms.items()]
+            counters = list(self._counters.items())
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name in seen:
+                return
+            seen.add(name)
+            help_text = self._help.get(name, (kind, ""))[1]
+            if help_text:
+                lines.append(f"# HELP {self.prefix}{name} {help_text}")
+            lines.append(f"# TYPE {self.prefix}{name} {kind}")
+
+        for (name, labels), value in sorted(counters):
+            header(name, "counter")
+            lines.append(f"{self.prefix}{name}{_labels(labels)} {_number(value)}")
+        for (name, labels), counts, total, count in sorted(histograms, key=lambda h: h[0]):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                lines.append(f"{self.prefix}{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+            lines.append(f"{self.prefix}{name}_sum{_labels(labels)} {_number(total)}")
+            lines.append(f"{self.prefix}{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        """Count, mean and approximate p50/p95 per span, for /api/stats."""
+        with self._lock:
+            histograms = [(k, list(h.counts), h.sum, h.count) for k, h in self._histograms.items() if k[0] == "span_seconds"]
+        result = {}
+        for (_, labels), counts, total, count in sorted(histograms, key=lambda h: h[0]):
+            name = ",".join(v if k == "span" else f"{k}={v}" for k, v in labels)
+            result[name] = {
+                "count": count,
+                "mean_ms": round(total / count * 1000, 3) if count else None,
+                "p50_ms": _quantile(self.buckets, counts, count, 0.5),
+                "p95_ms": _quantile(self.buckets, counts, count, 0.95),
+            }
+        return result
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), " ")}"' for k, v in labels)
+    return "{" + ",".join(escaped) + "}"
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _quantile(buckets, counts, count, q) -> Optional[float]:
+    """Upper bound of the bucket holding the q-th observation, in ms (None past the last bucket)."""
+    if not count:
+        return None
+    rank, cumulative = q * count, 0
+    for bound, n in zip(buckets, counts):
+        cumulative += n
+        if cumulative >= rank:
+            return bound * 1000
+    return None
+
+# Global registry
+metrics = MetricsRegistry(enabled=os.getenv("METRICS", "on") != "off")
+metrics.describe("span_seconds", "histogram", "Time spent in an instrumented stage (graph node, LLM call, DB query, sync stage).")
+metrics.describe("span_errors_total", "counter", "Instrumented stages that raised.")
+metrics.describe("llm_tokens_total", "counter", "LLM tokens by model and direction (input/output).")
+metrics.describe("embedding_texts_total", "counter", "Texts sent to the embeddings model (cache misses only).")
+metrics.describe("http_request_seconds", "histogram", "Request latency by route.")
+
+# Spans of the current request when it is traced; None otherwise
+_trace: contextvars.ContextVar[Optional[List[tuple]]] = contextvars.ContextVar("trace", default=None)
+
+class _Span:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name: str, labels: Labels):
+        self.name = name
+        self.labels = labels  # Includes ("span", name)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        metrics.observe("span_seconds", elapsed, self.labels)
+        if exc_type is not None:
+            metrics.inc("span_errors_total", labels=self.labels)
+        trace = _trace.get()
+        if trace is not None:
+            trace.append((self.name, elapsed))
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+def span(name: str, **labels):
+    """Context manager timing a block as span `name`; extra labels become Prometheus labels."""
+    if not metrics.enabled:
+        return _NO_SPAN
+    # Call sites pass labels in a fixed order, so the tuple is a stable key without sorting
+    return _Span(name, (("span", name), *labels.items()) if labels else (("span", name),))
+
+def traced(name: str, **labels):
+    """Decorator form of span() for plain and async functions."""
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, **labels):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def record_tokens(model: str, input_tokens: int, output_tokens: int):
+    metrics.inc("llm_tokens_total", input_tokens, (("model", model), ("type", "input")))
+    metrics.inc("llm_tokens_total", output_tokens, (("model", model), ("type", "output")))
+    trace = _trace.get()
+    if trace is not None:
+        trace.append(("llm.tokens", None, input_tokens + output_tokens))
+
+def instrument_engine(engine):
+    """Times every SQL statement run on a (sync) SQLAlchemy engine as span "db", labelled by verb."""
+    if not metrics.enabled:
+        return
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        _record_query(statement, time.perf_counter() - context._metrics_start)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        start = getattr(exception_context.execution_context, "_metrics_start", None)
+        if start is not None:
+            _record_query(exception_context.statement or "", time.perf_counter() - start, failed=True)
+
+_VERB_LABELS: Dict[str, Labels] = {}
+
+def _record_query(statement: str, elapsed: float, failed: bool = False):
+    # Only the head of the statement: bulk INSERTs can be megabytes long
+    head = statement[:16].split(None, 1)
+    verb = head[0].upper() if head else "OTHER"
+    labels = _VERB_LABELS.get(verb)
+    if labels is None:
+        labels = _VERB_LABELS.setdefault(verb, (("span", "db"), ("op", verb)))
+    metrics.observe("span_seconds", elapsed, labels)
+    if failed:
+        metrics.inc("span_errors_total", labels=labels)
+    trace = _trace.get()
+    if trace is not None:
+        trace.append(("db", elapsed))
+
+def server_timing(trace: List[tuple], total: float) -> str:
+    """Server-Timing header value: total time per span name, with call counts and token totals."""
+    per_name: Dict[str, list] = {}
+    for entry in trace:
+        if entry[1] is None:
+            # Token counts ride along with the llm span
+            per_name.setdefault("llm", [0.0, 0, 0])[2] += entry[2]
+            continue
+        slot = per_name.setdefault(entry[0], [0.0, 0, 0])
+        slot[0] += entry[1]
+        slot[1] += 1
+    parts = [f"total;dur={total * 1000:.1f}"]
+    for name, (seconds, calls, tokens) in per_name.items():
+        desc = f"{calls} calls" if calls != 1 else ""
+        if tokens:
+            desc = f"{desc}, {tokens} tokens".lstrip(", ")
+        parts.append(f"{name};dur={seconds * 1000:.1f}" + (f';desc="{desc}"' if desc else ""))
+    return ", ".join(parts)
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: request latency per route template, and the Server-Timing trace for
+    requests sent with X-Trace: 1 or picked at METRICS_TRACE_SAMPLE. Streamed responses send
+    headers before their spans finish, so their trace covers only the time to first byte.
+    """
+
+    def __init__(self, app, sample_rate: float = 0.0):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not metrics.enabled:
+            return await self.app(scope, receive, send)
+        traced = self.sample_rate > 0 and random.random() < self.sample_rate
+        if not traced:
+            for name, value in scope.get("headers", ()):
+                if name == TRACE_HEADER.encode() and value.strip() not in (b"", b"0"):
+                    traced = True
+                    break
+        trace = [] if traced else None
+        token = _trace.set(trace)
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if trace is not None:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(trace, time.perf_counter() - start).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _trace.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            metrics.observe("http_request_seconds", time.perf_counter() - start,
+                            (("method", scope["method"]), ("route", path), ("status", str(status["code"]))))
@@ -0,0 +1,123 @@
+"""
+Token-budgeted prompt assembly. Agents pass their template, the fixed fields (profile,
+context) and candidate lines already ranked best first; compile() clips each fixed field,
+then adds candidates until the agent's budget is spent, so a prompt's size no longer grows
+with the catalogue. Candidates are the compact summaries stored on hackathons (sync) and
+students (onboard). Every compiled prompt's token count is recorded in stats() and in the
+prompt_tokens_total / prompts_total metrics.
+"""
+import os
+import threading
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from .metrics import metrics
+
+CHARS_PER_TOKEN = 4  # Gemini averages about four characters per token on English text
+
+def count_tokens(text: str) -> int:
+    """Estimated token count; no tokenizer round-trip on the request path."""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+def clip(text: str, max_tokens: int) -> str:
+    """Cuts text to about max_tokens at a word boundary."""
+    text = " ".join((text or "").split())
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:limit].rsplit(" ", 1)[0]
+    return cut.rstrip(",.;:") + "…"
+
+def _join(values: Optional[Sequence[str]], n: int) -> str:
+    values = [v for v in values or [] if v]
+    return ", ".join(values[:n]) + (f" (+{len(values) - n})" if len(values) > n else "")
+
+def hackathon_summary(name: str, description: str, skills: Optional[Sequence[str]]) -> str:
+    """One compact line per hackathon, stored in hackathons.summary at sync time."""
+    return f"{name}: {clip(description, 40)} Skills: {_join(skills, 6) or 'General'}"
+
+def student_summary(student) -> str:
+    """One compact line per student, stored in students.summary at onboard time."""
+    return (
+        f"{student.name} ({student.experience_level or 'Unknown level'}, {student.department or 'no department'}) "
+        f"Skills: {_join(student.skills, 8) or 'none listed'}; Interests: {_join(student.interests, 4) or 'none listed'}"
+    )
+
+class PromptCompiler:
+    """Per-agent token budgets for prompt assembly, with a running count of what was built."""
+
+    def __init__(self, default_budget: int = 1200, budgets: Optional[Dict[str, int]] = None, field_share: float = 0.25):
+        self.default_budget = default_budget
+        self.budgets = dict(budgets or {})
+        self.field_share = field_share  # Most of the budget any one fixed field may take
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    def budget(self, agent: str) -> int:
+        return self.budgets.get(agent, self.default_budget)
+
+    def compile(self, agent: str, prompt, fields: dict, items_key: Optional[str] = None,
+                items: Iterable[str] = (), separator: str = "\n") -> Tuple[dict, int]:
+        """Template inputs within the agent's budget, and the prompt's token count."""
+        budget = self.budget(agent)
+        # 1. Fixed fields, each clipped to its share of the budget
+        inputs = {key: clip(str(value), int(budget * self.field_share)) for key, value in fields.items()}
+
+        # 2. Ranked candidates, best first, until the budget is spent (always at least one)
+        included = dropped = 0
+        if items_key:
+            lines = []
+            inputs[items_key] = ""
+            # Counted in characters: per-line token estimates would round down on every line
+            limit = (budget + 1) * CHARS_PER_TOKEN - 1
+            used = len(prompt.format(**inputs))
+            for line in items:
+                cost = len(line) + (len(separator) if lines else 0)
+                if lines and used + cost > limit:
+                    dropped += 1
+                    continue
+                lines.append(line)
+                used += cost
+            inputs[items_key] = separator.join(lines)
+            included = len(lines)
+
+        # 3. Measure what will actually be sent
+        tokens = count_tokens(prompt.format(**inputs))
+        self.record(agent, tokens, included, dropped)
+        return inputs, tokens
+
+    def record(self, agent: str, tokens: int, included: int = 0, dropped: int = 0):
+        labels = (("agent", agent),)
+        metrics.inc("prompt_tokens_total", tokens, labels)
+        metrics.inc("prompts_total", 1, labels)
+        with self._lock:
+            c = self.counters.setdefault(agent, {"prompts": 0, "tokens": 0, "max_tokens": 0, "included": 0, "dropped": 0})
+            c["prompts"] += 1
+            c["tokens"] += tokens
+            c["max_tokens"] = max(c["max_tokens"], tokens)
+            c["included"] += included
+            c["dropped"] += dropped
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                agent: {**c, "budget": self.budget(agent), "mean_tokens": round(c["tokens"] / c["prompts"], 1)}
+                for agent, c in self.counters.items()
+            }
+
+def compiler_from_env() -> PromptCompiler:
+    """PROMPT_TOKEN_BUDGET for every agent; PROMPT_BUDGET_<AGENT> (e.g. PROMPT_BUDGET_TEAM_SUGGESTIONS) per agent."""
+    budgets = {"recommendation_reasons": 600, "recommendations_text": 1200, "team_suggestions": 800}
+    for agent in budgets:
+        value = os.getenv(f"PROMPT_BUDGET_{agent.upper()}")
+        if value:
+            budgets[agent] = int(value)
+    return PromptCompiler(default_budget=int(os.getenv("PROMPT_TOKEN_BUDGET", "1200")), budgets=budgets)
+
+# Global compiler
+prompt_compiler = compiler_from_env()
+metrics.describe("prompt_tokens_total", "counter", "Estimated tokens of prompts built by the prompt compiler, by agent.")
+metrics.describe("prompts_total", "counter", "Prompts built by the prompt compiler, by agent.")
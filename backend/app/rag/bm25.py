@@ -0,0 +1,104 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+class BM25Index:
+    """Okapi BM25 inverted index over chunks, maintained incrementally at sync time."""
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self.docs: Dict[str, Tuple[str, dict, Dict[str, int], int]] = {}  # id -> (text, metadata, term counts, length)
+        self.postings: Dict[str, Dict[str, int]] = {}  # term -> {id: tf}
+        self.total_length = 0
+        if path and os.path.exists(path):
+            self._load()
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, doc_id: str, text: str, metadata: dict):
+        with self._lock:
+            self.remove([doc_id])
+            tokens = tokenize(text)
+            counts = dict(Counter(tokens))
+            self.docs[doc_id] = (text, metadata, counts, len(tokens))
+            self.total_length += len(tokens)
+            for term, tf in counts.items():
+                self.postings.setdefault(term, {})[doc_id] = tf
+
+    def remove(self, doc_ids: List[str]):
+        with self._lock:
+            for doc_id in doc_ids:
+                entry = self.docs.pop(doc_id, None)
+                if entry is None:
+                    continue
+                self.total_length -= entry[3]
+                for term in entry[2]:
+                    posting = self.postings.get(term)
+                    if posting is not None:
+                        posting.pop(doc_id, None)
+                        if not posting:
+                            del self.postings[term]
+
+    def clear(self):
+        with self._lock:
+            self.docs, self.postings, self.total_length = {}, {}, 0
+
+    def search(self, query: str, k: int = 10, filter: Optional[dict] = None) -> List[Tuple[Document, float]]:
+        """Top-k chunks by BM25; the metadata filter is checked while walking the ranking."""
+        from .vector_store import matches_filter
+        with self._lock:
+            n = len(self.docs)
+            if n == 0:
+                return []
+            avg_len = self.total_length / n
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, tf in posting.items():
+                    length = self.docs[doc_id][3]
+                    norm = tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / avg_len))
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * norm
+            results = []
+            for doc_id in sorted(scores, key=scores.get, reverse=True):
+                text, metadata = self.docs[doc_id][:2]
+                if filter and not matches_filter(metadata, filter):
+                    continue
+                results.append((Document(id=doc_id, page_content=text, metadata=metadata), scores[doc_id]))
+                if len(results) == k:
+                    break
+            return results
+
+    # Persistence
+    def persist(self):
+        if not self.path:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump({doc_id: [text, meta] for doc_id, (text, meta, _, _) in self.docs.items()}, f)
+            os.replace(tmp, self.path)
+
+    def _load(self):
+        with open(self.path, "r") as f:
+            rows = json.load(f)
+        for doc_id, (text, metadata) in rows.items():
+            self.add(doc_id, text, metadata)
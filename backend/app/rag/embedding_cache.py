@@ -0,0 +1,145 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from ..metrics import metrics, span
+
+class TimedEmbeddings(Embeddings):
+    """Times every call into the embeddings model as span "embed", and counts the texts sent."""
+
+    def __init__(self, underlying: Embeddings, model_name: str):
+        self.underlying = underlying
+        self.model_name = model_name
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        metrics.inc("embedding_texts_total", len(texts), (("kind", "document"), ("model", self.model_name)))
+        with span("embed", kind="document"):
+            return self.underlying.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        metrics.inc("embedding_texts_total", 1, (("kind", "query"), ("model", self.model_name)))
+        with span("embed", kind="query"):
+            return self.underlying.embed_query(text)
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embeddings model with a persistent SQLite cache keyed by model name,
+    embedding kind (document/query) and a hash of the text. Least recently used
+    rows are evicted once the cache grows past max_entries. Hits only read: their
+    last_used times are held in memory and written with the next store (or every
+    touch_batch hits), so the read path never opens a write transaction.
+    """
+
+    def __init__(self, underlying: Embeddings, path: str, model_name: Optional[str] = None, max_entries: int = 200_000,
+                 touch_batch: int = 1024):
+        self.underlying = underlying
+        self.model_name = model_name or getattr(underlying, "model", type(underlying).__name__)
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_batch = touch_batch
+        self._touched = {}  # key -> last_used not yet written
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        # Upper bound on the row count (replaced rows are counted again); recounted before evicting
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self.counters = {"document_hits": 0, "document_misses": 0, "query_hits": 0, "query_misses": 0, "evictions": 0}
+
+    def _key(self, kind: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        return f"{self.model_name}:{kind}:{digest}"
+
+    def _lookup(self, keys: List[str]) -> dict:
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                found.update({k: np.frombuffer(v, dtype=np.float32).tolist() for k, v in rows})
+            if found:
+                now = time.time()
+                self._touched.update(dict.fromkeys(found, now))
+                if len(self._touched) >= self.touch_batch:
+                    self._flush_touched()
+                    self._conn.commit()
+        return found
+
+    def _flush_touched(self):
+        """Writes the pending last_used times; the caller holds the lock and commits."""
+        if self._touched:
+            self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [(t, k) for k, t in self._touched.items()])
+            self._touched.clear()
+
+    def _store(self, items: dict):
+        now = time.time()
+        with self._lock:
+            # Before evicting, so recent hits are not taken for the least recently used
+            self._flush_touched()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(k, np.asarray(v, dtype=np.float32).tobytes(), now) for k, v in items.items()],
+            )
+            self._size += len(items)
+            if self._size > self.max_entries:
+                self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if self._size > self.max_entries:
+                excess = self._size - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (excess,)
+                )
+                self._size = self.max_entries
+                self.counters["evictions"] += excess
+            self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key("document", t) for t in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+        missing = list(dict.fromkeys(t for t, k in zip(texts, keys) if k not in found))
+        with self._lock:
+            self.counters["document_hits"] += len(texts) - sum(1 for k in keys if k not in found)
+            self.counters["document_misses"] += len(missing)
+        if missing:
+            vectors = self.underlying.embed_documents(missing)
+            fresh = {self._key("document", t): v for t, v in zip(missing, vectors)}
+            self._store(fresh)
+            found.update(fresh)
+        return [found[k] for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key("query", text)
+        found = self._lookup([key])
+        with self._lock:
+            self.counters["query_hits" if key in found else "query_misses"] += 1
+        if key in found:
+            return found[key]
+        vector = self.underlying.embed_query(text)
+        self._store({key: vector})
+        return vector
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["size"] = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        lookups = sum(stats[k] for k in ("document_hits", "document_misses", "query_hits", "query_misses"))
+        stats["hit_ratio"] = round((stats["document_hits"] + stats["query_hits"]) / lookups, 4) if lookups else 0.0
+        stats["model"] = self.model_name
+        return stats
+
+def cached_embeddings_from_env(underlying: Embeddings, model_name: str) -> Embeddings:
+    """Wraps the model unless EMBED_CACHE=0."""
+    if os.getenv("EMBED_CACHE", "1") == "0":
+        return underlying
+    path = os.getenv("EMBED_CACHE_PATH", os.path.join(os.path.dirname(__file__), "..", "..", "embedding_cache.sqlite"))
+    return CachedEmbeddings(underlying, path, model_name=model_name, max_entries=int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "200000")))
@@ -0,0 +1,140 @@
+import hashlib
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available."""
+
+    def __init__(self, rate_per_second: float, capacity: Optional[float] = None):
+        self.rate = rate_per_second
+        self.capacity = capacity or max(rate_per_second, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n: float = 1.0):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                wait = (n - self.tokens) / self.rate
+            time.sleep(wait)
+
+def chunk_key(chunk_id: str, text: str) -> str:
+    return f"{chunk_id}:{hashlib.sha1(text.encode()).hexdigest()}"
+
+class EmbeddingPipeline:
+    """
+    Embeds chunks in fixed-size batches with bounded concurrency, a request-rate limit and
+    retry with exponential backoff, then writes vectors via vector_store.add_embeddings.
+    Finished chunks are appended to a checkpoint file so an interrupted run resumes where it stopped.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        vector_store,
+        batch_size: int = 64,
+        max_in_flight: int = 4,
+        requests_per_minute: float = 120,
+        max_retries: int = 5,
+        backoff_seconds: float = 1.0,
+        checkpoint_path: Optional[str] = None,
+    ):
+        self.embeddings = embeddings
+        self.vector_store = vector_store
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self.bucket = TokenBucket(requests_per_minute / 60.0, capacity=max_in_flight)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.checkpoint_path = checkpoint_path
+        self._checkpoint_lock = threading.Lock()
+        self.last_run: dict = {}
+
+    # Checkpointing
+    def _load_checkpoint(self) -> set:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return set()
+        with open(self.checkpoint_path, "r") as f:
+            return {line.strip() for line in f if line.strip()}
+
+    def _record(self, keys: List[str]):
+        if not self.checkpoint_path:
+            return
+        with self._checkpoint_lock, open(self.checkpoint_path, "a") as f:
+            f.write("".join(f"{k}\n" for k in keys))
+
+    def _clear_checkpoint(self):
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    # Batches
+    def _embed_with_retry(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                return self.embeddings.embed_documents(texts)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_seconds * (2 ** attempt) * (1 + random.random() * 0.25)
+                print(f"⚠️ Embedding batch failed ({e}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                with self._checkpoint_lock:
+                    self.last_run["retries"] = self.last_run.get("retries", 0) + 1
+                time.sleep(delay)
+
+    def _process(self, batch: List[Document], ids: List[str]) -> int:
+        texts = [d.page_content for d in batch]
+        vectors = self._embed_with_retry(texts)
+        self.vector_store.add_embeddings(texts=texts, embeddings=vectors, metadatas=[d.metadata for d in batch], ids=ids)
+        self._record([chunk_key(i, t) for i, t in zip(ids, texts)])
+        return len(batch)
+
+    def run(self, documents: Sequence[Document], ids: Sequence[str], on_progress: Optional[Callable[[int, int], None]] = None) -> dict:
+        """Embeds and stores documents under ids; returns throughput stats."""
+        done_keys = self._load_checkpoint()
+        pending = [(d, i) for d, i in zip(documents, ids) if chunk_key(i, d.page_content) not in done_keys]
+        resumed = len(documents) - len(pending)
+        batches = [pending[s:s + self.batch_size] for s in range(0, len(pending), self.batch_size)]
+
+        self.last_run = {"chunks": len(pending), "resumed": resumed, "batches": len(batches), "retries": 0}
+        start, done = time.perf_counter(), 0
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="embed") as pool:
+            futures = [pool.submit(self._process, [d for d, _ in b], [i for _, i in b]) for b in batches]
+            try:
+                for future in as_completed(futures):
+                    done += future.result()
+                    if on_progress:
+                        on_progress(done, len(pending))
+            except BaseException:
+                # Leave the checkpoint in place; queued batches are dropped, finished ones are kept
+                for future in futures:
+                    future.cancel()
+                raise
+
+        elapsed = time.perf_counter() - start
+        self._clear_checkpoint()
+        self.last_run.update({"seconds": round(elapsed, 3), "chunks_per_sec": round(done / elapsed, 1) if elapsed else 0.0})
+        return dict(self.last_run)
+
+def pipeline_from_env(embeddings, vector_store, checkpoint_path: Optional[str] = None) -> EmbeddingPipeline:
+    return EmbeddingPipeline(
+        embeddings,
+        vector_store,
+        batch_size=int(os.getenv("EMBED_BATCH_SIZE", "64")),
+        max_in_flight=int(os.getenv("EMBED_MAX_IN_FLIGHT", "4")),
+        requests_per_minute=float(os.getenv("EMBED_REQUESTS_PER_MINUTE", "120")),
+        max_retries=int(os.getenv("EMBED_MAX_RETRIES", "5")),
+        checkpoint_path=checkpoint_path,
+    )
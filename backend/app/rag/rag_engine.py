@@ -1,33 +1,100 @@
+import hashlib
+import json
 import os
-from typing import List
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_postgres import PGVector
+import re
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
+from sqlalchemy import or_
+from .embedding_pipeline import pipeline_from_env
+from .embedding_cache import TimedEmbeddings, cached_embeddings_from_env
+from .vector_store import LocalVectorStore, build_vector_store
+from .bm25 import BM25Index
+from ..ingest import batched
+from ..lazy import Lazy
+from ..metrics import span
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Directory for the local vector backends
+VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH", os.path.join(os.path.dirname(__file__), "..", "..", "vector_index"))
+
+# Finished chunk keys of an interrupted embedding run, so the next run resumes
+EMBED_CHECKPOINT_PATH = os.getenv(
+    "EMBED_CHECKPOINT_PATH", os.path.join(os.path.dirname(__file__), "..", "..", "embed_checkpoint.txt")
+)
+
+# Documents hashed, embedded and written to the manifest per step of index_documents
+INDEX_BATCH_SIZE = int(os.getenv("INDEX_BATCH_SIZE", "256"))
+
+# Reciprocal-rank fusion constant; 60 is the usual choice from the RRF paper
+RRF_K = 60
+
+def skill_flag(skill: str) -> str:
+    """Metadata key marking a chunk as requiring skill (PGVector filters can't test list membership)."""
+    return "skill_" + re.sub(r"[^a-z0-9]+", "_", skill.lower()).strip("_")
+
+def build_filter(active_only: bool = True, skills: Optional[List[str]] = None, source: Optional[str] = None, now: Optional[float] = None) -> Optional[dict]:
+    """Metadata filter understood by both PGVector and the local backends."""
+    clauses = []
+    if active_only:
+        clauses.append({"deadline_ts": {"$gte": int(now if now is not None else time.time())}})
+    if skills:
+        clauses.append({"$or": [{skill_flag(s): {"$exists": True}} for s in skills]})
+    if source:
+        clauses.append({"source": {"$eq": source}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def reciprocal_rank_fusion(*rankings: List[Document], k: int = RRF_K) -> List[Document]:
+    scores, docs = {}, {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            key = doc.id or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+def embedding_model():
+    """(model, name) for LLM_PROVIDER: Gemini, or the offline fake."""
+    from ..llm import LLM_PROVIDER
+    if LLM_PROVIDER == "fake":
+        from ..fake_models import fake_embeddings
+        return fake_embeddings(), "fake-embedding"
+    # Imported here: the Google SDK alone adds ~0.4s to worker import time
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    name = "models/gemini-embedding-001"
+    return GoogleGenerativeAIEmbeddings(model=name, google_api_key=os.getenv("GEMINI_API_KEY")), name
+
 class RAGEngine:
     def __init__(self):
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/gemini-embedding-001",
-            google_api_key=os.getenv("GEMINI_API_KEY")
-        )
+        # Repeated chunk and query texts are served from the local embedding cache
+        model, model_name = embedding_model()
+        self.embeddings = cached_embeddings_from_env(TimedEmbeddings(model, model_name), model_name=model_name)
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200
         )
-        # Cloud-native PGVector on Neon
+        # Cloud-native PGVector on Neon, or an in-process index (flat / ivf) via VECTOR_BACKEND
         self.connection_string = os.getenv("DATABASE_URL")
         self.collection_name = "hackathon_embeddings"
+        default_backend = "pgvector" if (self.connection_string or "").startswith("postgres") else "flat"
+        self.backend = os.getenv("VECTOR_BACKEND", default_backend)
         
-        self.vector_store = PGVector(
-            embeddings=self.embeddings,
-            collection_name=self.collection_name,
+        self.vector_store = build_vector_store(
+            self.backend,
+            self.embeddings,
             connection=self.connection_string,
-            use_jsonb=True,
+            collection_name=self.collection_name,
+            path=VECTOR_STORE_PATH,
         )
+        self.pipeline = pipeline_from_env(self.embeddings, self.vector_store, checkpoint_path=EMBED_CHECKPOINT_PATH)
+        # Lexical side of hybrid retrieval: exact names, acronyms and dates that embeddings blur
+        self.bm25 = BM25Index(path=os.path.join(VECTOR_STORE_PATH, f"bm25_{self.collection_name}.json"))
 
     def add_documents(self, documents: List[str]):
         """Bulk adds raw text documents to the vector store."""
@@ -35,13 +102,174 @@ class RAGEngine:
         for doc_text in documents:
             chunks = self.text_splitter.split_text(doc_text)
             all_docs.extend([Document(page_content=chunk) for chunk in chunks])
-        self.vector_store.add_documents(all_docs)
+        self.pipeline.run(all_docs, [str(uuid.uuid4()) for _ in all_docs])
         if hasattr(self.vector_store, 'persist'):
             self.vector_store.persist()
 
-    def query(self, query: str, k: int = 3) -> List[Document]:
-        """Performs a similarity search in the vector store."""
-        return self.vector_store.similarity_search(query, k=k)
+    def index_documents(
+        self,
+        documents: Iterable[Tuple[str, str, dict]],
+        prune: bool = True,
+        on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+        batch_size: int = INDEX_BATCH_SIZE,
+    ) -> Dict[str, int]:
+        """
+        Incrementally syncs (doc_id, text, metadata) documents into the vector store.
+        Unchanged documents (same content hash) are skipped, changed ones are re-embedded
+        under stable chunk ids, and with prune=True documents absent from the input are deleted.
+        Documents are consumed batch by batch, so the input can be a generator over any size of feed.
+        """
+        from ..database import SessionLocal, RagDocument
+
+        counts = {"embedded": 0, "skipped": 0, "deleted": 0}
+        run_id = uuid.uuid4().hex
+        embed_seconds = 0.0
+        db = SessionLocal()
+        try:
+            has_manifest = db.query(RagDocument.doc_id).first() is not None
+            local_empty = isinstance(self.vector_store, LocalVectorStore) and not self.vector_store.alive.any()
+            if has_manifest and local_empty:
+                # Manifest describes a different backend (or a wiped index dir): start over.
+                # A lost BM25 file alone is rebuilt from the text below; the vectors stay
+                db.query(RagDocument).delete()
+                has_manifest = False
+            if not has_manifest:
+                # First incremental run: drop legacy chunks that were stored without ids
+                self.vector_store.delete_collection()
+                self.vector_store.create_collection()
+                self.bm25.clear()
+
+            for batch in batched(documents, batch_size):
+                # Last duplicate wins, as it would overwrite the earlier one anyway
+                batch = {doc_id: (doc_id, text, metadata) for doc_id, text, metadata in batch}
+                manifest = {row.doc_id: row for row in db.query(RagDocument).filter(RagDocument.doc_id.in_(list(batch)))}
+
+                new_docs, stale_ids = [], []
+                for doc_id, text, metadata in batch.values():
+                    # Metadata is part of the hash so filter fields stay in sync with the text
+                    content_hash = hashlib.sha256((text + json.dumps(metadata, sort_keys=True, default=str)).encode()).hexdigest()
+                    row = manifest.get(doc_id)
+                    if row:
+                        row.sync_run = run_id
+                    if row and row.content_hash == content_hash and self._in_vector_store(row):
+                        if not self._in_bm25(row):
+                            # Lexical side only (fresh worker, lost file): same chunks, no re-embedding
+                            chunks = self.text_splitter.split_text(text)
+                            for i, chunk in enumerate(chunks):
+                                self.bm25.add(f"{doc_id}#{i}", chunk, {**metadata, "doc_id": doc_id, "content_hash": content_hash})
+                        counts["skipped"] += len(row.chunk_ids or [])
+                        continue
+
+                    chunks = self.text_splitter.split_text(text)
+                    chunk_ids = [f"{doc_id}#{i}" for i in range(len(chunks))]
+                    new_docs.extend(
+                        Document(id=cid, page_content=chunk, metadata={**metadata, "doc_id": doc_id, "content_hash": content_hash})
+                        for cid, chunk in zip(chunk_ids, chunks)
+                    )
+                    if row:
+                        stale_ids.extend(set(row.chunk_ids or []) - set(chunk_ids))
+                        row.content_hash, row.chunk_ids = content_hash, chunk_ids
+                    else:
+                        db.add(RagDocument(doc_id=doc_id, content_hash=content_hash, chunk_ids=chunk_ids, sync_run=run_id))
+
+                if new_docs:
+                    # Chunk ids are stable, so changed documents overwrite their old vectors
+                    embedded = counts["embedded"]
+                    with span("sync.embed"):
+                        run = self.pipeline.run(
+                            new_docs, [d.id for d in new_docs],
+                            on_progress=on_progress and (lambda done, _total: on_progress(embedded + done, None)),
+                        )
+                    counts["embedded"] += len(new_docs)
+                    embed_seconds += run["seconds"]
+                self._drop_chunks(stale_ids, counts)
+                # The lexical index follows the vector store only after embedding succeeded
+                for doc in new_docs:
+                    self.bm25.add(doc.id, doc.page_content, doc.metadata)
+                # Short write transactions: on SQLite the SQL stage upserting the next batch needs the lock
+                db.commit()
+                db.expunge_all()
+
+            if prune:
+                stale = db.query(RagDocument.doc_id, RagDocument.chunk_ids).filter(
+                    or_(RagDocument.sync_run != run_id, RagDocument.sync_run.is_(None))
+                ).all()
+                for rows in batched(stale, batch_size):
+                    self._drop_chunks([cid for _, chunk_ids in rows for cid in chunk_ids or []], counts)
+                    db.query(RagDocument).filter(RagDocument.doc_id.in_([doc_id for doc_id, _ in rows])).delete()
+
+            if counts["embedded"]:
+                counts["chunks_per_sec"] = round(counts["embedded"] / embed_seconds, 1) if embed_seconds else 0.0
+            if hasattr(self.vector_store, 'persist'):
+                self.vector_store.persist()
+            self.bm25.persist()
+            db.commit()
+        finally:
+            db.close()
+        return counts
+
+    def _in_vector_store(self, row) -> bool:
+        """
+        Whether the vector store holds the manifest row's chunks at its content hash. Local
+        stores are written to disk at the end of a run, so an interrupted run leaves the
+        manifest ahead; PGVector commits with the manifest and is trusted.
+        """
+        if not isinstance(self.vector_store, LocalVectorStore):
+            return True
+        store = self.vector_store
+        for cid in row.chunk_ids or []:
+            pos = store.positions.get(cid)
+            if pos is None or not store.alive[pos] or store.metadatas[pos].get("content_hash") != row.content_hash:
+                return False
+        return True
+
+    def _in_bm25(self, row) -> bool:
+        """Whether the BM25 index (a local file on every backend) holds the row's chunks at its content hash."""
+        for cid in row.chunk_ids or []:
+            entry = self.bm25.docs.get(cid)
+            if entry is None or entry[1].get("content_hash") != row.content_hash:
+                return False
+        return True
+
+    def _drop_chunks(self, chunk_ids: List[str], counts: Dict[str, int]):
+        if chunk_ids:
+            self.vector_store.delete(ids=chunk_ids)
+            self.bm25.remove(chunk_ids)
+            counts["deleted"] += len(chunk_ids)
+
+    def query(
+        self,
+        query: str,
+        k: int = 3,
+        active_only: bool = True,
+        skills: Optional[List[str]] = None,
+        source: Optional[str] = None,
+        mode: str = "hybrid",
+    ) -> List[Document]:
+        """
+        Hybrid search: vector and BM25 candidates (k * 4 each) fused by reciprocal rank.
+        Filters (open deadlines, any of skills, source) are applied inside both searches.
+        mode = "vector" | "bm25" | "hybrid".
+        """
+        filter = build_filter(active_only, skills, source)
+        fetch_k = k * 4
+        rankings = []
+        if mode in ("hybrid", "vector"):
+            with span("rag.vector", backend=self.backend):
+                rankings.append(self.vector_store.similarity_search(query, k=fetch_k, filter=filter))
+        if mode in ("hybrid", "bm25"):
+            with span("rag.bm25"):
+                rankings.append([doc for doc, _ in self.bm25.search(query, k=fetch_k, filter=filter)])
+        return reciprocal_rank_fusion(*rankings)[:k]
+
+# Global engine instance, built on first use (or by the startup warm-up)
+_rag_engine = Lazy("rag_engine", RAGEngine)
+
+def get_rag_engine() -> RAGEngine:
+    return _rag_engine.get()
 
-# Global engine instance
-rag_engine = RAGEngine()
+def __getattr__(name):
+    # Keeps `from .rag.rag_engine import rag_engine` working, at the cost of eager construction
+    if name == "rag_engine":
+        return _rag_engine.get()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,380 @@
+import json
+import os
+import threading
+import uuid
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    m = np.asarray(m, dtype=np.float32)
+    norms = np.linalg.norm(m, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+# PGVector-style operators, so one filter dict works against every backend
+_OPERATORS = {
+    "$eq": lambda v, x: v == x,
+    "$ne": lambda v, x: v != x,
+    "$lt": lambda v, x: v is not None and v < x,
+    "$lte": lambda v, x: v is not None and v <= x,
+    "$gt": lambda v, x: v is not None and v > x,
+    "$gte": lambda v, x: v is not None and v >= x,
+    "$in": lambda v, x: v in x,
+    "$nin": lambda v, x: v not in x,
+}
+
+def matches_filter(metadata: dict, filter: dict) -> bool:
+    """Evaluates a PGVector metadata filter ($and/$or/$not, $eq/$in/$gte/$exists/...) in Python."""
+    for key, cond in filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, c) for c in cond):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, c) for c in cond):
+                return False
+        elif key == "$not":
+            if matches_filter(metadata, cond):
+                return False
+        elif isinstance(cond, dict):
+            value = metadata.get(key)
+            for op, arg in cond.items():
+                if op == "$exists":
+                    if (key in metadata) != bool(arg):
+                        return False
+                elif not _OPERATORS[op](value, arg):
+                    return False
+        elif metadata.get(key) != cond:
+            return False
+    return True
+
+# 1. Index structures over a row-aligned, L2-normalized vector matrix
+class FlatIndex:
+    """Exact cosine search: one matrix-vector product over every live row."""
+
+    def fit(self, vectors: np.ndarray, alive: np.ndarray):
+        pass
+
+    def add(self, vectors: np.ndarray, start: int):
+        pass
+
+    def candidates(self, query: np.ndarray, n_rows: int) -> Optional[np.ndarray]:
+        return None  # None means "scan everything"
+
+    def compact(self, keep: np.ndarray):
+        pass
+
+    def reset(self):
+        pass
+
+    def load_state(self, directory: str):
+        pass
+
+    def save_state(self, directory: str):
+        pass
+
+class IVFIndex(FlatIndex):
+    """
+    Inverted-file approximate index: k-means centroids partition the vectors and a
+    query only scans the rows of its nprobe nearest partitions.
+    """
+
+    def __init__(self, nlist: Optional[int] = None, nprobe: Optional[int] = None, min_train_size: int = 2048, iterations: int = 10):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.iterations = iterations
+        self.centroids: Optional[np.ndarray] = None
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.trained_size = 0
+        self._order = self._bounds = None
+
+    def fit(self, vectors: np.ndarray, alive: np.ndarray):
+        live = np.flatnonzero(alive)
+        if len(live) < self.min_train_size:
+            self.centroids = None
+            return
+        nlist = self.nlist or int(4 * np.sqrt(len(live)))
+        rng = np.random.default_rng(0)
+        sample = vectors[rng.choice(live, size=min(len(live), nlist * 40), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[labels == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+        self.centroids = centroids
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.add(vectors, 0)
+        self.trained_size = len(live)
+
+    def add(self, vectors: np.ndarray, start: int):
+        if self.centroids is None:
+            return
+        new = vectors[start:]
+        labels = np.concatenate([
+            np.argmax(new[s:s + 65536] @ self.centroids.T, axis=1) for s in range(0, len(new), 65536)
+        ]) if len(new) else np.zeros(0, dtype=np.int32)
+        self.assign = np.concatenate([self.assign[:start], labels.astype(np.int32)])
+        self._order = None
+
+    def compact(self, keep: np.ndarray):
+        if self.centroids is not None:
+            self.assign = self.assign[keep]
+            self._order = None
+
+    def reset(self):
+        self.centroids = None
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.trained_size = 0
+        self._order = None
+
+    def candidates(self, query: np.ndarray, n_rows: int) -> Optional[np.ndarray]:
+        if self.centroids is None or len(self.assign) < n_rows:
+            return None
+        if self._order is None:
+            self._order = np.argsort(self.assign, kind="stable")
+            self._bounds = np.searchsorted(self.assign[self._order], np.arange(len(self.centroids) + 1))
+        # Default probes ~5% of the partitions
+        nprobe = min(self.nprobe or max(8, len(self.centroids) // 20), len(self.centroids))
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self._order[self._bounds[c]:self._bounds[c + 1]] for c in probe])
+
+    def needs_retrain(self, live_count: int) -> bool:
+        untrained = self.centroids is None and live_count >= self.min_train_size
+        return untrained or bool(self.trained_size and live_count >= 4 * self.trained_size)
+
+    def save_state(self, directory: str):
+        for name, value in (("centroids.npy", self.centroids), ("assign.npy", self.assign)):
+            path = os.path.join(directory, name)
+            if self.centroids is not None:
+                tmp = os.path.join(directory, name.replace(".npy", ".tmp.npy"))
+                np.save(tmp, value)
+                os.replace(tmp, path)
+            elif os.path.exists(path):
+                os.remove(path)
+
+    def load_state(self, directory: str):
+        path = os.path.join(directory, "centroids.npy")
+        if os.path.exists(path):
+            self.centroids = np.load(path)
+            self.assign = np.load(os.path.join(directory, "assign.npy"))
+            self.trained_size = len(self.assign)
+
+# 2. LangChain-compatible store
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store persisted to a directory: vectors.npy (memory-mapped on load)
+    plus rows.json with ids, texts and metadata. Deletes are tombstones until persist() compacts.
+    Vectors live in a buffer whose capacity doubles, so appending n rows costs O(n) in total.
+    """
+
+    def __init__(self, embeddings: Embeddings, path: Optional[str] = None, index: Optional[FlatIndex] = None):
+        self.embedding = embeddings
+        self.path = path
+        self.index = index or FlatIndex()
+        self._lock = threading.RLock()
+        self._reset()
+        if path and os.path.exists(os.path.join(path, "rows.json")):
+            self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def _reset(self):
+        # vectors / alive are views of the first len(ids) rows of their buffers
+        self.vectors = self._buffer = np.zeros((0, 0), dtype=np.float32)
+        self.alive = self._alive_buffer = np.zeros(0, dtype=bool)
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[dict] = []
+        self.positions = {}
+
+    # Persistence
+    def _load(self):
+        with open(os.path.join(self.path, "rows.json"), "r") as f:
+            rows = json.load(f)
+        vectors = np.load(os.path.join(self.path, "vectors.npy"), mmap_mode="r")
+        if len(vectors) != len(rows["ids"]):
+            # Interrupted between the two file swaps: load empty, the next sync re-indexes
+            print(f"⚠️ Vector store at {self.path} is inconsistent ({len(vectors)} vectors, {len(rows['ids'])} rows); starting empty")
+            return
+        self.ids, self.texts, self.metadatas = rows["ids"], rows["texts"], rows["metadatas"]
+        self.positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        # Read-only until the first add copies it into a growable buffer
+        self.vectors = self._buffer = vectors
+        self.alive = self._alive_buffer = np.ones(len(self.ids), dtype=bool)
+        self.index.load_state(self.path)
+
+    def persist(self):
+        """Compacts tombstones and writes the store to its directory."""
+        if not self.path:
+            return
+        with self._lock:
+            self._compact()
+            os.makedirs(self.path, exist_ok=True)
+            tmp = os.path.join(self.path, "vectors.tmp.npy")
+            np.save(tmp, np.ascontiguousarray(self.vectors))
+            os.replace(tmp, os.path.join(self.path, "vectors.npy"))
+            # Written aside and swapped in, so a crash never leaves a half-written rows.json
+            tmp = os.path.join(self.path, "rows.tmp.json")
+            with open(tmp, "w") as f:
+                json.dump({"ids": self.ids, "texts": self.texts, "metadatas": self.metadatas}, f)
+            os.replace(tmp, os.path.join(self.path, "rows.json"))
+            self.index.save_state(self.path)
+
+    def _compact(self):
+        if self.alive.all():
+            return
+        keep = np.flatnonzero(self.alive)
+        self.vectors = np.asarray(self.vectors)[keep]
+        self.ids = [self.ids[i] for i in keep]
+        self.texts = [self.texts[i] for i in keep]
+        self.metadatas = [self.metadatas[i] for i in keep]
+        self.positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self.alive = np.ones(len(keep), dtype=bool)
+        self._buffer, self._alive_buffer = self.vectors, self.alive
+        self.index.compact(keep)
+
+    def _grow(self, extra: int, dim: int):
+        """Room for `extra` more rows; capacity at least doubles, so copies are amortized O(1) per row."""
+        n = len(self.ids)
+        buffer = self._buffer
+        if len(buffer) >= n + extra and buffer.shape[1] == dim and buffer.flags.writeable:
+            return
+        capacity = max(2 * len(buffer), n + extra, 64)
+        self._buffer = np.zeros((capacity, dim), dtype=np.float32)
+        self._alive_buffer = np.zeros(capacity, dtype=bool)
+        if n:
+            self._buffer[:n] = self.vectors[:n]
+            self._alive_buffer[:n] = self.alive[:n]
+
+    # Writes
+    def add_embeddings(self, texts: Sequence[str], embeddings: Sequence[Sequence[float]], metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None, **kwargs) -> List[str]:
+        ids = list(ids or [str(uuid.uuid4()) for _ in texts])
+        metadatas = list(metadatas or [{} for _ in texts])
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        with self._lock:
+            # Same id means upsert: tombstone the old row
+            self._tombstone(ids)
+            start = len(self.ids)
+            self._grow(len(ids), vectors.shape[1])
+            end = start + len(ids)
+            self._buffer[start:end] = vectors
+            self._alive_buffer[start:end] = True
+            self.vectors, self.alive = self._buffer[:end], self._alive_buffer[:end]
+            for offset, (doc_id, text, meta) in enumerate(zip(ids, texts, metadatas)):
+                self.positions[doc_id] = start + offset
+                self.ids.append(doc_id)
+                self.texts.append(text)
+                self.metadatas.append(meta)
+            if isinstance(self.index, IVFIndex) and self.index.needs_retrain(int(self.alive.sum())):
+                self.index.fit(self.vectors, self.alive)
+            else:
+                self.index.add(self.vectors, start)
+        return ids
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None, **kwargs) -> List[str]:
+        texts = list(texts)
+        return self.add_embeddings(texts, self.embedding.embed_documents(texts), metadatas=metadatas, ids=ids)
+
+    def _tombstone(self, ids: Iterable[str]):
+        for doc_id in ids:
+            pos = self.positions.pop(doc_id, None)
+            if pos is not None:
+                self.alive[pos] = False
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs) -> Optional[bool]:
+        with self._lock:
+            self._tombstone(ids or [])
+        return True
+
+    def delete_collection(self):
+        with self._lock:
+            self._reset()
+            self.index.reset()
+
+    def create_collection(self):
+        pass
+
+    def get_by_ids(self, ids: Sequence[str]) -> List[Document]:
+        with self._lock:
+            return [self._document(self.positions[i]) for i in ids if i in self.positions]
+
+    # Reads
+    def _document(self, pos: int) -> Document:
+        return Document(id=self.ids[pos], page_content=self.texts[pos], metadata=self.metadatas[pos])
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, **kwargs) -> List[Tuple[Document, float]]:
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        with self._lock:
+            n = len(self.ids)
+            if n == 0:
+                return []
+            rows = self.index.candidates(query, n)
+            if rows is None:
+                scores = np.asarray(self.vectors) @ query
+                scores[~self.alive] = -np.inf
+                rows = np.arange(n)
+            else:
+                rows = rows[self.alive[rows]]
+                scores = np.asarray(self.vectors[rows]) @ query
+            if filter:
+                # Walk the full ranking until k rows pass, so filtered searches still return k hits
+                hits = []
+                for i in np.argsort(-scores):
+                    if not np.isfinite(scores[i]):
+                        break
+                    if matches_filter(self.metadatas[rows[i]], filter):
+                        hits.append((self._document(int(rows[i])), float(scores[i])))
+                        if len(hits) == k:
+                            break
+                return hits
+            k = min(k, len(rows))
+            if k == 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._document(int(rows[i])), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, **kwargs):
+        store = cls(embedding, path=kwargs.pop("path", None), index=kwargs.pop("index", None))
+        store.add_texts(texts, metadatas=metadatas, ids=kwargs.pop("ids", None))
+        return store
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": type(self.index).__name__,
+                "rows": int(self.alive.sum()),
+                "tombstones": int((~self.alive).sum()),
+                "path": self.path,
+            }
+
+def build_vector_store(backend: str, embeddings: Embeddings, connection: Optional[str], collection_name: str, path: str):
+    """Vector store factory for VECTOR_BACKEND = pgvector | flat | ivf."""
+    if backend == "pgvector":
+        from langchain_postgres import PGVector
+        return PGVector(embeddings=embeddings, collection_name=collection_name, connection=connection, use_jsonb=True)
+    if backend == "flat":
+        return LocalVectorStore(embeddings, path=os.path.join(path, collection_name), index=FlatIndex())
+    if backend == "ivf":
+        nprobe = int(os.getenv("VECTOR_IVF_NPROBE", "0")) or None
+        return LocalVectorStore(embeddings, path=os.path.join(path, collection_name), index=IVFIndex(nprobe=nprobe))
+    raise ValueError(f"Unknown VECTOR_BACKEND: {backend}")
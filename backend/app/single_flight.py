@@ -0,0 +1,137 @@
+"""
+Single-flight coalescing: concurrent calls with the same namespace and normalized inputs
+share one in-flight task and its result (or exception), so a burst of identical dashboard
+loads makes one upstream LLM call instead of dozens. Nothing is kept once the call
+finishes; caching finished results is the response cache's job.
+"""
+import asyncio
+import functools
+import inspect
+import os
+import threading
+import weakref
+from typing import Awaitable, Callable, Dict, Optional
+
+from .agents.response_cache import hash_inputs
+from .metrics import metrics
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    In-flight calls keyed on hash_inputs(namespace, inputs), one table per event loop.
+    The call itself runs under the key's timeout, so every waiter sees the same result,
+    error or TimeoutError; a waiter that is cancelled leaves the call running for the
+    others, and the call is cancelled only once nobody is waiting on it.
+    """
+
+    def __init__(self, enabled: bool = True, timeout: Optional[float] = 60.0, timeouts: Optional[Dict[str, float]] = None):
+        self.enabled = enabled
+        self.timeout = timeout
+        self.timeouts = dict(timeouts or {})  # Per namespace
+        self._flights = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    def _table(self) -> dict:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            return self._flights.setdefault(loop, {})
+
+    def _count(self, namespace: str, field: str):
+        with self._lock:
+            c = self.counters.setdefault(namespace, {"calls": 0, "upstream": 0, "coalesced": 0, "errors": 0, "timeouts": 0})
+            c[field] += 1
+
+    async def _run(self, namespace: str, fn: Callable[[], Awaitable], timeout: Optional[float]):
+        try:
+            if timeout is None:
+                return await fn()
+            return await asyncio.wait_for(fn(), timeout)
+        except asyncio.TimeoutError:
+            self._count(namespace, "timeouts")
+            raise
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._count(namespace, "errors")
+            raise
+
+    async def do(self, namespace: str, inputs: dict, fn: Callable[[], Awaitable], timeout: Optional[float] = None):
+        """Awaits fn() once for all concurrent callers with the same namespace and inputs."""
+        if not self.enabled:
+            return await fn()
+        key = hash_inputs(namespace, inputs)
+        table = self._table()
+        self._count(namespace, "calls")
+        flight = table.get(key)
+        if flight is None:
+            self._count(namespace, "upstream")
+            metrics.inc("single_flight_calls_total", labels=(("namespace", namespace), ("role", "leader")))
+            timeout = timeout if timeout is not None else self.timeouts.get(namespace, self.timeout)
+            flight = table[key] = _Flight(asyncio.create_task(self._run(namespace, fn, timeout)))
+            flight.task.add_done_callback(functools.partial(self._done, table, key))
+        else:
+            self._count(namespace, "coalesced")
+            metrics.inc("single_flight_calls_total", labels=(("namespace", namespace), ("role", "follower")))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done() and flight.waiters == 1:
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    @staticmethod
+    def _done(table: dict, key: str, task: asyncio.Task):
+        if table.get(key) is not None and table[key].task is task:
+            del table[key]
+        # Marks the exception retrieved when every waiter was cancelled before it landed
+        if not task.cancelled():
+            task.exception()
+
+    def coalesce(self, namespace: str, timeout: Optional[float] = None):
+        """Decorator: concurrent calls of an async function with equal arguments share one run."""
+        def decorate(fn):
+            signature = inspect.signature(fn)
+
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                return await self.do(namespace, dict(bound.arguments), lambda: fn(*args, **kwargs), timeout)
+            return wrapper
+        return decorate
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(len(table) for table in self._flights.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = {ns: dict(c) for ns, c in self.counters.items()}
+        for c in counters.values():
+            c["coalescing_ratio"] = round(c["coalesced"] / c["calls"], 4) if c["calls"] else 0.0
+        calls = sum(c["calls"] for c in counters.values())
+        coalesced = sum(c["coalesced"] for c in counters.values())
+        return {
+            "enabled": self.enabled,
+            "in_flight": self.in_flight(),
+            "coalescing_ratio": round(coalesced / calls, 4) if calls else 0.0,
+            "namespaces": counters,
+        }
+
+# Global instance; SINGLE_FLIGHT=off sends every call upstream
+single_flight = SingleFlight(
+    enabled=os.getenv("SINGLE_FLIGHT", "on") != "off",
+    timeout=float(os.getenv("SINGLE_FLIGHT_TIMEOUT_SECONDS", "60")),
+)
+metrics.describe("single_flight_calls_total", "counter", "Coalescable calls by namespace; role=leader went upstream, role=follower shared a leader's call.")
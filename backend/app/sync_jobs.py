@@ -0,0 +1,120 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+STAGES = ["parse", "sql", "embed", "index"]
+TERMINAL = {"succeeded", "failed", "cancelled"}
+
+class SyncCancelled(Exception):
+    pass
+
+class SyncProgress:
+    """Progress reporter handed to sync_data; the no-op default keeps the CLI path unchanged."""
+
+    def stage(self, name: str, status: str = "running", done: Optional[int] = None, total: Optional[int] = None, **info):
+        pass
+
+    def check_cancelled(self):
+        pass
+
+class SyncJob(SyncProgress):
+    def __init__(self):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.status = "queued"
+        self.stages = {name: {"status": "pending", "done": 0, "total": None} for name in STAGES}
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.result = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    def stage(self, name, status="running", done=None, total=None, **info):
+        with self._lock:
+            entry = self.stages[name]
+            entry["status"] = status
+            if done is not None:
+                entry["done"] = done
+            if total is not None:
+                entry["total"] = total
+            entry.update(info)
+        self.check_cancelled()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise SyncCancelled()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "status": self.status,
+                "cancel_requested": self._cancel.is_set(),
+                "stages": {name: dict(entry) for name, entry in self.stages.items()},
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "error": self.error,
+                "result": self.result,
+            }
+
+class SyncJobManager:
+    """
+    Runs sync jobs on a worker thread so the event loop stays free.
+    Only one sync runs at a time; a request while one is queued/running joins it.
+    """
+
+    def __init__(self, max_workers: int = 1, keep_finished: int = 20):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sync")
+        self.keep_finished = keep_finished
+        self.jobs: Dict[str, SyncJob] = {}
+        self._active: Optional[SyncJob] = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[[SyncJob], dict]):
+        """Returns (job, created); created is False when an in-flight job was reused."""
+        with self._lock:
+            if self._active and self._active.status not in TERMINAL:
+                return self._active, False
+            job = SyncJob()
+            self.jobs[job.job_id] = job
+            self._active = job
+            self._prune()
+        self.executor.submit(self._run, job, fn)
+        return job, True
+
+    def _run(self, job: SyncJob, fn):
+        job.status, job.started_at = "running", time.time()
+        try:
+            job.check_cancelled()
+            job.result = fn(job)
+            job.status = "succeeded"
+        except SyncCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status, job.error = "failed", str(e)
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        finished = [j for j in self.jobs.values() if j.status in TERMINAL]
+        for job in sorted(finished, key=lambda j: j.created_at)[:-self.keep_finished or None]:
+            self.jobs.pop(job.job_id, None)
+
+    def get(self, job_id: str) -> Optional[SyncJob]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[SyncJob]:
+        job = self.jobs.get(job_id)
+        if job and job.status not in TERMINAL:
+            job.cancel()
+        return job
+
+# Global job manager
+sync_jobs = SyncJobManager()
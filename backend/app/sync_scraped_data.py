@@ -1,77 +1,262 @@
-import json
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 from dotenv import load_dotenv
 
 # Load .env from project root relative to this file
 env_path = os.path.join(os.path.dirname(__file__), "..", "..", ".env")
 load_dotenv(env_path)
 
-from .database import SessionLocal, Hackathon, init_db
-from .rag.rag_engine import rag_engine
+from sqlalchemy import Text, cast, func, or_, select, update
 
-def parse_deadline(deadline_str):
-    """Simple parser for relative or absolute deadlines."""
-    today = datetime.now()
-    if "days left" in deadline_str:
-        days = int(deadline_str.split()[0])
-        return today + timedelta(days=days)
-    if "Starts" in deadline_str:
-        try:
-            # Try to parse DD/MM/YY
-            date_part = deadline_str.split()[-1]
-            return datetime.strptime(date_part, "%d/%m/%y")
-        except:
-            return today + timedelta(days=30)
-    return today + timedelta(days=14)
-
-def sync_data():
+from .database import SessionLocal, Hackathon, engine, init_db, normalize_name
+from .rag.rag_engine import get_rag_engine, skill_flag
+from .agents.response_cache import response_cache
+from .agents.recommender import recommendation_index
+from .hackathon_listing import active_hackathons
+from .analytics import department_rollups
+from .sync_jobs import SyncCancelled, SyncProgress
+from .ingest import batched, iter_feeds
+from .deadlines import cache_stats, normalize_deadlines
+from .metrics import span, traced
+from .prompt_compiler import hackathon_summary
+
+def rag_doc_id(item) -> str:
+    """Stable vector-store id for a scraped hackathon."""
+    return f"{item['source']}:{normalize_name(item['name'])}"
+
+UPSERT_CHUNK_SIZE = 1000
+# Items per batch flowing through parse -> SQL -> RAG documents
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+DEADLINE_FAILURE_SAMPLES = 20
+UPDATED_COLUMNS = ("name", "description", "skills_required", "deadline")
+
+def dialect_insert():
+    """INSERT construct with ON CONFLICT support for the configured database."""
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"No upsert support for the {engine.dialect.name} dialect")
+    return insert
+
+def upsert_hackathons(items, chunk_size: int = UPSERT_CHUNK_SIZE, on_progress=None):
+    """
+    Set-based sync of normalized scraped items (with "deadline_at", see normalize_stage) into
+    hackathons, keyed on (source, name_key): INSERT ... ON CONFLICT DO UPDATE per chunk,
+    touching only rows whose description, skills or deadline changed. An unparsed deadline
+    (None) keeps the stored one. Returns (inserted_ids, updated_ids).
+    """
+    hacks = Hackathon.__table__
+    insert = dialect_insert()
+
+    # One row per key (last one wins): a statement may not hit the same conflict row twice
+    rows = {}
+    for item in items:
+        key = (item["source"], normalize_name(item["name"]))
+        rows[key] = {
+            "source": key[0], "name_key": key[1], "name": item["name"], "description": item["description"],
+            "skills_required": item["skills"], "deadline": item["deadline_at"],
+            "summary": hackathon_summary(item["name"], item["description"], item["skills"]),
+        }
+    rows = list(rows.values())
+
+    # Compiled once; executed with a parameter list per chunk, which SQLAlchemy sends as
+    # multi-row INSERT ... RETURNING batches ("insertmanyvalues")
+    stmt = insert(hacks)
+    deadline = func.coalesce(stmt.excluded.deadline, hacks.c.deadline)
+    changed = or_(
+        *[cast(hacks.c[col], Text).is_distinct_from(cast(stmt.excluded[col], Text)) for col in UPDATED_COLUMNS[:-1]],
+        hacks.c.deadline.is_distinct_from(deadline),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["source", "name_key"],
+        # The summary derives from name/description/skills, so it only changes along with them
+        set_={**{col: stmt.excluded[col] for col in UPDATED_COLUMNS[:-1]}, "deadline": deadline, "summary": stmt.excluded.summary},
+        where=changed,
+    ).returning(hacks.c.hackathon_id)
+
+    inserted, updated = [], []
+    with engine.begin() as conn:
+        # Ids are increasing, so anything above this was inserted by this sync
+        max_id = conn.execute(select(func.max(hacks.c.hackathon_id))).scalar() or 0
+        has_legacy = conn.execute(select(hacks.c.hackathon_id).where(hacks.c.source == "").limit(1)).first() is not None
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            # Rows from before the natural key (source "") are adopted by the first feed that lists them
+            for source in {row["source"] for row in chunk} if has_legacy else ():
+                conn.execute(
+                    update(hacks)
+                    .where(hacks.c.source == "", hacks.c.name_key.in_([r["name_key"] for r in chunk if r["source"] == source]))
+                    .values(source=source)
+                )
+
+            for hackathon_id in conn.execute(stmt, chunk).scalars():
+                (inserted if hackathon_id > max_id else updated).append(hackathon_id)
+            if on_progress:
+                on_progress(min(start + chunk_size, len(rows)), len(rows))
+    return inserted, updated
+
+def rag_metadata(item, deadline: datetime, hackathon_id=None) -> dict:
+    """Filterable chunk metadata: source, deadline and one flag per required skill."""
+    skills = [s.lower() for s in item["skills"]]
+    return {
+        "source": item["source"],
+        "name": item["name"],
+        "hackathon_id": hackathon_id,
+        "deadline": deadline.date().isoformat(),
+        # End of the deadline day: date-only deadlines are open all day
+        "deadline_ts": int(datetime.combine(deadline.date(), datetime.max.time()).timestamp()),
+        "skills": skills,
+        **{skill_flag(s): True for s in skills},
+    }
+
+def hackathon_document(item, deadline: datetime, hackathon_id=None):
+    """(doc_id, text, metadata) for the RAG index."""
+    content = f"Hackathon: {item['name']}\nDescription: {item['description']}\nRequired Skills: {', '.join(item['skills'])}\nDeadline: {deadline:%Y-%m-%d}"
+    return rag_doc_id(item), content, rag_metadata(item, deadline, hackathon_id)
+
+@traced("sync")
+def sync_data(progress: SyncProgress = None, feeds=None, batch_size: int = INGEST_BATCH_SIZE):
+    """
+    Scraped feeds -> SQL -> RAG -> in-memory indexes, reporting per-stage progress.
+    Items stream through the stages in batches of batch_size, so memory stays flat whatever
+    the feed size: each batch is upserted and then handed to the RAG indexer as documents.
+    """
+    progress = progress or SyncProgress()
     print("🚀 Starting Data Synchronization...")
     init_db()
-    db = SessionLocal()
-    
-    data_path = os.path.join(os.path.dirname(__file__), "..", "scraped_data.json")
-    with open(data_path, "r") as f:
-        data = json.load(f)
-    
-    all_hackathons = data.get("unstop", []) + data.get("devfolio", [])
-    
-    # 1. Update SQL Database
-    added_count = 0
-    for item in all_hackathons:
-        # Check if exists
-        exists = db.query(Hackathon).filter(Hackathon.name == item["name"]).first()
-        if not exists:
-            h = Hackathon(
-                name=item["name"],
-                description=item["description"],
-                skills_required=item["skills"],
-                deadline=parse_deadline(item["deadline"])
-            )
-            db.add(h)
-            added_count += 1
-    
-    db.commit()
-    print(f"✅ SQL Update Complete: {added_count} new hackathons added.")
-
-    # 2. Update RAG Engine
-    print("🧠 Updating RAG Vector Store...")
+    totals = {"scraped": 0, "added": 0, "updated": 0, "deadline_failures": 0}
+    failure_samples = []  # First few unparseable deadlines, for the report
+    inserted = []  # New hackathon ids, for the recommendation index
+    sql_failed = False
+    # Anchor for relative deadlines of items whose feed has no scrape time
+    started_at = datetime.now()
+
+    def parse_stage():
+        progress.stage("parse")
+        reader = batched(iter_feeds(feeds), batch_size)
+        while True:
+            # Timed per batch: the stages interleave, so a span around the loop would time them all
+            with span("sync.parse"):
+                batch = next(reader, None)
+            if batch is None:
+                break
+            totals["scraped"] += len(batch)
+            progress.stage("parse", done=totals["scraped"])
+            yield batch
+        progress.stage("parse", "done", done=totals["scraped"], total=totals["scraped"], deadline_failures=totals["deadline_failures"])
+
+    def normalize_stage(batches):
+        for batch in batches:
+            with span("sync.normalize"):
+                deadlines, failures = normalize_deadlines(batch, started_at)
+                for item, deadline in zip(batch, deadlines):
+                    item["deadline_at"] = deadline
+            if failures:
+                totals["deadline_failures"] += len(failures)
+                failure_samples.extend(failures[:DEADLINE_FAILURE_SAMPLES - len(failure_samples)])
+                progress.stage("parse", deadline_failures=totals["deadline_failures"])
+            yield batch
+
+    def sql_stage(batches):
+        nonlocal sql_failed
+        progress.stage("sql")
+        try:
+            for batch in batches:
+                with span("sync.sql"):
+                    new_ids, updated_ids = upsert_hackathons(batch)
+                    with engine.connect() as conn:
+                        hackathon_ids = {
+                            (source, key): hid for source, key, hid in conn.execute(
+                                select(Hackathon.source, Hackathon.name_key, Hackathon.hackathon_id)
+                                .where(Hackathon.name_key.in_({normalize_name(item["name"]) for item in batch}))
+                            )
+                        }
+                inserted.extend(new_ids)
+                totals["added"] += len(new_ids)
+                totals["updated"] += len(updated_ids)
+                progress.stage("sql", done=totals["scraped"], added=totals["added"], updated=totals["updated"])
+                yield batch, hackathon_ids
+        except SyncCancelled:
+            raise
+        except Exception as e:
+            sql_failed = True
+            progress.stage("sql", "failed", error=str(e))
+            raise
+        progress.stage("sql", "done", done=totals["scraped"], added=totals["added"], updated=totals["updated"])
+        print(f"✅ SQL Update Complete: {totals['added']} new hackathons added, {totals['updated']} updated.")
+
+    def document_stage(batches):
+        # Expired events are left out so their chunks get pruned
+        now = datetime.now()
+        for batch, hackathon_ids in batches:
+            for item in batch:
+                deadline = item["deadline_at"]
+                # Unparsed deadlines can't pass the active filter either
+                if deadline is not None and deadline >= now:
+                    yield hackathon_document(item, deadline, hackathon_ids.get((item["source"], normalize_name(item["name"]))))
+
+    def refresh_indexes():
+        with span("sync.index"):
+            if totals["added"] or totals["updated"]:
+                response_cache.invalidate("hackathons")
+                active_hackathons.invalidate()
+            if totals["updated"]:
+                # Changed skills/descriptions move existing scores: rescore everything on next use
+                recommendation_index.invalidate()
+                # Moved deadlines move the monthly trend
+                department_rollups.invalidate()
+            elif inserted and recommendation_index.built:
+                # Score only the new hackathons against existing students
+                db = SessionLocal()
+                try:
+                    added = [h for ids in batched(inserted, UPSERT_CHUNK_SIZE) for h in db.query(Hackathon).filter(Hackathon.hackathon_id.in_(ids))]
+                finally:
+                    db.close()
+                recommendation_index.add_hackathons(added)
+
+    # 1 + 2. Stream SQL upserts into the RAG index: the indexer pulls documents, which pulls batches
+    batches = sql_stage(normalize_stage(parse_stage()))
+    print("🧠 Updating SQL and the RAG Vector Store...")
+    progress.stage("embed")
+    counts = None
+    refreshed = False
     try:
-        # Prepare documents for RAG
-        documents = []
-        for item in all_hackathons:
-            content = f"Hackathon: {item['name']}\nDescription: {item['description']}\nRequired Skills: {', '.join(item['skills'])}\nStatus: {item['deadline']}"
-            documents.append(content)
-        
-        # Re-index everything (simplified for demo)
-        rag_engine.add_documents(documents)
-        print("✨ RAG Metadata Re-indexed Successfully.")
-    except Exception as e:
-        print(f"⚠️ RAG Update Skipped: {e}")
-        print("Please ensure your GEMINI_API_KEY is valid in .env to use RAG features.")
-    
-    db.close()
+        try:
+            # Only new or changed documents are embedded
+            counts = get_rag_engine().index_documents(
+                document_stage(batches), on_progress=lambda done, total: progress.stage("embed", done=done, total=total)
+            )
+            progress.stage("embed", "done", **counts)
+            print(f"✨ RAG Index Updated: {counts['embedded']} embedded, {counts['skipped']} skipped, {counts['deleted']} deleted chunks.")
+        except SyncCancelled:
+            raise
+        except Exception as e:
+            if sql_failed:
+                raise
+            progress.stage("embed", "skipped", error=str(e))
+            print(f"⚠️ RAG Update Skipped: {e}")
+            print("Please ensure your GEMINI_API_KEY is valid in .env to use RAG features.")
+            # Finish the SQL stage without embedding
+            for _ in batches:
+                pass
+
+        # 3. Refresh in-memory indexes and caches
+        progress.stage("index")
+        refresh_indexes()
+        refreshed = True
+        progress.stage("index", "done")
+    finally:
+        if not refreshed and (totals["added"] or totals["updated"]):
+            # Cancelled or failed after some batches committed: the caches must still see those rows
+            refresh_indexes()
+    if totals["deadline_failures"]:
+        print(f"⚠️ {totals['deadline_failures']} deadlines could not be parsed (stored deadline kept), e.g.:")
+        for failure in failure_samples[:5]:
+            print(f"   {failure['source']}: {failure['name']!r} -> {failure['deadline']!r}")
     print("🏁 Sync Finished.")
+    return {**totals, "deadline_failure_samples": failure_samples, "deadline_cache": cache_stats(), "rag": counts}
 
 if __name__ == "__main__":
     sync_data()
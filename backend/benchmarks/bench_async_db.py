@@ -0,0 +1,157 @@
+"""
+Mixed concurrent traffic against the DB-backed handlers: the previous pattern
+(async def handlers running sync SQLAlchemy sessions) vs. the AsyncSession path.
+
+SQLite stands in for Neon, with DB_LATENCY seconds of simulated network wait per
+statement: on the sync engine the wait blocks the calling thread (the event loop,
+like psycopg2 does), on the async engine it happens in the driver's worker thread.
+GET / does no DB work, so its latency shows how much the event loop was blocked.
+
+Keep --concurrency below the pool size (15 with the defaults) for the sync run: above
+it, pool checkouts block the loop while the connections they wait for can only be
+released by that same loop, and requests stall until the pool timeout.
+
+Usage (from backend/):
+    python -m benchmarks.bench_async_db [--requests 400] [--concurrency 12] [--db-latency 0.02]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="bench_async_db_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import event
+
+from app.database import SessionLocal, engine, init_db, get_db, Student, Hackathon, Team, Participation
+
+def seed(students=2000, hackathons=100, participations=5000):
+    init_db()
+    rng = random.Random(3)
+    db = SessionLocal()
+    db.add_all(Hackathon(name=f"Hack {i}", description="x" * 200, skills_required=["Python", "React"],
+                         deadline=datetime.now() + timedelta(days=rng.randint(-30, 60))) for i in range(hackathons))
+    db.add_all(Student(name=f"S{i}", email=f"s{i}@x", password_hash="hashed_p", skills=["Python"]) for i in range(students))
+    db.add_all(Team(hackathon_id=i % hackathons + 1, team_name=f"T{i}", team_code=f"C{i:05d}") for i in range(participations // 3))
+    db.commit()
+    db.add_all(Participation(student_id=rng.randint(1, students), hackathon_id=rng.randint(1, hackathons),
+                             team_id=rng.randint(1, participations // 3), role="Member", status="Registered")
+               for _ in range(participations))
+    db.commit()
+    db.close()
+
+def inject_latency(seconds):
+    @event.listens_for(engine, "before_cursor_execute")
+    def blocking_wait(*args):
+        time.sleep(seconds)
+
+    import aiosqlite.core
+    original = aiosqlite.core.Connection._execute
+
+    async def delayed(self, fn, *args, **kwargs):
+        def call():
+            time.sleep(seconds)
+            return fn(*args, **kwargs)
+        return await original(self, call)
+
+    aiosqlite.core.Connection._execute = delayed
+
+def legacy_app():
+    """The handlers as they were: async def endpoints doing blocking Session queries."""
+    legacy = FastAPI()
+
+    @legacy.get("/")
+    async def root():
+        return {"message": "ok"}
+
+    @legacy.get("/api/hackathons")
+    async def list_hackathons(db=Depends(get_db)):
+        return db.query(Hackathon).filter(Hackathon.deadline >= datetime.now()).all()
+
+    @legacy.get("/api/student_progress/{student_id}")
+    async def get_student_progress(student_id: int, db=Depends(get_db)):
+        results = db.query(Participation, Hackathon).join(Hackathon).filter(Participation.student_id == student_id).all()
+        return [{"hackathon": h.name, "status": p.status, "deadline": h.deadline, "hackathon_id": h.hackathon_id} for p, h in results]
+
+    @legacy.get("/api/team/check/{student_id}/{hackathon_id}")
+    async def check_team_membership(student_id: int, hackathon_id: int, db=Depends(get_db)):
+        participation = db.query(Participation).filter(
+            Participation.student_id == student_id, Participation.hackathon_id == hackathon_id).first()
+        if participation and participation.team_id:
+            team = db.query(Team).filter(Team.team_id == participation.team_id).first()
+            return {"status": "exists", "team_id": team.team_id}
+        return {"status": "none"}
+
+    @legacy.get("/api/team/members/{team_id}")
+    async def get_team_members(team_id: int, db=Depends(get_db)):
+        return db.query(Student).join(Participation).filter(Participation.team_id == team_id).all()
+
+    return legacy
+
+def request_mix(n, rng):
+    paths = []
+    for _ in range(n):
+        r = rng.random()
+        if r < 0.3:
+            paths.append("/api/hackathons")
+        elif r < 0.55:
+            paths.append(f"/api/student_progress/{rng.randint(1, 2000)}")
+        elif r < 0.75:
+            paths.append(f"/api/team/check/{rng.randint(1, 2000)}/{rng.randint(1, 100)}")
+        elif r < 0.9:
+            paths.append(f"/api/team/members/{rng.randint(1, 1600)}")
+        else:
+            paths.append("/")
+    return paths
+
+async def drive(app, paths, concurrency):
+    latencies = {"db": [], "root": []}
+    errors = 0
+    sem = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one(path):
+            nonlocal errors
+            async with sem:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    response.raise_for_status()
+                except Exception:
+                    errors += 1
+                    return
+                latencies["root" if path == "/" else "db"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[one(p) for p in paths])
+        elapsed = time.perf_counter() - start
+    return len(paths) / elapsed, latencies, errors
+
+def pct(values, q):
+    return statistics.quantiles(values, n=100)[q - 1] * 1000 if len(values) > 1 else float("nan")
+
+async def main(args):
+    seed()
+    inject_latency(args.db_latency)
+    from app.main import app as current
+
+    paths = request_mix(args.requests, random.Random(7))
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.db_latency * 1000:.0f} ms per statement")
+    print(f"{'handlers':>14} {'req/s':>7} {'db p50':>8} {'db p95':>8} {'GET / p95':>10} {'errors':>7}")
+    for label, app in (("sync session", legacy_app()), ("AsyncSession", current)):
+        rate, lat, errors = await drive(app, paths, args.concurrency)
+        print(f"{label:>14} {rate:>7.0f} {pct(lat['db'], 50):>8.1f} {pct(lat['db'], 95):>8.1f} {pct(lat['root'], 95):>10.1f} {errors:>7}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=12)
+    parser.add_argument("--db-latency", type=float, default=0.02)
+    asyncio.run(main(parser.parse_args()))
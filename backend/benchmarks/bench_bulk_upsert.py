@@ -0,0 +1,112 @@
+"""
+SQL stage of sync_data on a large scraped feed: the old per-item SELECT-by-name loop vs.
+the chunked INSERT ... ON CONFLICT DO UPDATE in upsert_hackathons.
+
+Runs on SQLite with DB_LATENCY seconds of simulated network wait per statement, standing
+in for the round trips to a remote Postgres. The old loop is timed on --legacy-items
+(it makes one round trip per item) and extrapolated to the full feed.
+
+Usage (from backend/):
+    python -m benchmarks.bench_bulk_upsert [--items 100000] [--legacy-items 5000] [--db-latency 0.002]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="bench_upsert_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+
+from sqlalchemy import delete, event, func, select
+
+from app.database import SessionLocal, engine, init_db, Hackathon
+from app.deadlines import normalize_deadlines
+from app.sync_scraped_data import upsert_hackathons
+
+SKILLS = ["Python", "React", "ML", "Solidity", "Go", "Figma", "AWS", "Flutter"]
+
+def scraped_feed(n, rng):
+    items = [
+        {
+            "source": rng.choice(["unstop", "devfolio"]),
+            "name": f"Hackathon {i}",
+            "description": "An international innovation marathon. " * 6,
+            "skills": rng.sample(SKILLS, 3),
+            "deadline": f"{rng.randint(1, 90)} days left",
+        }
+        for i in range(n)
+    ]
+    # What sync_data's normalize stage adds
+    deadlines, _ = normalize_deadlines(items, datetime.now())
+    for item, deadline in zip(items, deadlines):
+        item["deadline_at"] = deadline
+    return items
+
+def legacy_sync(items):
+    """The SQL stage as it was: one existence query per item, new rows added one by one."""
+    db = SessionLocal()
+    added = 0
+    for item in items:
+        exists = db.query(Hackathon).filter(Hackathon.name == item["name"]).first()
+        if not exists:
+            db.add(Hackathon(name=item["name"], description=item["description"],
+                             skills_required=item["skills"], deadline=item["deadline_at"]))
+            added += 1
+    db.commit()
+    db.close()
+    return added
+
+def inject_latency(seconds):
+    @event.listens_for(engine, "before_cursor_execute")
+    def round_trip(*args):
+        time.sleep(seconds)
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+def main(args):
+    init_db()
+    inject_latency(args.db_latency)
+    rng = random.Random(5)
+    feed = scraped_feed(args.items, rng)
+
+    print(f"{args.items} scraped items, {args.db_latency * 1000:.1f} ms per statement")
+    print(f"{'case':>34} {'seconds':>9} {'items/s':>9} {'inserted':>9} {'updated':>8}")
+
+    elapsed, added = timed(legacy_sync, feed[:args.legacy_items])
+    rate = args.legacy_items / elapsed
+    print(f"{'per-item loop (old), first sync':>34} {elapsed:>9.2f} {rate:>9.0f} {added:>9} {'-':>8}")
+    print(f"{'  extrapolated to full feed':>34} {args.items / rate:>9.2f}")
+    with engine.begin() as conn:
+        conn.execute(delete(Hackathon))
+
+    elapsed, (inserted, updated) = timed(upsert_hackathons, feed)
+    print(f"{'bulk upsert, first sync':>34} {elapsed:>9.2f} {args.items / elapsed:>9.0f} {len(inserted):>9} {len(updated):>8}")
+
+    elapsed, (inserted, updated) = timed(upsert_hackathons, feed)
+    print(f"{'bulk upsert, unchanged resync':>34} {elapsed:>9.2f} {args.items / elapsed:>9.0f} {len(inserted):>9} {len(updated):>8}")
+
+    # 10% of events edit their skills, 1% are new
+    for item in rng.sample(feed, args.items // 10):
+        item["skills"] = rng.sample(SKILLS, 4)
+    feed += scraped_feed(args.items // 100, random.Random(6))
+    for i, item in enumerate(feed[args.items:]):
+        item["name"] = f"New hackathon {i}"
+    elapsed, (inserted, updated) = timed(upsert_hackathons, feed)
+    print(f"{'bulk upsert, 10% edited + 1% new':>34} {elapsed:>9.2f} {len(feed) / elapsed:>9.0f} {len(inserted):>9} {len(updated):>8}")
+
+    with engine.connect() as conn:
+        rows = conn.execute(select(func.count()).select_from(Hackathon)).scalar()
+    print(f"rows in hackathons: {rows}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--legacy-items", type=int, default=5_000)
+    parser.add_argument("--db-latency", type=float, default=0.002)
+    main(parser.parse_args())
@@ -0,0 +1,83 @@
+"""
+Time-to-first-byte of /api/chat/stream vs. the blocking /api/chat, using a fake streaming LLM.
+The executor calls it through llm_registry, as the real agents do, so a registry change
+that hides the model's stream from astream_events shows up here.
+
+Exits with status 1 if the stream carried no token events.
+
+Usage (from backend/):
+    python -m benchmarks.bench_chat_stream
+"""
+import asyncio
+import os
+import sys
+import time
+
+from langchain_core.language_models.chat_models import agenerate_from_stream
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from benchmarks.bench_router_concurrency import install_stubs
+
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+TOKEN_DELAY = 0.01
+ANSWER = " ".join(f"word{i}" for i in range(50))
+
+class SlowFakeChatModel(GenericFakeChatModel):
+    """Emits one chunk every TOKEN_DELAY seconds, whether streamed or invoked."""
+    async def _astream(self, *args, **kwargs):
+        async for chunk in super()._astream(*args, **kwargs):
+            await asyncio.sleep(TOKEN_DELAY)
+            yield chunk
+
+    async def _agenerate(self, *args, **kwargs):
+        return await agenerate_from_stream(self._astream(*args, **kwargs))
+
+async def streaming_executor(state):
+    from app.llm import llm_registry
+    llm = SlowFakeChatModel(messages=iter([AIMessage(content=ANSWER)]))
+    chain = ChatPromptTemplate.from_template("{q}") | llm | StrOutputParser()
+    return {"output": await llm_registry.ainvoke(chain, {"q": state["messages"][-1].content})}
+
+async def main():
+    install_stubs()
+    from app import main as api
+    from app.agents import router_agent
+    from app.schemas import ChatRequest
+    router_agent.app_graph = router_agent.build_graph(executor=streaming_executor)
+
+    from starlette.requests import Request
+    request = ChatRequest(message="give me project ideas for a health hackathon", user_id="1")
+    http_request = Request({"type": "http", "client": ("127.0.0.1", 0), "headers": []})
+
+    start = time.perf_counter()
+    await api.chat(request, http_request)
+    blocking = time.perf_counter() - start
+
+    start = time.perf_counter()
+    response = await api.chat_stream(request, http_request)
+    first_intent = first_token = None
+    tokens = 0
+    async for chunk in response.body_iterator:
+        elapsed = time.perf_counter() - start
+        if chunk.startswith("event: intent") and first_intent is None:
+            first_intent = elapsed
+        elif chunk.startswith("event: token"):
+            tokens += 1
+            first_token = first_token or elapsed
+    total = time.perf_counter() - start
+
+    print(f"blocking /api/chat:         {blocking * 1000:.0f} ms to first byte")
+    print(f"stream: intent event at     {first_intent * 1000:.1f} ms")
+    if not tokens:
+        print("❌ stream: no token events, only intent and done")
+        return 1
+    print(f"stream: first token at      {first_token * 1000:.1f} ms")
+    print(f"stream: {tokens} tokens, done at {total * 1000:.0f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,83 @@
+"""
+Deadline normalization on a scraped batch: the old parse_deadline (two formats, everything
+else defaulted to now + 14/30 days, datetime.now() per item) vs. normalize_deadlines
+(all Unstop/Devfolio formats, anchored to scraped_at, each distinct string parsed once).
+
+Reports how many items each one actually understood, whether a resync returns the same
+datetimes, and items per second.
+
+Usage (from backend/):
+    python -m benchmarks.bench_deadlines [--items 200000]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.deadlines import cache_stats, normalize_deadlines
+
+FORMATS = [
+    lambda r, a: f"{r.randint(0, 60)} days left",
+    lambda r, a: f"{r.randint(1, 23)} hours left",
+    lambda r, a: f"Closes in {r.randint(5, 59)} mins",
+    lambda r, a: f"Starts {(a + timedelta(days=r.randint(1, 90))):%d/%m/%y}",
+    lambda r, a: f"{(a + timedelta(days=r.randint(1, 90))):%d %b %y}, 11:59 PM IST",
+    lambda r, a: f"Applications close on {(a + timedelta(days=r.randint(1, 90))):%b %d, %Y}",
+    lambda r, a: f"{(a + timedelta(days=r.randint(1, 90))):%Y-%m-%dT18:29:00.000Z}",
+    lambda r, a: "Registration Closed",
+    lambda r, a: "Ends today",
+    lambda r, a: "TBA",
+]
+
+def legacy_parse_deadline(deadline_str):
+    """sync_scraped_data.parse_deadline before normalization."""
+    today = datetime.now()
+    if "days left" in deadline_str:
+        days = int(deadline_str.split()[0])
+        return today + timedelta(days=days)
+    if "Starts" in deadline_str:
+        try:
+            date_part = deadline_str.split()[-1]
+            return datetime.strptime(date_part, "%d/%m/%y")
+        except:
+            return today + timedelta(days=30)
+    return today + timedelta(days=14)
+
+def legacy_understood(text):
+    return "days left" in text or (text.startswith("Starts") and text.split()[-1].count("/") == 2)
+
+def make_batch(n, rng, scraped_at):
+    anchor = datetime.fromisoformat(scraped_at)
+    return [{"source": "bench", "name": f"H{i}", "deadline": rng.choice(FORMATS)(rng, anchor), "scraped_at": scraped_at}
+            for i in range(n)]
+
+def main(args):
+    rng = random.Random(11)
+    scraped_at = "2026-10-18T08:00:00"
+    items = make_batch(args.items, rng, scraped_at)
+    distinct = len({item["deadline"] for item in items})
+    print(f"{args.items} items, {distinct} distinct deadline strings")
+    print(f"{'parser':>22} {'understood':>11} {'stable':>7} {'items/s':>10}")
+
+    start = time.perf_counter()
+    first = [legacy_parse_deadline(item["deadline"]) for item in items]
+    rate = args.items / (time.perf_counter() - start)
+    # The resync: anything computed from datetime.now() comes out different
+    again = [legacy_parse_deadline(item["deadline"]) for item in items]
+    stable = sum(1 for a, b in zip(first, again) if a == b)
+    understood = sum(1 for item in items if legacy_understood(item["deadline"]))
+    print(f"{'old parse_deadline':>22} {understood / args.items:>11.1%} {stable / args.items:>7.1%} {rate:>10.0f}")
+
+    start = time.perf_counter()
+    deadlines, failures = normalize_deadlines(items, datetime.now())
+    rate = args.items / (time.perf_counter() - start)
+    again, _ = normalize_deadlines(items, datetime.now() + timedelta(hours=1))
+    stable = sum(1 for a, b in zip(deadlines, again) if a == b)
+    print(f"{'normalize_deadlines':>22} {1 - len(failures) / args.items:>11.1%} {stable / args.items:>7.1%} {rate:>10.0f}")
+    print(f"unparsed (reported, not defaulted): {len(failures)}, e.g. {failures[0]['deadline']!r}" if failures else "unparsed: 0")
+    print(f"parse cache: {cache_stats()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=200_000)
+    main(parser.parse_args())
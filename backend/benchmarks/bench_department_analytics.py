@@ -0,0 +1,159 @@
+"""
+Department analytics on 100k participation rows: aggregating in Python over loaded ORM rows
+vs. the GROUP BY rollups in app/analytics.py, and what a dashboard request costs once the
+rollups are materialized.
+
+Also counts narrative LLM calls while participations keep coming in: the old analytics
+agent's answer was dropped from the response cache on every participation write, the new
+one is regenerated only when a rollup refresh changes the numbers. The LLM is replaced by
+a counter with --llm-latency seconds of wait.
+
+Usage (from backend/):
+    python -m benchmarks.bench_department_analytics [--participations 100000] [--students 20000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="bench_analytics_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+
+from sqlalchemy import insert, select
+
+from app.analytics import DepartmentRollups, STATUSES
+from app.database import AsyncSessionLocal, SessionLocal, engine, init_db, Hackathon, Participation, Student, Team
+
+DEPARTMENTS = ["CSE", "ECE", "EEE", "MECH", "CIVIL", "IT", "AIDS", "BME"]
+SKILLS = ["Python", "React", "ML", "Solidity", "Go", "Figma", "AWS", "Flutter", "Rust", "SQL", "Docker", "Kotlin"]
+
+def populate(n_students, n_participations, rng):
+    start = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Hackathon), [
+            {"hackathon_id": i, "name": f"H{i}", "name_key": f"h{i}", "source": "bench", "deadline": start + timedelta(days=i)}
+            for i in range(1, 601)
+        ])
+        conn.execute(insert(Student), [
+            {"student_id": i, "name": f"S{i}", "email": f"s{i}@x", "department": rng.choice(DEPARTMENTS),
+             "skills": rng.sample(SKILLS, rng.randint(1, 5))}
+            for i in range(1, n_students + 1)
+        ])
+        conn.execute(insert(Team), [
+            {"team_id": i, "hackathon_id": rng.randint(1, 600), "team_name": f"T{i}", "team_code": f"T{i}"}
+            for i in range(1, n_participations // 3 + 1)
+        ])
+        conn.execute(insert(Participation), [
+            {"student_id": rng.randint(1, n_students), "hackathon_id": rng.randint(1, 600),
+             "team_id": rng.randint(1, n_participations // 3), "role": "Member",
+             "status": rng.choice(list(STATUSES.values()))}
+            for _ in range(n_participations)
+        ])
+
+def python_aggregate():
+    """The same numbers the way the handler would get them without GROUP BY: load everything, count in Python."""
+    db = SessionLocal()
+    try:
+        students = db.query(Student).all()
+        dept_of = {s.student_id: s.department or "Unassigned" for s in students}
+        per_dept = Counter(dept_of.values())
+        skills = Counter((dept_of[s.student_id], k.lower()) for s in students for k in set(s.skills or []))
+        participants, teams, status, trend = {}, {}, Counter(), Counter()
+        for p, h in db.query(Participation, Hackathon).join(Hackathon, Hackathon.hackathon_id == Participation.hackathon_id):
+            d = dept_of.get(p.student_id)
+            participants.setdefault(d, set()).add(p.student_id)
+            teams.setdefault(d, set()).add(p.team_id)
+            status[(d, p.status)] += 1
+            trend[(d, h.deadline.strftime("%Y-%m"))] += 1
+        return len(per_dept), len(skills), len(trend)
+    finally:
+        db.close()
+
+async def timed_async(fn, *args):
+    start = time.perf_counter()
+    result = await fn(*args)
+    return time.perf_counter() - start, result
+
+async def run(args):
+    rollups = DepartmentRollups(max_age=3600, check_interval=args.check_interval)
+
+    start = time.perf_counter()
+    python_aggregate()
+    python_seconds = time.perf_counter() - start
+
+    async with AsyncSessionLocal() as db:
+        rebuild_seconds, _ = await timed_async(rollups.refresh, db, True)
+        unchanged_seconds, _ = await timed_async(rollups.refresh, db, True)
+        cold = DepartmentRollups(max_age=3600)
+        load_seconds, _ = await timed_async(cold.refresh, db)
+
+        requests = 10_000
+        start = time.perf_counter()
+        for _ in range(requests):
+            await rollups.get(db)
+            body = rollups.body
+        served = (time.perf_counter() - start) / requests
+
+    print(f"{args.participations} participations, {args.students} students, {len(body) / 1024:.1f} KB report")
+    print(f"{'case':>44} {'ms':>10}")
+    print(f"{'load rows + aggregate in Python':>44} {python_seconds * 1000:>10.1f}")
+    print(f"{'GROUP BY rollup rebuild (numbers changed)':>44} {rebuild_seconds * 1000:>10.1f}")
+    print(f"{'GROUP BY rollup rebuild (unchanged)':>44} {unchanged_seconds * 1000:>10.1f}")
+    print(f"{'other worker: load rollup tables':>44} {load_seconds * 1000:>10.1f}")
+    print(f"{'stats request from the materialized report':>44} {served * 1000:>10.4f}")
+
+    await narrative_calls(args)
+
+async def narrative_calls(args):
+    """Dashboard loads interleaved with participation writes, with a rollup refresh every --refresh-every loads."""
+    rollups = DepartmentRollups(max_age=3600, check_interval=3600)
+    calls = {"old": 0, "new": 0}
+    narrated_version = None
+
+    async def llm(kind):
+        calls[kind] += 1
+        await asyncio.sleep(args.llm_latency)
+
+    start = time.perf_counter()
+    for load in range(args.loads):
+        # Old: every participation write invalidated the cached answer
+        await llm("old")
+    old_seconds = time.perf_counter() - start
+
+    rng = random.Random(3)
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        for load in range(args.loads):
+            async with AsyncSessionLocal() as writer:
+                writer.add(Participation(student_id=rng.randint(1, args.students), hackathon_id=1, team_id=1, status="Registered"))
+                await writer.commit()
+            rollups.invalidate()
+            if load % args.refresh_every == 0:
+                await rollups.refresh(db)
+            report = await rollups.get(db)
+            if report["version"] != narrated_version:
+                await llm("new")
+                narrated_version = report["version"]
+    new_seconds = time.perf_counter() - start
+    print(f"{args.loads} dashboard loads, one participation write before each, refresh every {args.refresh_every} loads:")
+    print(f"  narrative LLM calls: old {calls['old']} ({old_seconds:.1f}s)  new {calls['new']} ({new_seconds:.1f}s incl. writes and refreshes)")
+
+def main(args):
+    init_db()
+    populate(args.students, args.participations, random.Random(7))
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--participations", type=int, default=100_000)
+    parser.add_argument("--students", type=int, default=20_000)
+    parser.add_argument("--check-interval", type=float, default=30.0)
+    parser.add_argument("--loads", type=int, default=200)
+    parser.add_argument("--refresh-every", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    main(parser.parse_args())
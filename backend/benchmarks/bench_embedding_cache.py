@@ -0,0 +1,42 @@
+"""
+Cold vs. warm embedding cost with the persistent embedding cache.
+
+Usage (from backend/):
+    python -m benchmarks.bench_embedding_cache [--chunks 2000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from app.rag.embedding_cache import CachedEmbeddings
+from app.rag.embedding_pipeline import EmbeddingPipeline
+from benchmarks.bench_embedding_pipeline import FlakyFakeEmbeddings, MemoryVectorStore, make_chunks
+
+def sync_once(embeddings, chunks, ids):
+    pipeline = EmbeddingPipeline(embeddings, MemoryVectorStore(), batch_size=64, max_in_flight=4, requests_per_minute=1e6)
+    start = time.perf_counter()
+    pipeline.run(chunks, ids)
+    return time.perf_counter() - start
+
+def query_once(embeddings, queries):
+    start = time.perf_counter()
+    for q in queries:
+        embeddings.embed_query(q)
+    return (time.perf_counter() - start) / len(queries)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=2000)
+    args = parser.parse_args()
+
+    model = FlakyFakeEmbeddings(size=768, latency=0.05, failure_rate=0.0)
+    cache = CachedEmbeddings(model, os.path.join(tempfile.mkdtemp(), "cache.sqlite"), model_name="fake-768")
+    chunks, ids = make_chunks(args.chunks)
+    queries = [f"hackathons for skill {i % 50}" for i in range(100)]
+
+    print(f"cold sync  ({args.chunks} chunks): {sync_once(cache, chunks, ids) * 1000:8.0f} ms")
+    print(f"warm sync  ({args.chunks} chunks): {sync_once(cache, chunks, ids) * 1000:8.0f} ms")
+    print(f"cold query (avg):           {query_once(cache, queries[:50]) * 1000:8.2f} ms")
+    print(f"warm query (avg):           {query_once(cache, queries[:50]) * 1000:8.2f} ms")
+    print(cache.stats())
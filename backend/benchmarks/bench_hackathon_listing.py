@@ -0,0 +1,87 @@
+"""
+/api/hackathons throughput on a large table: the per-request query + ORM serialization it
+used to do vs. the snapshot (full body, 304 revalidation, and a small page with ?fields).
+
+Usage (from backend/):
+    python -m benchmarks.bench_hackathon_listing [--rows 50000] [--seconds 5] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="bench_listing_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import insert, select
+
+from app.database import engine, init_db, get_async_db, Hackathon
+
+def seed(rows):
+    init_db()
+    rng = random.Random(4)
+    now = datetime.now()
+    with engine.begin() as conn:
+        conn.execute(insert(Hackathon), [
+            {"name": f"Hackathon {i}", "description": "An international innovation marathon. " * 8,
+             "skills_required": ["Python", "React", "ML"], "deadline": now + timedelta(days=rng.randint(-60, 120))}
+            for i in range(rows)
+        ])
+
+def legacy_app():
+    legacy = FastAPI()
+
+    @legacy.get("/api/hackathons")
+    async def list_hackathons(db=Depends(get_async_db)):
+        return (await db.scalars(select(Hackathon).filter(Hackathon.deadline >= datetime.now()))).all()
+
+    return legacy
+
+async def measure(app, path, seconds, concurrency, headers=None):
+    done, statuses, total_bytes = 0, set(), 0
+    deadline = time.perf_counter() + seconds
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def worker():
+            nonlocal done, total_bytes
+            while time.perf_counter() < deadline:
+                response = await client.get(path, headers=headers)
+                statuses.add(response.status_code)
+                total_bytes = len(response.content)
+                done += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+    return done / elapsed, statuses, total_bytes
+
+async def main(args):
+    seed(args.rows)
+    from app.main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        etag = (await client.get("/api/hackathons")).headers["etag"]
+
+    print(f"{args.rows} hackathons, {args.concurrency} concurrent clients, {args.seconds}s per case")
+    print(f"{'case':>34} {'req/s':>9} {'status':>7} {'body bytes':>11}")
+    cases = [
+        ("query + ORM serialization (old)", legacy_app(), "/api/hackathons", None),
+        ("snapshot, full list", app, "/api/hackathons", None),
+        ("snapshot, If-None-Match", app, "/api/hackathons", {"If-None-Match": etag}),
+        ("snapshot, limit=20&fields=...", app, "/api/hackathons?limit=20&fields=hackathon_id,name,deadline", None),
+    ]
+    for label, target, path, headers in cases:
+        rate, statuses, size = await measure(target, path, args.seconds, args.concurrency, headers)
+        print(f"{label:>34} {rate:>9.1f} {','.join(map(str, sorted(statuses))):>7} {size:>11}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    asyncio.run(main(parser.parse_args()))
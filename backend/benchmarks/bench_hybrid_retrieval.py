@@ -0,0 +1,131 @@
+"""
+RAGEngine.query quality and latency: vector-only vs. BM25-only vs. hybrid (RRF) retrieval,
+with the open-deadline filter applied inside each search.
+
+The "vector" side uses a local character-trigram hashing embedder (no network), which is
+fuzzy the way dense embeddings are: it blurs exact names, numbers and acronyms.
+
+Usage (from backend/):
+    python -m benchmarks.bench_hybrid_retrieval [--docs 2000] [--k 3]
+"""
+import argparse
+import os
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+
+os.environ.setdefault("GEMINI_API_KEY", "bench")
+os.environ["EMBED_CACHE"] = "0"
+os.environ["VECTOR_BACKEND"] = "flat"
+os.environ["VECTOR_STORE_PATH"] = tempfile.mkdtemp(prefix="bench_hybrid_")
+
+from langchain_core.embeddings import Embeddings
+
+from app.rag.bm25 import BM25Index
+from app.rag.rag_engine import RAGEngine, skill_flag
+from app.rag.vector_store import LocalVectorStore
+
+from .bench_recommendation_index import SKILLS
+
+THEMES = ["healthcare", "fintech", "climate", "education", "mobility", "agritech", "security", "gaming", "social good", "open source"]
+SYLLABLES = ["zen", "tri", "kor", "vex", "lum", "dra", "qui", "mor", "tal", "nix", "pha", "ser", "byt", "cod", "orb"]
+CITIES = ["Chennai", "Coimbatore", "Bengaluru", "Hyderabad", "Pune", "Delhi", "Mumbai", "Kochi"]
+
+class TrigramEmbeddings(Embeddings):
+    def __init__(self, dim: int = 2048):
+        self.dim = dim
+
+    def _embed(self, text: str):
+        text = f"  {text.lower()}  "
+        v = np.zeros(self.dim, dtype=np.float32)
+        for i in range(len(text) - 2):
+            v[zlib.crc32(text[i:i + 3].encode()) % self.dim] += 1.0
+        return v.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+def make_corpus(n, rng, now):
+    docs = []
+    for i in range(n):
+        name = "".join(rng.choice(SYLLABLES, size=3)).capitalize() + f" {rng.choice(['Hack', 'Sprint', 'Quest'])}"
+        theme, city = rng.choice(THEMES), rng.choice(CITIES)
+        skills = list(rng.choice(SKILLS, size=3, replace=False))
+        # A quarter of the corpus has already closed
+        deadline = now + timedelta(days=int(rng.integers(-60, -1) if i % 4 == 0 else rng.integers(1, 90)))
+        text = (f"Hackathon: {name}\nDescription: A {theme} hackathon hosted in {city}.\n"
+                f"Required Skills: {', '.join(skills)}\nDeadline: {deadline:%Y-%m-%d}")
+        meta = {
+            "doc_id": f"bench:{i}", "name": name, "source": "bench",
+            "deadline": deadline.date().isoformat(), "deadline_ts": int(deadline.timestamp()),
+            "skills": [s.lower() for s in skills], **{skill_flag(s): True for s in skills},
+        }
+        docs.append((f"bench:{i}#0", text, meta))
+    return docs
+
+def typo(word, rng):
+    i = int(rng.integers(1, len(word) - 2))
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+def make_queries(docs, rng, now, count):
+    """
+    Exact name lookups (lexical wins), misspelled names (fuzzy vectors win) and
+    theme+skill questions with a skill filter.
+    """
+    active = [d for d in docs if d[2]["deadline_ts"] >= now.timestamp()]
+    queries = []
+    for doc_id, text, meta in (active[i] for i in rng.choice(len(active), size=count, replace=False)):
+        queries.append(("name", f"When is the {meta['name']} deadline?", doc_id, None))
+        queries.append(("typo", f"tell me about {typo(meta['name'].split()[0], rng)}", doc_id, None))
+        theme = text.split("A ", 1)[1].split(" hackathon")[0]
+        city = text.split("hosted in ", 1)[1].split(".")[0]
+        queries.append(("topic", f"{theme} event in {city} for {meta['skills'][0]} {meta['skills'][1]} developers", doc_id, [meta["skills"][0]]))
+    return queries
+
+def evaluate(engine, queries, mode, k, now_ts):
+    hits, rr, leaks, timings = 0, 0.0, 0, []
+    for _, text, target, skills in queries:
+        start = time.perf_counter()
+        results = engine.query(text, k=k, skills=skills, mode=mode)
+        timings.append(time.perf_counter() - start)
+        ids = [d.id for d in results]
+        leaks += sum(1 for d in results if d.metadata["deadline_ts"] < now_ts)
+        if target in ids:
+            hits += 1
+            rr += 1.0 / (ids.index(target) + 1)
+    return hits / len(queries), rr / len(queries), leaks, np.percentile(timings, 50) * 1000, np.percentile(timings, 95) * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(12)
+    now = datetime.now()
+    docs = make_corpus(args.docs, rng, now)
+    queries = make_queries(docs, rng, now, args.queries)
+
+    embeddings = TrigramEmbeddings()
+    engine = RAGEngine.__new__(RAGEngine)
+    engine.backend = "flat"
+    engine.vector_store = LocalVectorStore(embeddings)
+    engine.bm25 = BM25Index()
+    engine.vector_store.add_texts([t for _, t, _ in docs], metadatas=[m for _, _, m in docs], ids=[i for i, _, _ in docs])
+    for doc_id, text, meta in docs:
+        engine.bm25.add(doc_id, text, meta)
+
+    print(f"{len(docs)} chunks, {len(queries)} queries, k={args.k}")
+    print(f"{'queries':>8} {'mode':>7} {'hit@k':>7} {'MRR':>6} {'expired':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for kind in ("name", "typo", "topic", "all"):
+        subset = [q for q in queries if kind in ("all", q[0])]
+        for mode in ("vector", "bm25", "hybrid"):
+            hit, mrr, leaks, p50, p95 = evaluate(engine, subset, mode, args.k, now.timestamp())
+            print(f"{kind:>8} {mode:>7} {hit:>7.3f} {mrr:>6.3f} {leaks:>8} {p50:>8.2f} {p95:>8.2f}")
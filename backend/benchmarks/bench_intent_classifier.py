@@ -0,0 +1,59 @@
+"""
+Intent classifier benchmark: local latency and agreement with LLM labels.
+
+Usage (from backend/):
+    python -m benchmarks.bench_intent_classifier            # uses stored LLM labels
+    python -m benchmarks.bench_intent_classifier --relabel  # re-queries Gemini for labels
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+from app.agents.intent_classifier import build_default_classifier
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "intent_eval.jsonl")
+
+def load_fixture(path=FIXTURE_PATH):
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def relabel_with_llm(rows):
+    from app.agents.router_agent import classify_with_llm
+    for row in rows:
+        row["llm_intent"] = classify_with_llm(row["query"])
+    return rows
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+def run(rows, repeat=200):
+    classifier = build_default_classifier()
+    latencies_us = []
+    resolved = agreed = 0
+    for row in rows:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            intent, confidence, _ = classifier.classify_local(row["query"])
+            latencies_us.append((time.perf_counter() - start) * 1e6)
+        if intent and confidence >= classifier.threshold:
+            resolved += 1
+            agreed += intent == row["llm_intent"]
+
+    print(f"queries:            {len(rows)}")
+    print(f"resolved locally:   {resolved} ({resolved / len(rows):.0%})")
+    print(f"agreement with LLM: {agreed}/{resolved} ({agreed / max(resolved, 1):.1%}) on locally resolved")
+    print(f"latency p50:        {statistics.median(latencies_us):.1f} us")
+    print(f"latency p99:        {percentile(latencies_us, 0.99):.1f} us")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--relabel", action="store_true", help="Refresh labels from the LLM before scoring")
+    args = parser.parse_args()
+
+    rows = load_fixture()
+    if args.relabel:
+        rows = relabel_with_llm(rows)
+    run(rows)
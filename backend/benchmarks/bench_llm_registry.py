@@ -0,0 +1,95 @@
+"""
+Router LLM-classification overhead: a fresh ChatGoogleGenerativeAI per message (the old
+router_node) vs. the shared llm_registry client and compiled chain.
+
+The real Gemini client runs against a stub httpx transport. Each transport instance
+pays HANDSHAKE seconds on its first request, standing in for TCP + TLS setup, and
+every request takes LLM_DELAY seconds; a reused client only pays the handshake once.
+
+Usage (from backend/):
+    python -m benchmarks.bench_llm_registry [--calls 200] [--handshake 0.03] [--llm-delay 0.0]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.llm import LLMRegistry
+
+RESPONSE = {
+    "candidates": [{"content": {"parts": [{"text": "IDEA_GEN"}], "role": "model"}, "finishReason": "STOP", "index": 0}],
+    "usageMetadata": {"promptTokenCount": 24, "candidatesTokenCount": 2, "totalTokenCount": 26},
+}
+
+class StubTransport(httpx.MockTransport):
+    """Canned generateContent responses; the first request on a transport pays the handshake."""
+    handshakes = 0
+
+    def __init__(self, handshake: float, delay: float):
+        self.connected = False
+
+        async def handler(request):
+            if not self.connected:
+                self.connected = True
+                StubTransport.handshakes += 1
+                await asyncio.sleep(handshake)
+            await asyncio.sleep(delay)
+            return httpx.Response(200, json=RESPONSE)
+
+        super().__init__(handler)
+
+def stub_model(handshake, delay):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model="gemini-2.5-flash", google_api_key="bench",
+        client_args={"transport": StubTransport(handshake, delay)},
+    )
+
+async def per_request_client(query, handshake, delay):
+    # What router_node used to do for every chat message
+    llm = stub_model(handshake, delay)
+    prompt = f"Classify this hackathon query: RECOMMENDATION, TEAM_MATCHING, IDEA_GEN, ANALYTICS. Query: {query}"
+    res = await llm.ainvoke(prompt)
+    return res.content.strip().upper()
+
+async def timed(fn, calls, concurrency):
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with sem:
+            start = time.perf_counter()
+            await fn(f"query number {i}")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(calls)])
+    return statistics.median(latencies) * 1000, calls / (time.perf_counter() - start)
+
+async def main(args):
+    from app.agents import router_agent
+
+    registry = LLMRegistry(factory=lambda model, **kw: stub_model(args.handshake, args.llm_delay), max_concurrency=args.concurrency)
+    router_agent.llm_registry = registry
+
+    print(f"stub handshake {args.handshake * 1000:.0f} ms, stub LLM {args.llm_delay * 1000:.0f} ms, {args.calls} calls")
+    print(f"{'path':>22} {'concurrency':>12} {'p50 ms':>8} {'calls/s':>8} {'handshakes':>11}")
+    for concurrency in (1, args.concurrency):
+        for label, fn in (
+            ("client per request", lambda q: per_request_client(q, args.handshake, args.llm_delay)),
+            ("shared registry", router_agent.aclassify_with_llm),
+        ):
+            StubTransport.handshakes = 0
+            p50, rate = await timed(fn, args.calls, concurrency)
+            print(f"{label:>22} {concurrency:>12} {p50:>8.2f} {rate:>8.0f} {StubTransport.handshakes:>11}")
+    print(f"registry: {registry.stats()['models']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--handshake", type=float, default=0.03)
+    parser.add_argument("--llm-delay", type=float, default=0.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,296 @@
+"""
+Offline load test. Seeds synthetic students, hackathons and teams into a fresh SQLite
+database at the chosen scale, serves the app in-process with LLM_PROVIDER=fake (no
+Gemini quota, no Neon) and drives the main endpoints concurrently: chat,
+recommendations, the hackathon list, team create/join, team suggestions, department
+stats and /api/sync. Reports requests/s and p50/p95/p99 per endpoint.
+
+Each run is compared with the saved baseline for its scale
+(benchmarks/baselines/load_<scale>.json); the exit status is 1 if an endpoint's p95 grew
+past --tolerance (and by more than --floor-ms) or overall requests/s fell past it.
+Baselines are machine-specific: record one with --save-baseline before relying on them.
+
+Usage (from backend/):
+    python -m benchmarks.bench_load [--scale small|medium|large] [--concurrency 32]
+                                    [--requests 2000] [--save-baseline] [--tolerance 0.5] [--floor-ms 25]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_load_")
+FEED_PATH = os.path.join(WORKDIR, "feed.json")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(WORKDIR, 'bench.db')}",
+    "LLM_PROVIDER": "fake",
+    "VECTOR_BACKEND": "flat",
+    "VECTOR_STORE_PATH": os.path.join(WORKDIR, "vector_index"),
+    "EMBED_CACHE_PATH": os.path.join(WORKDIR, "embedding_cache.sqlite"),
+    "EMBED_CHECKPOINT_PATH": os.path.join(WORKDIR, "embed_checkpoint.txt"),
+    "SCRAPED_FEEDS": FEED_PATH,
+    "WARMUP": "blocking",
+})
+# Fake model speed; override from the environment to model a slower or faster provider
+os.environ.setdefault("FAKE_LLM_LATENCY", "0.05")
+os.environ.setdefault("FAKE_LLM_TOKENS_PER_SEC", "400")
+os.environ.setdefault("FAKE_LLM_OUTPUT_TOKENS", "60")
+os.environ.setdefault("FAKE_EMBED_LATENCY", "0.01")
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+SCALES = {
+    "small": {"students": 200, "hackathons": 100, "teams": 50},
+    "medium": {"students": 2_000, "hackathons": 1_000, "teams": 500},
+    "large": {"students": 20_000, "hackathons": 5_000, "teams": 5_000},
+}
+DEPARTMENTS = ["CSE", "ECE", "EEE", "MECH", "IT", "AIDS"]
+SKILLS = ["Python", "React", "ML", "Solidity", "Go", "Figma", "AWS", "Flutter", "Rust", "SQL", "Docker", "Kotlin"]
+THEMES = ["health", "climate", "fintech", "edtech", "security", "mobility", "agritech", "web3"]
+CHAT_QUERIES = [
+    "recommend hackathons for a python developer",
+    "suggest upcoming hackathons for ML",
+    "find me a teammate who knows React",
+    "who should be on my team for a blockchain event",
+    "show department participation statistics",
+    "give me project ideas for a {theme} hackathon",
+    "what could I build with Flutter for {theme}",
+]
+# Relative weight of each endpoint in the request mix
+MIX = {
+    "GET /api/hackathons": 30,
+    "GET /api/recommendations/{id}": 15,
+    "POST /api/chat": 15,
+    "GET /api/team/suggestions/{id}": 8,
+    "GET /api/analytics/department/stats": 8,
+    "POST /api/team/create": 6,
+    "POST /api/team/join": 6,
+    "POST /api/sync": 1,
+}
+
+def write_feed(n, rng):
+    items = [
+        {
+            "name": f"{rng.choice(THEMES).title()} Hack {i}",
+            "description": f"A {rng.choice(THEMES)} hackathon building with {', '.join(rng.sample(SKILLS, 3))}. " * 3,
+            "skills": rng.sample(SKILLS, 3),
+            "deadline": f"{rng.randint(5, 120)} days left",
+        }
+        for i in range(n)
+    ]
+    with open(FEED_PATH, "w", encoding="utf-8") as f:
+        json.dump({"scraped_at": datetime.now().isoformat(timespec="seconds"), "bench": items}, f)
+
+def seed(scale, rng):
+    """Hackathons through sync_data (which also builds the RAG index), then students, teams and participations."""
+    from sqlalchemy import insert, select
+    from app.database import engine, Hackathon, Participation, Student, Team
+    from app.sync_scraped_data import sync_data
+
+    write_feed(scale["hackathons"], rng)
+    start = time.perf_counter()
+    sync_data()
+    sync_seconds = time.perf_counter() - start
+
+    with engine.begin() as conn:
+        hackathon_ids = [hid for (hid,) in conn.execute(select(Hackathon.hackathon_id))]
+        conn.execute(insert(Student), [
+            {"student_id": i, "name": f"Student {i}", "email": f"s{i}@bench.local", "password_hash": "hashed_bench",
+             "department": rng.choice(DEPARTMENTS), "experience_level": rng.choice(["Beginner", "Intermediate", "Expert"]),
+             "skills": rng.sample(SKILLS, rng.randint(2, 5)), "interests": rng.sample(THEMES, 2)}
+            for i in range(1, scale["students"] + 1)
+        ])
+        teams = [
+            {"team_id": i, "hackathon_id": rng.choice(hackathon_ids), "team_name": f"Team {i}", "team_code": f"BENCH{i:05d}"}
+            for i in range(1, scale["teams"] + 1)
+        ]
+        conn.execute(insert(Team), teams)
+        participations = []
+        for team in teams:
+            for role in ["Leader"] + ["Member"] * rng.randint(1, 3):
+                participations.append({"student_id": rng.randint(1, scale["students"]), "hackathon_id": team["hackathon_id"],
+                                       "team_id": team["team_id"], "role": role, "status": "Registered"})
+        conn.execute(insert(Participation), participations)
+    return hackathon_ids, [t["team_code"] for t in teams], sync_seconds
+
+def make_request(name, client, rng, ctx):
+    student = rng.randint(1, ctx["students"])
+    if name == "GET /api/hackathons":
+        return client.get("/api/hackathons", params={"limit": 20, "offset": rng.choice([0, 0, 20, 40])})
+    if name == "GET /api/recommendations/{id}":
+        return client.get(f"/api/recommendations/{student}")
+    if name == "POST /api/chat":
+        message = rng.choice(CHAT_QUERIES).format(theme=rng.choice(THEMES))
+        return client.post("/api/chat", json={"message": message, "user_id": str(student)})
+    if name == "GET /api/team/suggestions/{id}":
+        return client.get(f"/api/team/suggestions/{student}", params={"narrative": "false"})
+    if name == "GET /api/analytics/department/stats":
+        return client.get("/api/analytics/department/stats")
+    if name == "POST /api/team/create":
+        return client.post("/api/team/create", json={"hackathon_id": rng.choice(ctx["hackathon_ids"]), "student_id": student, "team_name": f"Load {rng.random():.6f}"})
+    if name == "POST /api/team/join":
+        return client.post("/api/team/join", json={"student_id": student, "team_code": rng.choice(ctx["team_codes"])})
+    if name == "POST /api/sync":
+        return client.post("/api/sync")
+    raise ValueError(name)
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values) + 0.5)) - 1))]
+
+async def drive(client, ctx, total, concurrency, seed_value):
+    """Closed loop: `concurrency` workers issue `total` requests from the weighted mix."""
+    names, weights = list(MIX), list(MIX.values())
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    sync_jobs = set()
+    remaining = [total]
+
+    async def worker(i):
+        rng = random.Random(seed_value * 1000 + i)
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await make_request(name, client, rng, ctx)
+                ok = response.status_code < 400
+                if ok and name == "POST /api/sync":
+                    sync_jobs.add(response.json()["job_id"])
+            except Exception:
+                ok = False
+            latencies[name].append(time.perf_counter() - start)
+            if not ok:
+                errors[name] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start, sync_jobs
+
+def summarize(latencies, errors, elapsed):
+    results = {}
+    for name, values in latencies.items():
+        if not values:
+            continue
+        values = sorted(values)
+        results[name] = {
+            "count": len(values),
+            "rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+            "errors": errors[name],
+        }
+    everything = sorted(v for values in latencies.values() for v in values)
+    total = {
+        "count": len(everything),
+        "rps": round(len(everything) / elapsed, 2),
+        "p50_ms": round(percentile(everything, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(everything, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(everything, 0.99) * 1000, 2),
+        "errors": sum(errors.values()),
+    }
+    return results, total
+
+def compare(run, baseline, tolerance, floor_ms):
+    """Regressions: p95 up by more than tolerance and floor_ms, or total requests/s down by more than tolerance."""
+    regressions = []
+    for name, now in run["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        # The floor keeps scheduler noise on millisecond endpoints from failing the run
+        if before and now["p95_ms"] > before["p95_ms"] * (1 + tolerance) and now["p95_ms"] - before["p95_ms"] > floor_ms:
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {now['p95_ms']} ms")
+    if run["total"]["rps"] < baseline["total"]["rps"] * (1 - tolerance):
+        regressions.append(f"total: {baseline['total']['rps']} -> {run['total']['rps']} req/s")
+    return regressions
+
+def print_table(results, total, baseline):
+    print(f"{'endpoint':>36} {'count':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'err':>4} {'p95 vs base':>12}")
+    for name, r in list(results.items()) + [("total", total)]:
+        before = (baseline or {}).get("endpoints", {}).get(name) if name != "total" else (baseline or {}).get("total")
+        delta = f"{(r['p95_ms'] / before['p95_ms'] - 1):+.0%}" if before and before["p95_ms"] else "-"
+        print(f"{name:>36} {r['count']:>6} {r['rps']:>8.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['errors']:>4} {delta:>12}")
+
+async def run(args):
+    import httpx
+    from app.main import app
+    from app.sync_jobs import sync_jobs
+
+    scale = SCALES[args.scale]
+    rng = random.Random(args.seed)
+    hackathon_ids, team_codes, seed_sync_seconds = seed(scale, rng)
+    ctx = {"students": scale["students"], "hackathon_ids": hackathon_ids, "team_codes": team_codes}
+    print(f"scale {args.scale}: {scale}, seeded in {seed_sync_seconds:.1f}s of sync; "
+          f"fake LLM {os.environ['FAKE_LLM_LATENCY']}s + {os.environ['FAKE_LLM_OUTPUT_TOKENS']} tokens at {os.environ['FAKE_LLM_TOKENS_PER_SEC']}/s")
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            await drive(client, ctx, args.warmup, args.concurrency, args.seed + 1)
+            latencies, errors, elapsed, job_ids = await drive(client, ctx, args.requests, args.concurrency, args.seed)
+    # Syncs started by the run finish on the job thread; their duration is reported, not timed per request
+    sync_seconds = []
+    for job_id in job_ids:
+        job = sync_jobs.get(job_id)
+        while job and job.finished_at is None:
+            await asyncio.sleep(0.05)
+        if job and job.started_at:
+            sync_seconds.append(round(job.finished_at - job.started_at, 2))
+
+    results, total = summarize(latencies, errors, elapsed)
+    record = {
+        "scale": args.scale,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "fake_llm": {k: os.environ[k] for k in ("FAKE_LLM_LATENCY", "FAKE_LLM_TOKENS_PER_SEC", "FAKE_LLM_OUTPUT_TOKENS", "FAKE_EMBED_LATENCY")},
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "endpoints": results,
+        "total": total,
+        "sync_job_seconds": sync_seconds,
+    }
+
+    path = os.path.join(BASELINE_DIR, f"load_{args.scale}.json")
+    baseline = None
+    if os.path.exists(path) and not args.save_baseline:
+        with open(path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if (baseline["concurrency"], baseline["requests"], baseline["fake_llm"]) != (args.concurrency, args.requests, record["fake_llm"]):
+            print(f"⚠️ Baseline {path} was recorded with different settings; not comparing.")
+            baseline = None
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {elapsed:.1f}s; background sync jobs: {sync_seconds or 'none'} s")
+    print_table(results, total, baseline)
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
+            f.write("\n")
+        print(f"💾 Baseline saved to {path}")
+        return 0
+    if baseline:
+        regressions = compare(record, baseline, args.tolerance, args.floor_ms)
+        if regressions:
+            print(f"❌ Regressions past {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print(f"✅ Within {args.tolerance:.0%} of the baseline recorded {baseline['recorded_at']}")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--floor-ms", type=float, default=25.0)
+    parser.add_argument("--save-baseline", action="store_true")
+    sys.exit(asyncio.run(run(parser.parse_args())))
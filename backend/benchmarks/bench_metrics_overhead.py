@@ -0,0 +1,69 @@
+"""
+Cost of the instrumentation in app/metrics.py: a bare span() (metrics on, off, and on with
+the request being traced), and a small indexed SELECT on SQLite with and without the
+"db" span listeners on the engine.
+
+Usage (from backend/):
+    python -m benchmarks.bench_metrics_overhead [--spans 200000] [--queries 20000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="bench_metrics_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import create_engine, text
+
+from app.metrics import _trace, instrument_engine, metrics, span
+
+def per_call(fn, n):
+    start = time.perf_counter()
+    fn(n)
+    return (time.perf_counter() - start) / n * 1e6
+
+def spans(n):
+    for _ in range(n):
+        with span("bench", kind="x"):
+            pass
+
+def empty(n):
+    for _ in range(n):
+        pass
+
+def queries(engine, n):
+    with engine.connect() as conn:
+        for i in range(n):
+            conn.execute(text("SELECT v FROM t WHERE k = :k"), {"k": i % 1000}).scalar()
+
+def main(args):
+    print(f"{'case':>34} {'us/call':>9}")
+    baseline = per_call(empty, args.spans)
+    metrics.enabled = False
+    print(f"{'span, METRICS=off':>34} {per_call(spans, args.spans) - baseline:>9.3f}")
+    metrics.enabled = True
+    print(f"{'span, on':>34} {per_call(spans, args.spans) - baseline:>9.3f}")
+    token = _trace.set([])
+    print(f"{'span, on + request traced':>34} {per_call(spans, args.spans) - baseline:>9.3f}")
+    _trace.reset(token)
+
+    plain = create_engine(f"sqlite:///{DB_PATH}")
+    with plain.begin() as conn:
+        conn.execute(text("CREATE TABLE t (k INTEGER PRIMARY KEY, v TEXT)"))
+        conn.execute(text("INSERT INTO t VALUES (:k, :v)"), [{"k": i, "v": str(i)} for i in range(1000)])
+    timed = create_engine(f"sqlite:///{DB_PATH}")
+    instrument_engine(timed)
+    # Alternated, best of five: the machine's noise is larger than the difference
+    bare, instrumented = float("inf"), float("inf")
+    for _ in range(5):
+        bare = min(bare, per_call(lambda n: queries(plain, n), args.queries))
+        instrumented = min(instrumented, per_call(lambda n: queries(timed, n), args.queries))
+    print(f"{'SELECT by key, no listeners':>34} {bare:>9.2f}")
+    print(f"{'SELECT by key, db span':>34} {instrumented:>9.2f}  (+{(instrumented - bare) / bare:.1%})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--spans", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=20_000)
+    main(parser.parse_args())
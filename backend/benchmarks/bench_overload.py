@@ -0,0 +1,176 @@
+"""
+Fault injection: the fake LLM is made slow (--llm-latency seconds per call, "Gemini is
+having a bad day") and requests arrive open-loop at --rate per second for --duration
+seconds, mixed over /api/chat, /api/recommendations/{id}, /api/roadmap and
+/api/analytics/department. The same mix runs with admission control off, then on, each
+phase with its own request stream and a cleared response cache and analytics narrative.
+
+Reports p50/p95/p99 and how many requests were served in full, served degraded (the
+non-LLM fallbacks, or a 503/429 with Retry-After for chat) or failed. Exits with status
+1 if, with admission on, any endpoint's p99 went past its deadline (plus --slack) or a
+request failed.
+
+Usage (from backend/):
+    python -m benchmarks.bench_overload [--llm-latency 4] [--rate 20] [--duration 10]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_overload_")
+FEED_PATH = os.path.join(WORKDIR, "feed.json")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(WORKDIR, 'bench.db')}",
+    "LLM_PROVIDER": "fake",
+    "VECTOR_BACKEND": "flat",
+    "VECTOR_STORE_PATH": os.path.join(WORKDIR, "vector_index"),
+    "EMBED_CACHE_PATH": os.path.join(WORKDIR, "embedding_cache.sqlite"),
+    "EMBED_CHECKPOINT_PATH": os.path.join(WORKDIR, "embed_checkpoint.txt"),
+    "SCRAPED_FEEDS": FEED_PATH,
+    "WARMUP": "blocking",
+    "ANALYTICS_REFRESH_SECONDS": "0",
+    "FAKE_EMBED_LATENCY": "0",
+    # Distinct students per request; the per-student limit is not what is measured here
+    "ADMISSION_RATE_PER_MINUTE": "0",
+})
+
+SKILLS = ["Python", "React", "ML", "Solidity", "Go", "Figma", "AWS", "Flutter", "Rust", "SQL"]
+THEMES = ["health", "climate", "fintech", "edtech", "security", "web3"]
+MIX = {"chat": 40, "recommendations": 25, "roadmap": 20, "analytics": 15}
+STUDENTS = 500
+
+def seed(rng):
+    from types import SimpleNamespace
+    from sqlalchemy import insert
+    from app.database import engine, Student
+    from app.prompt_compiler import student_summary
+    from app.sync_scraped_data import sync_data
+
+    items = [
+        {"name": f"{rng.choice(THEMES).title()} Hack {i}", "description": f"A {rng.choice(THEMES)} hackathon using {', '.join(rng.sample(SKILLS, 3))}.",
+         "skills": rng.sample(SKILLS, 3), "deadline": f"{rng.randint(5, 90)} days left"}
+        for i in range(60)
+    ]
+    with open(FEED_PATH, "w", encoding="utf-8") as f:
+        json.dump({"scraped_at": datetime.now().isoformat(timespec="seconds"), "bench": items}, f)
+    sync_data()
+    students = []
+    for i in range(1, STUDENTS + 1):
+        s = SimpleNamespace(student_id=i, name=f"Student {i}", email=f"s{i}@bench.local", department=rng.choice(["CSE", "ECE", "IT"]),
+                            experience_level="Intermediate", skills=rng.sample(SKILLS, 3), interests=rng.sample(THEMES, 2))
+        students.append({**vars(s), "summary": student_summary(s)})
+    with engine.begin() as conn:
+        conn.execute(insert(Student), students)
+
+async def reset_phase():
+    """Each phase starts cold: no cached chat answers and no stored analytics narrative."""
+    from app.agents.response_cache import response_cache
+    from app.analytics import STATE_ID
+    from app.database import AsyncSessionLocal, AnalyticsState
+    response_cache.clear()
+    async with AsyncSessionLocal() as db:
+        state = await db.get(AnalyticsState, STATE_ID)
+        if state:
+            state.narrative, state.narrative_version = None, None
+            await db.commit()
+
+def request_for(kind, rng, i, phase):
+    student = rng.randint(1, STUDENTS)
+    if kind == "chat":
+        # Distinct messages within and across phases, so every chat reaches the LLM. Analytics
+        # requests are identical: single-flight and the stored narrative serve most of them
+        return "POST", "/api/chat", {"message": f"give me project ideas for a {rng.choice(THEMES)} hackathon #{phase}-{i}", "user_id": str(student)}
+    if kind == "recommendations":
+        return "GET", f"/api/recommendations/{student}", None
+    if kind == "roadmap":
+        return "POST", "/api/roadmap", {"user_id": str(student), "hackathon_id": str(rng.randint(1, 60))}
+    return "GET", "/api/analytics/department", None
+
+async def one(client, kind, method, url, body, results):
+    start = time.perf_counter()
+    try:
+        r = await client.request(method, url, json=body)
+        if r.status_code in (429, 503) or r.headers.get("x-degraded"):
+            outcome = "degraded"
+        elif r.status_code < 400:
+            outcome = "ok"
+        else:
+            outcome = "failed"
+    except Exception:
+        outcome = "failed"
+    results.append((kind, outcome, time.perf_counter() - start))
+
+async def load(client, rate, duration, seed_value):
+    """Open loop: arrivals keep coming at `rate` whatever the latency."""
+    rng = random.Random(seed_value)
+    kinds, weights = list(MIX), list(MIX.values())
+    results, tasks = [], []
+    start = time.perf_counter()
+    for i in range(int(rate * duration)):
+        await asyncio.sleep(max(0.0, start + i / rate - time.perf_counter()))
+        kind = rng.choices(kinds, weights)[0]
+        tasks.append(asyncio.create_task(one(client, kind, *request_for(kind, rng, i, seed_value), results)))
+    await asyncio.gather(*tasks)
+    return results
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+def report(results):
+    rows = {}
+    for kind in MIX:
+        latencies = [t for k, _, t in results if k == kind]
+        outcomes = [o for k, o, _ in results if k == kind]
+        rows[kind] = {
+            "n": len(latencies), "p50": percentile(latencies, 0.50), "p95": percentile(latencies, 0.95), "p99": percentile(latencies, 0.99),
+            "ok": outcomes.count("ok"), "degraded": outcomes.count("degraded"), "failed": outcomes.count("failed"),
+        }
+    for kind, r in rows.items():
+        print(f"{kind:>16} {r['n']:>5} {r['p50']:>8.2f} {r['p95']:>8.2f} {r['p99']:>8.2f} {r['ok']:>5} {r['degraded']:>9} {r['failed']:>7}")
+    return rows
+
+async def main(args):
+    os.environ["FAKE_LLM_LATENCY"] = str(args.llm_latency)
+    seed(random.Random(3))
+    import httpx
+    from app.admission import admission
+    from app.main import app
+
+    failed = []
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=300) as client:
+            print(f"fake LLM {args.llm_latency}s per call, {args.rate} req/s for {args.duration}s")
+            for enabled, seed_value in ((False, 11), (True, 12)):
+                admission.enabled = enabled
+                await reset_phase()
+                print(f"\nadmission {'on' if enabled else 'off'}")
+                print(f"{'endpoint':>16} {'n':>5} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'ok':>5} {'degraded':>9} {'failed':>7}")
+                rows = report(await load(client, args.rate, args.duration, seed_value))
+                if enabled:
+                    for kind, r in rows.items():
+                        deadline = admission.policies[kind].deadline
+                        if r["p99"] > deadline + args.slack:
+                            failed.append(f"{kind}: p99 {r['p99']:.2f}s past its {deadline:.0f}s deadline")
+                        if r["failed"]:
+                            failed.append(f"{kind}: {r['failed']} failed requests")
+            print(f"\nadmission stats: {json.dumps(admission.stats()['endpoints'])}")
+    if failed:
+        print("❌ " + "\n❌ ".join(failed))
+        return 1
+    print("✅ With admission on, every endpoint's p99 stayed within its deadline and nothing failed")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-latency", type=float, default=4.0)
+    parser.add_argument("--rate", type=float, default=20.0)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--slack", type=float, default=1.0)
+    sys.exit(asyncio.run(main(parser.parse_args())))
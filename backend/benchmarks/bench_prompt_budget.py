@@ -0,0 +1,123 @@
+"""
+Prompt size vs. catalogue size for the recommendation and team agents. The catalogue
+grows through the listed sizes (students grow with it); at each size the three agents
+run for --queries students with LLM_PROVIDER=fake and the prompt compiler's mean token
+count per agent is reported, next to what the old prompt (every hackathon's full
+description pasted in) would have cost for get_recommendations_text.
+
+Exits with status 1 if a compiled prompt went over its agent's budget or the mean
+prompt size drifted by more than --drift across catalogue sizes.
+
+Usage (from backend/):
+    python -m benchmarks.bench_prompt_budget [--sizes 100,1000,10000] [--queries 50] [--drift 0.15]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="bench_prompts_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["FAKE_LLM_LATENCY"] = "0"
+os.environ["FAKE_LLM_TOKENS_PER_SEC"] = "0"
+
+from sqlalchemy import insert
+
+from app.database import engine, init_db, Student
+from app.prompt_compiler import count_tokens, prompt_compiler, student_summary
+from app.sync_scraped_data import upsert_hackathons
+from app.agents.recommender import recommendation_index
+from app.agents.team_matcher import team_matcher
+from app.agents.response_cache import response_cache
+from app.agents.specialist_agents import (
+    get_personalized_recommendations, get_recommendations_text, get_team_suggestions, recommendations_text_prompt,
+)
+
+SKILLS = ["Python", "React", "ML", "Solidity", "Go", "Figma", "AWS", "Flutter", "Rust", "SQL", "Docker", "Kotlin", "C++", "Unity"]
+THEMES = ["health", "climate", "fintech", "edtech", "security", "mobility", "agritech", "web3", "space", "music"]
+WORDS = "build ship prototype judges demo api dataset model users impact scale cloud pipeline dashboard mentor pitch".split()
+CONTEXT = " ".join(f"Hackathon: Event {i}. Description: {' '.join(WORDS)}." for i in range(12))
+AGENTS = ("recommendation_reasons", "recommendations_text", "team_suggestions")
+
+def grow(hackathons_from, hackathons_to, students_from, students_to, rng):
+    now = datetime.now()
+    upsert_hackathons([
+        {"source": "bench", "name": f"{rng.choice(THEMES).title()} Hack {i}",
+         "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 160))),
+         "skills": rng.sample(SKILLS, rng.randint(2, 7)), "deadline_at": now + timedelta(days=rng.randint(3, 200))}
+        for i in range(hackathons_from, hackathons_to)
+    ])
+    students = []
+    for i in range(students_from + 1, students_to + 1):
+        s = SimpleNamespace(student_id=i, name=f"Student {i}", email=f"s{i}@bench.local", department=rng.choice(["CSE", "ECE", "IT"]),
+                            experience_level=rng.choice(["Beginner", "Intermediate", "Expert"]),
+                            skills=rng.sample(SKILLS, rng.randint(2, 6)), interests=rng.sample(THEMES, 2))
+        students.append({**vars(s), "summary": student_summary(s)})
+    with engine.begin() as conn:
+        conn.execute(insert(Student), students)
+
+def legacy_text_tokens(student_id):
+    """Token count of the old get_recommendations_text prompt: every hackathon, full description."""
+    from app.database import SessionLocal, Hackathon
+    db = SessionLocal()
+    try:
+        student = db.get(Student, student_id)
+        profile = f"Name: {student.name}, Skills: {student.skills}, Department: {student.department}, Interests: {student.interests}, Experience Level: {student.experience_level}"
+        hacks = "\n".join(f"- {h.name}: {h.description} (Skills: {h.skills_required}, Deadline: {h.deadline})" for h in db.query(Hackathon))
+        return count_tokens(recommendations_text_prompt.format(profile=profile, hackathons=hacks, context=CONTEXT))
+    finally:
+        db.close()
+
+async def measure(n_students, queries, rng):
+    prompt_compiler.reset()
+    response_cache.invalidate("students", "hackathons")
+    recommendation_index.invalidate()
+    team_matcher.invalidate()
+    for student_id in rng.sample(range(1, n_students + 1), queries):
+        await get_personalized_recommendations(student_id)
+        await get_recommendations_text(student_id, CONTEXT)
+        await get_team_suggestions(student_id)
+    return prompt_compiler.stats()
+
+async def main(args):
+    init_db()
+    rng = random.Random(7)
+    sizes = [int(s) for s in args.sizes.split(",")]
+    print(f"{'hackathons':>10} {'students':>8} " + " ".join(f"{a + ' mean/max':>32}" for a in AGENTS) + f" {'old text prompt':>16}")
+    means = {agent: [] for agent in AGENTS}
+    failed = []
+    hackathons = students = 0
+    for size in sizes:
+        grow(hackathons, size, students, size // 2, rng)
+        hackathons, students = size, size // 2
+        stats = await measure(students, min(args.queries, students), rng)
+        cells = []
+        for agent in AGENTS:
+            s = stats[agent]
+            means[agent].append(s["mean_tokens"])
+            cells.append(f"{s['mean_tokens']:>9.0f} / {s['max_tokens']:<6} (budget {s['budget']})")
+            if s["max_tokens"] > s["budget"]:
+                failed.append(f"{agent} at {size} hackathons: {s['max_tokens']} tokens > budget {s['budget']}")
+        print(f"{size:>10} {students:>8} " + " ".join(f"{c:>32}" for c in cells) + f" {legacy_text_tokens(1):>16}")
+
+    for agent, values in means.items():
+        drift = max(values) / min(values) - 1
+        if drift > args.drift:
+            failed.append(f"{agent}: mean prompt size drifted {drift:.0%} across catalogue sizes ({values})")
+    if failed:
+        print("❌ " + "\n❌ ".join(failed))
+        return 1
+    print(f"✅ Every prompt within budget; mean sizes within {args.drift:.0%} across catalogue sizes")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--drift", type=float, default=0.15)
+    sys.exit(asyncio.run(main(parser.parse_args())))
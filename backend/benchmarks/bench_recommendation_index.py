@@ -0,0 +1,65 @@
+"""
+Recommendation index benchmark on a synthetic catalogue.
+
+Usage (from backend/):
+    python -m benchmarks.bench_recommendation_index [--students 10000] [--hackathons 5000]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.agents.recommender import RecommendationIndex
+
+SKILLS = [
+    "Python", "React", "Node", "Java", "Spring Boot", "SQL", "C++", "Embedded Systems", "IoT", "Arduino",
+    "Machine Learning", "Data Science", "NLP", "LLMs", "GenAI", "Computer Vision", "Blockchain", "Solidity",
+    "Web3", "Flutter", "Kotlin", "Swift", "UI/UX", "Figma", "Cloud", "DevOps", "Kubernetes", "Go", "Rust",
+    "Cybersecurity", "AR/VR", "Unity", "Robotics", "FinTech", "HealthTech", "EdTech", "Sustainability",
+]
+WORDS = "build innovative solutions smart city health finance climate education agents data platform mobile web ai".split()
+
+def synthetic_students(n, rng):
+    return [
+        SimpleNamespace(student_id=i, skills=rng.sample(SKILLS, rng.randint(2, 6)), interests=rng.sample(SKILLS, 2))
+        for i in range(1, n + 1)
+    ]
+
+def synthetic_hackathons(n, rng, start_id=1):
+    now = datetime.now()
+    return [
+        SimpleNamespace(
+            hackathon_id=i, name=f"Hack {i}", description=" ".join(rng.choices(WORDS, k=20)),
+            skills_required=rng.sample(SKILLS, rng.randint(2, 5)), deadline=now + timedelta(days=rng.randint(-10, 60)),
+        )
+        for i in range(start_id, start_id + n)
+    ]
+
+def timed(label, fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    print(f"{label:<34}{(time.perf_counter() - start) * 1000:>10.1f} ms")
+    return out
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=10_000)
+    parser.add_argument("--hackathons", type=int, default=5_000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    students = synthetic_students(args.students, rng)
+    hackathons = synthetic_hackathons(args.hackathons, rng)
+    index = RecommendationIndex()
+
+    print(f"{args.students} students x {args.hackathons} hackathons")
+    timed("full build", index.build, students, hackathons)
+    timed("add 100 hackathons (incremental)", index.add_hackathons, synthetic_hackathons(100, rng, args.hackathons + 1))
+    timed("onboard 1 student (incremental)", index.upsert_student, synthetic_students(1, rng)[0])
+
+    sample = rng.sample(range(1, args.students + 1), 1000)
+    start = time.perf_counter()
+    for sid in sample:
+        index.recommend(sid, n=3)
+    print(f"{'recommend top-3 (avg of 1000)':<34}{(time.perf_counter() - start) * 1e6 / len(sample):>10.1f} us")
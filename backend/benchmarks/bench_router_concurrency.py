@@ -0,0 +1,77 @@
+"""
+Router concurrency check with a stubbed LLM and vector store.
+
+Every query falls through to the LLM, so classification and retrieval both run.
+Latency should sit near max(LLM, retrieval) rather than their sum, and the
+heartbeat lag shows whether anything blocked the event loop.
+
+Usage (from backend/):
+    python -m benchmarks.bench_router_concurrency
+"""
+import asyncio
+import statistics
+import sys
+import time
+import types
+
+from langchain_core.documents import Document
+from langchain_core.messages import HumanMessage
+
+LLM_DELAY = 0.30
+RAG_DELAY = 0.20
+CONCURRENCY = 20
+
+class StubVectorStore:
+    """Blocking search, like PGVector.similarity_search."""
+    def query(self, query, k=3):
+        time.sleep(RAG_DELAY)
+        return [Document(page_content=f"context for {query}")]
+
+def install_stubs():
+    stub_rag = types.ModuleType("app.rag.rag_engine")
+    stub = StubVectorStore()
+    stub_rag.get_rag_engine = lambda: stub
+    sys.modules["app.rag.rag_engine"] = stub_rag
+
+    from app.agents import router_agent
+
+    async def fake_llm_classify(query):
+        await asyncio.sleep(LLM_DELAY)
+        return "RECOMMENDATION"
+
+    async def fake_executor(state):
+        return {"output": f"{state['intent']}: {len(state['context'])} chars of context"}
+
+    router_agent.aclassify_with_llm = fake_llm_classify
+    return router_agent.build_graph(executor=fake_executor)
+
+async def heartbeat(stop, lags, interval=0.005):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+async def one_chat(graph, text):
+    start = time.perf_counter()
+    result = await graph.ainvoke({"messages": [HumanMessage(content=text)], "student_id": 1})
+    assert result["context"], "retrieval branch did not run"
+    return time.perf_counter() - start
+
+async def main():
+    graph = install_stubs()
+    stop, lags = asyncio.Event(), []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+
+    latencies = await asyncio.gather(*[one_chat(graph, f"hmm, query number {i}") for i in range(CONCURRENCY)])
+    stop.set()
+    await beat
+
+    latencies = sorted(latencies)
+    print(f"stub LLM {LLM_DELAY * 1000:.0f} ms, stub retrieval {RAG_DELAY * 1000:.0f} ms, {CONCURRENCY} concurrent chats")
+    print(f"chat p50:            {statistics.median(latencies) * 1000:.0f} ms")
+    print(f"chat p99:            {latencies[-1] * 1000:.0f} ms")
+    print(f"serial (sum) would be {(LLM_DELAY + RAG_DELAY) * 1000:.0f} ms")
+    print(f"max event-loop lag:  {max(lags) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""
+N identical concurrent requests to the LLM-backed dashboard endpoints (department
+analytics, personalized recommendations, roadmap), with single-flight coalescing on and
+off. LLM_PROVIDER=fake with --llm-latency seconds per call; counts agent runs and
+upstream LLM calls per burst.
+
+Exits with status 1 if a coalesced burst made more than one upstream LLM call.
+
+Usage (from backend/):
+    python -m benchmarks.bench_single_flight [--requests 50] [--llm-latency 0.3]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="bench_single_flight_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["WARMUP"] = "off"
+os.environ["ANALYTICS_REFRESH_SECONDS"] = "0"
+# One student sends every burst; the coalescing-off bursts would otherwise spend its rate limit
+os.environ["ADMISSION_RATE_PER_MINUTE"] = "0"
+
+def seed():
+    from sqlalchemy import insert
+    from app.database import engine, init_db, Hackathon, Student
+    from app.prompt_compiler import hackathon_summary, student_summary
+    init_db()
+    now = datetime.now()
+    hackathons = [
+        {"hackathon_id": i, "name": f"Hack {i}", "name_key": f"hack {i}", "source": "bench",
+         "description": f"Build {topic} tools with {skills[0]}.", "skills_required": skills, "deadline": now + timedelta(days=10 + i)}
+        for i, (topic, skills) in enumerate([("AI", ["Python", "ML"]), ("fintech", ["Go", "SQL"]), ("climate", ["React", "Python"]),
+                                              ("health", ["Flutter", "Firebase"]), ("web3", ["Solidity", "React"])], start=1)
+    ]
+    for h in hackathons:
+        h["summary"] = hackathon_summary(h["name"], h["description"], h["skills_required"])
+    students = []
+    for i, skills in enumerate([["Python", "ML"], ["React", "Figma"], ["Go", "SQL"], ["Flutter", "Python"]], start=1):
+        s = SimpleNamespace(student_id=i, name=f"Student {i}", email=f"s{i}@bench.local", department="CSE",
+                            experience_level="Intermediate", skills=skills, interests=["AI"])
+        students.append({**vars(s), "summary": student_summary(s)})
+    with engine.begin() as conn:
+        conn.execute(insert(Hackathon), hackathons)
+        conn.execute(insert(Student), students)
+
+async def reset_between_bursts():
+    """Nothing finished may serve the next burst: drops cached answers and the stored narrative."""
+    from app.agents.response_cache import response_cache
+    from app.analytics import STATE_ID
+    from app.database import AsyncSessionLocal, AnalyticsState
+    response_cache.clear()
+    async with AsyncSessionLocal() as db:
+        state = await db.get(AnalyticsState, STATE_ID)
+        if state:
+            state.narrative, state.narrative_version = None, None
+            await db.commit()
+
+async def burst(client, n, method, url, body=None):
+    from app.llm import llm_registry, DEFAULT_MODEL
+    from app.single_flight import single_flight
+    await reset_between_bursts()
+    before_llm = llm_registry.counters.get(DEFAULT_MODEL, {}).get("calls", 0)
+    before_runs = sum(c["upstream"] for ns, c in single_flight.counters.items() if ns.startswith("agent:"))
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(client.request(method, url, json=body) for _ in range(n)))
+    elapsed = time.perf_counter() - start
+    assert all(r.status_code == 200 for r in responses), [r.status_code for r in responses]
+    llm_calls = llm_registry.counters[DEFAULT_MODEL]["calls"] - before_llm
+    agent_runs = sum(c["upstream"] for ns, c in single_flight.counters.items() if ns.startswith("agent:")) - before_runs
+    return llm_calls, agent_runs, elapsed, len({r.content for r in responses})
+
+async def main(args):
+    os.environ["FAKE_LLM_LATENCY"] = str(args.llm_latency)
+    seed()
+    import httpx
+    from app.main import app
+    from app.single_flight import single_flight
+
+    cases = [
+        ("GET /api/analytics/department", "GET", "/api/analytics/department", None),
+        ("GET /api/recommendations/1", "GET", "/api/recommendations/1", None),
+        ("POST /api/roadmap", "POST", "/api/roadmap", {"user_id": "1", "hackathon_id": "1"}),
+    ]
+    failed = []
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120) as client:
+            print(f"{args.requests} identical concurrent requests per burst, fake LLM {args.llm_latency}s per call")
+            print(f"{'endpoint':>30} {'coalescing':>10} {'LLM calls':>9} {'agent runs':>10} {'seconds':>8} {'distinct bodies':>15}")
+            for label, method, url, body in cases:
+                for enabled in (False, True):
+                    single_flight.enabled = enabled
+                    llm_calls, agent_runs, elapsed, distinct = await burst(client, args.requests, method, url, body)
+                    print(f"{label:>30} {'on' if enabled else 'off':>10} {llm_calls:>9} {agent_runs if enabled else '-':>10} {elapsed:>8.2f} {distinct:>15}")
+                    if enabled and (llm_calls != 1 or agent_runs != 1):
+                        failed.append(f"{label}: {llm_calls} LLM calls, {agent_runs} agent runs for one coalesced burst")
+            single_flight.enabled = True
+            print(f"single_flight stats: {single_flight.stats()}")
+    if failed:
+        print("❌ " + "\n❌ ".join(failed))
+        return 1
+    print("✅ Each coalesced burst made exactly one upstream call")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    sys.exit(asyncio.run(main(parser.parse_args())))
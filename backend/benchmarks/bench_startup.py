@@ -0,0 +1,42 @@
+"""
+Worker cold start: time to import app.main (when uvicorn can start serving), time until
+GET / answers, and how long the background warm-up of the lazy singletons takes.
+Each measurement runs in a fresh interpreter.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = r"""
+import json, time
+start = time.perf_counter()
+import app.main as api
+imported = time.perf_counter() - start
+from fastapi.testclient import TestClient
+with TestClient(api.app) as client:
+    client.get("/")
+    first_response = time.perf_counter() - start
+    while api.startup_stats["warmup"]["status"] != "done":
+        time.sleep(0.01)
+print(json.dumps({"import": imported, "first_response": first_response, "warmup": api.startup_stats["warmup"]["seconds"]}))
+"""
+
+def run_once(env_overrides):
+    env = {**os.environ, "WARMUP": "background", **env_overrides}
+    out = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, env=env, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = [run_once({"GEMINI_API_KEY": "bench", "EMBED_CACHE": "0"}) for _ in range(args.runs)]
+    for key in ("import", "first_response", "warmup"):
+        print(f"{key:>15}: median {statistics.median(s[key] for s in samples) * 1000:7.0f} ms")
@@ -0,0 +1,197 @@
+"""
+Memory profile of sync_data on a synthetic multi-GB scraped feed.
+
+Each case runs in its own subprocess and reports max RSS (everything, including SQLite)
+and, except for "sync" where it would triple the run time, the tracemalloc peak:
+  load    the old parse step: json.load of the whole file, the merged item list and the
+          list of RAG document strings (run at --small-mb only: it needs ~10x the file in RAM)
+  read    the streaming reader alone, building each document and dropping it
+  sync    the full streaming sync_data: parse -> SQL upsert (SQLite) -> chunk -> embed
+
+In "sync" the vector store and BM25 index are sinks and the embedder is a cheap hash:
+both indexes hold the whole corpus by design, and what is measured here is the working
+set of the pipeline itself.
+
+Usage (from backend/):
+    python -m benchmarks.bench_streaming_ingest [--size-mb 2048] [--small-mb 128]
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+from datetime import datetime
+
+WORDS = ["hackathon", "innovation", "students", "prizes", "mentors", "cloud", "ai", "blockchain", "health",
+         "climate", "fintech", "open", "source", "build", "ship", "teams", "campus", "national", "global"]
+SCRAPED_AT = "2026-10-18T08:00:00"
+ANCHOR = datetime.fromisoformat(SCRAPED_AT)
+SKILLS = ["Python", "React", "ML", "Solidity", "Go", "Figma", "AWS", "Flutter", "Rust", "Kotlin"]
+
+def write_feed(path, size_mb, seed=9):
+    """{"scraped_at": ..., "unstop": [...], "devfolio": [...]} of about size_mb, written item by item."""
+    rng = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    half = target // 2
+    written, i = 0, 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f'{{"scraped_at": "{SCRAPED_AT}",\n')
+        for n, source in enumerate(("unstop", "devfolio")):
+            f.write(f'"{source}": [\n')
+            first, limit = True, half * (n + 1)
+            while written < limit:
+                item = {
+                    "name": f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS).capitalize()} Hack {i}",
+                    "description": " ".join(rng.choice(WORDS) for _ in range(500)),
+                    "deadline": f"{rng.randint(1, 90)} days left",
+                    "skills": rng.sample(SKILLS, 3),
+                }
+                line = ("" if first else ",\n") + json.dumps(item)
+                f.write(line)
+                written += len(line)
+                first, i = False, i + 1
+            f.write("\n]" + (",\n" if n == 0 else "\n"))
+        f.write("}\n")
+    return i
+
+def case_load(path):
+    """What sync_data did before: the whole file, merged list and document strings at once."""
+    from app.deadlines import parse_deadline
+    from app.sync_scraped_data import hackathon_document
+    with open(path, "r") as f:
+        data = json.load(f)
+    all_hackathons = [dict(item, source=source) for source in ["unstop", "devfolio"] for item in data.get(source, [])]
+    documents = [hackathon_document(item, parse_deadline(item["deadline"], ANCHOR)) for item in all_hackathons]
+    return len(documents)
+
+def case_read(path):
+    from app.ingest import iter_json_feed
+    from app.deadlines import parse_deadline
+    from app.sync_scraped_data import hackathon_document
+    count = 0
+    for item in iter_json_feed(path):
+        hackathon_document(item, parse_deadline(item["deadline"], ANCHOR))
+        count += 1
+    return count
+
+class HashEmbeddings:
+    def embed_documents(self, texts):
+        return [[float(zlib.crc32(t.encode()) % 997), float(len(t))] for t in texts]
+
+class SinkStore:
+    def __init__(self):
+        self.count = 0
+
+    def add_embeddings(self, texts, embeddings, metadatas=None, ids=None, **kwargs):
+        self.count += len(texts)
+        return ids
+
+    def delete(self, ids=None, **kwargs):
+        pass
+
+    def delete_collection(self):
+        pass
+
+    def create_collection(self):
+        pass
+
+class SinkBM25:
+    def __init__(self):
+        self.count = 0
+        self.docs = {}
+
+    def __len__(self):
+        return self.count
+
+    def add(self, doc_id, text, meta):
+        self.count += 1
+
+    def remove(self, ids):
+        pass
+
+    def clear(self):
+        self.count = 0
+
+    def persist(self):
+        pass
+
+def case_sync(path):
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    from app import sync_scraped_data
+    from app.ingest import iter_json_feed
+    from app.rag.embedding_pipeline import EmbeddingPipeline
+    from app.rag.rag_engine import RAGEngine
+
+    engine = RAGEngine.__new__(RAGEngine)
+    engine.embeddings = HashEmbeddings()
+    engine.text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    engine.vector_store = SinkStore()
+    engine.bm25 = SinkBM25()
+    engine.pipeline = EmbeddingPipeline(engine.embeddings, engine.vector_store, requests_per_minute=1e9)
+    sync_scraped_data.get_rag_engine = lambda: engine
+
+    result = sync_scraped_data.sync_data(feeds=[lambda: iter_json_feed(path)])
+    assert result["rag"], "embed stage was skipped"
+    return result["scraped"]
+
+CASES = {"load": case_load, "read": case_read, "sync": case_sync}
+TRACED = {"load", "read"}
+
+def run_case(name, path):
+    """Child process: run one case and print its measurements as JSON."""
+    db_dir = tempfile.mkdtemp(prefix="bench_ingest_db_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+    os.environ.setdefault("GEMINI_API_KEY", "bench")
+    # Imports first, so their allocations are not counted as the case's working set
+    import app.sync_scraped_data  # noqa: F401
+    import app.rag.rag_engine  # noqa: F401
+
+    if name in TRACED:
+        tracemalloc.start()
+    start = time.perf_counter()
+    items = CASES[name](path)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20 if name in TRACED else None
+    print(json.dumps({
+        "items": items, "seconds": seconds, "peak_mb": peak,
+        "maxrss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+def measure(name, path):
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_streaming_ingest", "--case", name, "--feed", path],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main(args):
+    workdir = tempfile.mkdtemp(prefix="bench_ingest_")
+    print(f"{'case':>6} {'feed MB':>8} {'items':>9} {'seconds':>8} {'peak MB':>8} {'maxrss MB':>10}")
+    for size_mb, cases in ((args.small_mb, ("load", "read", "sync")), (args.size_mb, ("read", "sync"))):
+        path = os.path.join(workdir, f"feed_{size_mb}.json")
+        write_feed(path, size_mb)
+        actual_mb = os.path.getsize(path) / 2**20
+        for name in cases:
+            r = measure(name, path)
+            peak = f"{r['peak_mb']:.1f}" if r["peak_mb"] is not None else "-"
+            print(f"{name:>6} {actual_mb:>8.0f} {r['items']:>9} {r['seconds']:>8.1f} {peak:>8} {r['maxrss_mb']:>10.0f}", flush=True)
+        os.remove(path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--small-mb", type=int, default=128)
+    parser.add_argument("--case", choices=sorted(CASES))
+    parser.add_argument("--feed")
+    args = parser.parse_args()
+    if args.case:
+        run_case(args.case, args.feed)
+    else:
+        main(args)
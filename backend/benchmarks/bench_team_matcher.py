@@ -0,0 +1,44 @@
+"""
+Team matcher scaling benchmark over synthetic student pools.
+
+Usage (from backend/):
+    python -m benchmarks.bench_team_matcher [--sizes 1000 10000 100000]
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from app.agents.team_matcher import TeamMatcher
+from benchmarks.bench_recommendation_index import SKILLS
+
+LEVELS = ["Beginner", "Intermediate", "Expert"]
+
+def synthetic_pool(n, rng):
+    return [
+        SimpleNamespace(student_id=i, name=f"Student {i}", skills=rng.sample(SKILLS, rng.randint(1, 6)), experience_level=rng.choice(LEVELS))
+        for i in range(1, n + 1)
+    ]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    print(f"{'pool':>8} {'encode ms':>10} {'suggest avg ms':>15} {'suggest p99 ms':>15}")
+    for size in args.sizes:
+        matcher = TeamMatcher()
+        pool = synthetic_pool(size, rng)
+        start = time.perf_counter()
+        matcher.build(pool)
+        encode_ms = (time.perf_counter() - start) * 1000
+
+        timings = []
+        for sid in rng.sample(range(1, size + 1), min(args.queries, size)):
+            start = time.perf_counter()
+            matcher.suggest(sid, top_n=3)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(f"{size:>8} {encode_ms:>10.1f} {sum(timings) / len(timings):>15.2f} {timings[int(len(timings) * 0.99) - 1]:>15.2f}")
@@ -0,0 +1,50 @@
+"""
+Local vector backends: similarity_search latency vs. corpus size, and IVF recall vs. exact search.
+
+Usage (from backend/):
+    python -m benchmarks.bench_vector_store [--sizes 1000 10000 100000 1000000] [--dim 256]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.rag.vector_store import FlatIndex, IVFIndex, LocalVectorStore
+
+def clustered_corpus(n, dim, rng, clusters=200):
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    return (centers[rng.integers(0, clusters, n)] + 0.6 * rng.normal(size=(n, dim))).astype(np.float32)
+
+def build(index, vectors):
+    store = LocalVectorStore(embeddings=None, index=index)
+    for start in range(0, len(vectors), 100_000):
+        batch = vectors[start:start + 100_000]
+        store.add_embeddings([""] * len(batch), batch, ids=[str(i) for i in range(start, start + len(batch))])
+    return store
+
+def search_all(store, queries, k):
+    timings, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        hits = store.similarity_search_with_score_by_vector(q, k=k)
+        timings.append(time.perf_counter() - start)
+        results.append({doc.id for doc, _ in hits})
+    return np.median(timings) * 1000, results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(5)
+    print(f"{'chunks':>9} {'flat p50 ms':>12} {'ivf p50 ms':>11} {'ivf recall@k':>13}")
+    for size in args.sizes:
+        vectors = clustered_corpus(size, args.dim, rng)
+        queries = clustered_corpus(args.queries, args.dim, rng)
+        flat_ms, exact = search_all(build(FlatIndex(), vectors), queries, args.k)
+        ivf_ms, approx = search_all(build(IVFIndex(), vectors), queries, args.k)
+        recall = np.mean([len(a & e) / len(e) for a, e in zip(approx, exact)])
+        print(f"{size:>9} {flat_ms:>12.2f} {ivf_ms:>11.2f} {recall:>13.3f}")
@@ -13,7 +13,18 @@ export const HODDashboard: React.FC = () => {
         try {
             const response = await fetch(`${API_BASE_URL}/api/sync`, { method: 'POST' });
             const data = await response.json();
-            setSyncLog(data.status === 'success' ? '✓ Synchronization Complete' : '⚠ Sync Node Failed');
+            if (data.status !== 'success') throw new Error(data.message);
+
+            // Sync runs as a background job; poll until it reaches a terminal state
+            let job = data.job;
+            while (!['succeeded', 'failed', 'cancelled'].includes(job.status)) {
+                const running = Object.entries(job.stages).find(([, s]: [string, any]) => s.status === 'running');
+                setSyncLog(running ? `Syncing: ${running[0].toUpperCase()}...` : 'Sync Queued...');
+                await new Promise((resolve) => setTimeout(resolve, 1000));
+                const poll = await fetch(`${API_BASE_URL}/api/sync/${data.job_id}`);
+                job = (await poll.json()).job;
+            }
+            setSyncLog(job.status === 'succeeded' ? '✓ Synchronization Complete' : '⚠ Sync Node Failed');
             setTimeout(() => setSyncLog(null), 5000);
         } catch (error) {
             setSyncLog('⚠ Critical Link Failure');